@@ -0,0 +1,5 @@
+"""Benchmarks of the overhead and scaling of healthcheck.
+
+Run them from the repository root with `python -m benchmarks`, see
+`python -m benchmarks --help`.
+"""
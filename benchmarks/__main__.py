@@ -0,0 +1,89 @@
+"""Command line interface of the benchmarks.
+
+Usage:
+
+    python -m benchmarks [-k PATTERN] [--quick] [--save FILE]
+                         [--compare FILE [--tolerance FRACTION]]
+"""
+import argparse
+import logging
+import sys
+
+import benchmarks.suite  # noqa: registers the benchmarks
+from benchmarks.runner import (
+    Skip, find_regressions, format_report, load_results, measure,
+    save_results, select)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Measure latency percentiles and throughput of '
+                    'healthcheck checkers.')
+    parser.add_argument(
+        '-k', dest='pattern',
+        help='only run benchmarks whose name matches this regular '
+             'expression')
+    parser.add_argument(
+        '--list', action='store_true',
+        help='list the benchmarks instead of running them')
+    parser.add_argument(
+        '--quick', action='store_true',
+        help='run a tenth of the iterations, for a rough idea')
+    parser.add_argument(
+        '--save', metavar='FILE',
+        help='save the results as JSON, to compare later runs with')
+    parser.add_argument(
+        '--compare', metavar='FILE',
+        help='compare the median latencies with results saved by --save, '
+             'and exit with status 1 if one regressed')
+    parser.add_argument(
+        '--tolerance', type=float, default=0.25,
+        help='fraction by which a median latency may grow before it counts '
+             'as a regression (default: %(default)s)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Checks failing or timing out in a benchmark would log tracebacks.
+    logging.basicConfig(level=logging.CRITICAL)
+
+    selected = select(args.pattern)
+    if args.list:
+        for bench in selected:
+            print(bench.name)
+        return 0
+
+    results = []
+    for bench in selected:
+        iterations = None
+        if args.quick:
+            iterations = max(bench.iterations // 10, 1)
+        try:
+            stats = measure(bench, iterations=iterations).as_dict()
+        except Skip as e:
+            stats = str(e)
+        results.append((bench.name, stats))
+        sys.stderr.write('.')
+        sys.stderr.flush()
+    sys.stderr.write('\n')
+
+    print(format_report(results))
+
+    if args.save:
+        save_results(args.save, results)
+
+    if args.compare:
+        regressions = find_regressions(
+            results, load_results(args.compare), args.tolerance)
+        for name, before, after in regressions:
+            print('Regression in {0}: median {1:.3f}ms -> {2:.3f}ms'.format(
+                name, before, after))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,19 @@
+"""Async checks for the benchmarks (Python 3.5+)."""
+import asyncio
+
+from healthcheck.aio import AsyncHealthCheck
+
+
+class AsyncSlowCheck(AsyncHealthCheck):
+    def __init__(self, duration, **kwargs):
+        super(AsyncSlowCheck, self).__init__(**kwargs)
+        self.duration = duration
+
+    async def run_async(self):
+        await asyncio.sleep(self.duration)
+        return self.report(True, 'ok')
+
+
+def async_slow_checks(count, duration):
+    return [AsyncSlowCheck(duration, check_id='async slow {0}'.format(i))
+            for i in range(count)]
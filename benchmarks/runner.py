@@ -0,0 +1,241 @@
+"""Timing and reporting of benchmarks."""
+import json
+import math
+import re
+import threading
+from contextlib import contextmanager
+
+from healthcheck.utils import monotonic
+
+# Benchmarks in the order they are registered and run.
+BENCHMARKS = []
+
+
+class Skip(Exception):
+    """Raised by the setup of a benchmark which can't run here, e.g. as an
+    optional dependency is missing."""
+
+
+class Benchmark(object):
+    def __init__(self, name, setup, iterations=200, concurrency=1):
+        """Possible arguments:
+
+            - name: unique name, groups are separated by slashes.
+            - setup: context manager factory, which prepares what's measured
+                and yields the operation to time, a callable without
+                arguments.
+            - iterations: number of timed calls of the operation.
+            - concurrency: number of threads calling the operation together.
+                The iterations are split between them.
+        """
+        self.name = name
+        self.setup = setup
+        self.iterations = iterations
+        self.concurrency = concurrency
+
+
+def benchmark(name, iterations=200, concurrency=1):
+    """Register a generator function as the setup of a benchmark.
+
+    Usage:
+
+        @benchmark('checker/trivial', iterations=1000)
+        def trivial_checker():
+            checker = HealthChecker([TrivialCheck()])
+            yield checker
+            checker.shutdown()
+    """
+    def register(setup):
+        BENCHMARKS.append(Benchmark(name, contextmanager(setup),
+                                    iterations=iterations,
+                                    concurrency=concurrency))
+        return setup
+    return register
+
+
+def select(pattern=None):
+    """Return the registered benchmarks whose name matches the regular
+    expression `pattern`."""
+    if pattern is None:
+        return list(BENCHMARKS)
+    return [bench for bench in BENCHMARKS if re.search(pattern, bench.name)]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of a sorted list."""
+    if not sorted_values:
+        return None
+    rank = int(math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+class Stats(object):
+    """Latencies of the calls of a benchmark, and the time they took."""
+
+    def __init__(self, name, latencies, elapsed, concurrency=1):
+        self.name = name
+        self.latencies = sorted(latencies)
+        self.elapsed = elapsed
+        self.concurrency = concurrency
+
+    @property
+    def calls(self):
+        return len(self.latencies)
+
+    @property
+    def throughput(self):
+        """Calls per second."""
+        if not self.elapsed:
+            return None
+        return self.calls / self.elapsed
+
+    def as_dict(self):
+        latencies = self.latencies
+        return {
+            'calls': self.calls,
+            'concurrency': self.concurrency,
+            'mean_ms': _to_ms(sum(latencies) / len(latencies)),
+            'p50_ms': _to_ms(percentile(latencies, 0.5)),
+            'p90_ms': _to_ms(percentile(latencies, 0.9)),
+            'p99_ms': _to_ms(percentile(latencies, 0.99)),
+            'max_ms': _to_ms(latencies[-1]),
+            'throughput': round(self.throughput, 1),
+        }
+
+
+def _to_ms(seconds):
+    return round(seconds * 1000, 4)
+
+
+def measure(bench, iterations=None, warmup=None):
+    """Run a benchmark and return its Stats.
+
+    The operation is called `warmup` times (a tenth of the iterations by
+    default) before timing starts, so that pools, caches and connections
+    are set up.
+    """
+    if iterations is None:
+        iterations = bench.iterations
+    iterations = max(iterations, bench.concurrency)
+    if warmup is None:
+        warmup = max(iterations // 10, 1)
+
+    with bench.setup() as operation:
+        for _ in range(warmup):
+            operation()
+
+        if bench.concurrency == 1:
+            start = monotonic()
+            latencies = _time_calls(operation, iterations)
+            elapsed = monotonic() - start
+        else:
+            latencies, elapsed = _time_concurrent_calls(
+                operation, iterations, bench.concurrency)
+
+    return Stats(bench.name, latencies, elapsed, bench.concurrency)
+
+
+def _time_calls(operation, iterations):
+    latencies = []
+    for _ in range(iterations):
+        start = monotonic()
+        operation()
+        latencies.append(monotonic() - start)
+    return latencies
+
+
+def _time_concurrent_calls(operation, iterations, concurrency):
+    latencies = []
+    errors = []
+    barrier = threading.Event()
+
+    def client(calls):
+        barrier.wait()
+        try:
+            client_latencies = _time_calls(operation, calls)
+        except Exception as e:
+            errors.append(e)
+            return
+        # list.extend is atomic.
+        latencies.extend(client_latencies)
+
+    threads = []
+    for i in range(concurrency):
+        calls = iterations // concurrency
+        if i < iterations % concurrency:
+            calls += 1
+        thread = threading.Thread(target=client, args=(calls,))
+        thread.start()
+        threads.append(thread)
+
+    start = monotonic()
+    barrier.set()
+    for thread in threads:
+        thread.join()
+    elapsed = monotonic() - start
+
+    if errors:
+        raise errors[0]
+    return latencies, elapsed
+
+
+def format_report(results):
+    """Format a table of results, a list of (name, stats dict or skip
+    reason)."""
+    columns = ('p50_ms', 'p90_ms', 'p99_ms', 'max_ms', 'throughput')
+    headers = ('benchmark', 'calls', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms',
+               'calls/s')
+    rows = []
+    for name, stats in results:
+        if isinstance(stats, dict):
+            rows.append([name, str(stats['calls'])] +
+                        ['{0:.3f}'.format(stats[column])
+                         for column in columns[:-1]] +
+                        ['{0:.1f}'.format(stats['throughput'])])
+        else:
+            rows.append([name, 'skipped: {0}'.format(stats)])
+
+    widths = [max([len(header)] + [len(row[i]) for row in rows
+                                   if len(row) == len(headers)])
+              for i, header in enumerate(headers)]
+    lines = [_format_row(headers, widths)]
+    lines.append(_format_row(['-' * width for width in widths], widths))
+    for row in rows:
+        if len(row) == len(headers):
+            lines.append(_format_row(row, widths))
+        else:
+            lines.append('{0}  {1}'.format(row[0].ljust(widths[0]), row[1]))
+    return '\n'.join(lines)
+
+
+def _format_row(row, widths):
+    cells = [row[0].ljust(widths[0])]
+    cells.extend(cell.rjust(width) for cell, width in zip(row[1:], widths[1:]))
+    return '  '.join(cells)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def save_results(path, results):
+    with open(path, 'w') as f:
+        json.dump({'results': dict(
+            (name, stats) for name, stats in results
+            if isinstance(stats, dict))}, f, indent=2, sort_keys=True)
+
+
+def find_regressions(results, baseline, tolerance, metric='p50_ms'):
+    """Return (name, baseline value, new value) for each benchmark whose
+    `metric` grew by more than the `tolerance` fraction over `baseline`, a
+    dict of stats by name, as saved by save_results()."""
+    regressions = []
+    for name, stats in results:
+        if not isinstance(stats, dict) or name not in baseline:
+            continue
+        before = baseline[name][metric]
+        after = stats[metric]
+        if after > before * (1 + tolerance):
+            regressions.append((name, before, after))
+    return regressions
@@ -0,0 +1,243 @@
+"""The benchmarks, registered on import.
+
+Each one measures a whole call of a checker (or of the status view), so
+what's reported is the cost seen by whoever asks for the status.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from healthcheck import (
+    FilesDontExistHealthCheck, FilesExistHealthCheck, HealthCheck,
+    HealthChecker, ListHealthCheck)
+from healthcheck.cache import ResultCache
+from healthcheck.scheduler import HealthCheckScheduler
+from healthcheck.watch import PathWatcher
+
+from benchmarks.runner import Skip, benchmark
+
+# How long each simulated slow check takes, in seconds.
+SLOW_CHECK_DURATION = 0.005
+SLOW_CHECK_COUNT = 10
+
+
+class TrivialCheck(HealthCheck):
+    check_id = 'trivial'
+
+    def run(self):
+        return self.report(True, 'ok')
+
+
+class TrivialListCheck(ListHealthCheck):
+    check_id = 'trivial list'
+
+    def check_item(self, item):
+        return True, {item: 'ok'}
+
+
+class SlowCheck(HealthCheck):
+    def run(self):
+        time.sleep(SLOW_CHECK_DURATION)
+        return self.report(True, 'ok')
+
+
+def trivial_checks(count):
+    return [TrivialCheck(check_id='trivial {0}'.format(i))
+            for i in range(count)]
+
+
+def slow_checks(**kwargs):
+    return [SlowCheck(check_id='slow {0}'.format(i), **kwargs)
+            for i in range(SLOW_CHECK_COUNT)]
+
+
+def register_checker_benchmarks():
+    for count, iterations in ((1, 5000), (10, 2000), (100, 300), (1000, 30)):
+        def trivial_checker(count=count):
+            checker = HealthChecker(trivial_checks(count))
+            yield checker
+
+        benchmark('checker/trivial/{0}'.format(count),
+                  iterations=iterations)(trivial_checker)
+
+    for count, iterations in ((10, 1000), (100, 200), (1000, 20)):
+        def threaded_trivial_checker(count=count):
+            checker = HealthChecker(trivial_checks(count), max_workers=8)
+            yield checker
+            checker.shutdown()
+
+        benchmark('checker/trivial-threads/{0}'.format(count),
+                  iterations=iterations)(threaded_trivial_checker)
+
+
+def register_list_benchmarks():
+    for count, iterations in ((100, 1000), (1000, 200), (10000, 20)):
+        def list_checker(count=count):
+            items = ['item {0}'.format(i) for i in range(count)]
+            checker = HealthChecker([TrivialListCheck(items)])
+            yield checker
+
+        benchmark('list/items/{0}'.format(count),
+                  iterations=iterations)(list_checker)
+
+    def threaded_list_checker():
+        items = ['item {0}'.format(i) for i in range(1000)]
+        check = TrivialListCheck(items, max_workers=8)
+        yield HealthChecker([check])
+        check.shutdown()
+
+    benchmark('list/items-threads/1000', iterations=100)(
+        threaded_list_checker)
+
+
+def register_files_benchmarks():
+    for count, iterations in ((1000, 100), (5000, 20)):
+        def files_checker(count=count, watch=False):
+            directory = tempfile.mkdtemp(prefix='healthcheck-benchmark-')
+            try:
+                present = []
+                for i in range(count):
+                    path = os.path.join(directory, 'present-{0}'.format(i))
+                    open(path, 'w').close()
+                    present.append(path)
+                missing = [os.path.join(directory, 'missing-{0}'.format(i))
+                           for i in range(count)]
+
+                watcher = None
+                if watch:
+                    watcher = PathWatcher()
+                    watcher.start()
+                checker = HealthChecker([
+                    FilesExistHealthCheck(present, check_id='present',
+                                          watcher=watcher),
+                    FilesDontExistHealthCheck(missing, check_id='missing',
+                                              watcher=watcher),
+                ])
+                try:
+                    yield checker
+                finally:
+                    if watcher is not None:
+                        watcher.stop()
+            finally:
+                shutil.rmtree(directory)
+
+        benchmark('files/stat/{0}'.format(count),
+                  iterations=iterations)(files_checker)
+        benchmark('files/watched/{0}'.format(count),
+                  iterations=iterations * 10)(
+            lambda count=count: files_checker(count, watch=True))
+
+
+def register_execution_mode_benchmarks():
+    name = 'slow/{0}x{1}ms/'.format(
+        SLOW_CHECK_COUNT, int(SLOW_CHECK_DURATION * 1000))
+
+    @benchmark(name + 'sequential', iterations=20)
+    def sequential():
+        yield HealthChecker(slow_checks())
+
+    @benchmark(name + 'threads', iterations=100)
+    def threads():
+        checker = HealthChecker(slow_checks(), max_workers=SLOW_CHECK_COUNT)
+        yield checker
+        checker.shutdown()
+
+    @benchmark(name + 'asyncio', iterations=100)
+    def asyncio_checker():
+        try:
+            import asyncio
+            from benchmarks.async_suite import async_slow_checks
+            from healthcheck.aio import AsyncHealthChecker
+        except (ImportError, SyntaxError) as e:
+            # Name the error, so that a broken import isn't taken for an old
+            # Python.
+            raise Skip('asyncio needs Python 3.5+ ({0}: {1})'.format(
+                e.__class__.__name__, e))
+
+        checker = AsyncHealthChecker(async_slow_checks(
+            SLOW_CHECK_COUNT, SLOW_CHECK_DURATION))
+        loop = asyncio.new_event_loop()
+        yield lambda: loop.run_until_complete(checker())
+        loop.close()
+
+    @benchmark(name + 'processes', iterations=100)
+    def processes():
+        if not hasattr(os, 'fork'):
+            raise Skip('isolated checks need fork()')
+        checker = HealthChecker(slow_checks(isolated=True),
+                                max_workers=SLOW_CHECK_COUNT)
+        yield checker
+        checker.shutdown()
+
+    @benchmark(name + 'cached', iterations=2000)
+    def cached():
+        # The TTL outlives the benchmark, so this measures cache hits.
+        yield HealthChecker(slow_checks(), cache=ResultCache(ttl=3600))
+
+    @benchmark(name + 'scheduled', iterations=2000)
+    def scheduled():
+        checks = slow_checks()
+        scheduler = HealthCheckScheduler(checks, interval=3600)
+        scheduler.start()
+        # The warm-up calls store the first results, the timed ones read
+        # them.
+        yield HealthChecker(checks, cache=scheduler)
+        scheduler.stop()
+
+
+def register_django_benchmarks():
+    for clients in (1, 8):
+        benchmark('django/status/{0}-clients'.format(clients),
+                  iterations=1000, concurrency=clients)(django_client)
+
+
+def django_client():
+    """Yield a function requesting the status view through Django's
+    request handler, with a check of files and a trivial check."""
+    try:
+        import django
+        from django.conf import settings
+        from django.test import Client
+        from django.test.utils import override_settings
+    except ImportError as e:
+        raise Skip('Django is not available (ImportError: {0})'.format(e))
+
+    if not settings.configured:
+        settings.configure(
+            SECRET_KEY='benchmark',
+            ALLOWED_HOSTS=['*'],
+            ROOT_URLCONF='healthcheck.contrib.django.status_endpoint.urls',
+            DATABASES={},
+        )
+        django.setup()
+
+    directory = tempfile.mkdtemp(prefix='healthcheck-benchmark-')
+    clients = threading.local()
+
+    def get_status():
+        if not hasattr(clients, 'client'):
+            clients.client = Client()
+        response = clients.client.get('/')
+        if response.status_code != 200:
+            raise AssertionError('The status view returned {0}: {1}'.format(
+                response.status_code, response.content))
+
+    try:
+        files = [os.path.join(directory, 'quiesce-{0}'.format(i))
+                 for i in range(10)]
+        with override_settings(STATUS_CHECK_DBS=False,
+                               STATUS_CHECK_FILES=files,
+                               STATUS_CHECKS=[
+                                   'benchmarks.suite.TrivialCheck']):
+            yield get_status
+    finally:
+        shutil.rmtree(directory)
+
+
+register_checker_benchmarks()
+register_list_benchmarks()
+register_files_benchmarks()
+register_execution_mode_benchmarks()
+register_django_benchmarks()
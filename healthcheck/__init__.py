@@ -2,6 +2,9 @@ __doc__ = 'Health Checker for Yola Services'
 __version__ = '0.1.4'
 __url__ = 'https://github.com/yola/healthcheck'
 
-from .checks import (DjangoDBsHealthCheck, FilesDontExistHealthCheck,
-                     FilesExistHealthCheck, HealthChecker, HealthCheck,
-                     ListHealthCheck)
+from .checks import (CheckResult, DjangoDBsHealthCheck,
+                     FilesDontExistHealthCheck, FilesExistHealthCheck,
+                     HealthChecker, HealthCheck, ListHealthCheck,
+                     ProcessHealthCheck)
+from .network import HTTPHealthCheck, TCPHealthCheck
+from .fleet import FleetHealthCheck
@@ -0,0 +1,309 @@
+"""asyncio counterparts of the checks and the checker (Python 3.5+)."""
+import asyncio
+import logging
+import random
+
+from healthcheck.checks import (
+    HealthChecker, HealthCheck, ListHealthCheck, _Run)
+from healthcheck.scheduler import HealthCheckScheduler
+from healthcheck.utils import monotonic
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHealthCheck(HealthCheck):
+    """Base class for checks implemented as coroutines.
+
+    Subclasses implement `async def run_async()`, which returns a
+    CheckResult, just like .run() does for sync checks. The check can still
+    be used with the sync HealthChecker: .run() drives .run_async() in a
+    private event loop.
+    """
+
+    async def run_async(self):
+        raise ValueError(
+            'You must override "run_async" method for check %s.' %
+            (self.__class__.__name__,)
+        )
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.run_async())
+        finally:
+            loop.close()
+
+    async def execute_async(self):
+        """Async counterpart of .execute()."""
+        breaker = self.circuit_breaker
+        if breaker is not None:
+            result = breaker.before_run()
+            if result is not None:
+                return result
+
+        start = monotonic()
+        try:
+            result = await self.run_async()
+        except Exception as e:
+            logger.exception('Health check %r raised an error.', self.check_id)
+            result = self._error_result(e, monotonic() - start)
+        else:
+            result = self._finish(result, monotonic() - start)
+
+        if breaker is not None:
+            result = breaker.after_run(result)
+        return result
+
+
+class AsyncListHealthCheck(AsyncHealthCheck, ListHealthCheck):
+    """ListHealthCheck, which checks all items concurrently with
+    `async def check_item_async(item)`.
+
+    check_item_async() must return the same as ListHealthCheck.check_item().
+    """
+
+    async def run_async(self):
+        items = self.kwarg_items or self.items
+        results = await asyncio.gather(
+            *[self._timed_check_item_async(item) for item in items])
+
+        ok = True
+        details = {}
+        item_durations = {}
+        for item_ok, item_details, duration in results:
+            if not item_ok:
+                ok = False
+            details.update(item_details)
+            for item_id in item_details:
+                item_durations[item_id] = duration
+
+        return self.report(ok, details, item_durations=item_durations)
+
+    async def _timed_check_item_async(self, item):
+        start = monotonic()
+        item_ok, item_details = await self.check_item_async(item)
+        return item_ok, item_details, monotonic() - start
+
+    async def check_item_async(self, item):
+        raise ValueError(
+            'You must override "check_item_async" method for check %s.' %
+            (self.__class__.__name__,)
+        )
+
+
+class AsyncHealthChecker(HealthChecker):
+    """HealthChecker, which runs all checks concurrently on the event loop.
+
+    Usage:
+
+        checker = AsyncHealthChecker([DjangoDBsHealthCheck(), MyAsyncCheck()])
+        system_health_ok, details = await checker()
+
+    AsyncHealthCheck instances are awaited directly. Sync checks are run in
+    the checker's executor (see HealthChecker's max_workers and executor
+    arguments, with a thread per check by default when there are time
+    limits), or in the loop's default executor if there is none. Check
+    timeouts and the deadline work the same way as in HealthChecker, and so
+    does joining the runs of hung checks in the checker's executor.
+
+    A cache is consulted from the executor too, since it may block, and a
+    profiler runs checks there. Cached or profiled async checks are then run
+    on a private event loop in that thread.
+
+    In single-flight mode, calls are coalesced per checker on one event
+    loop: use a checker from a single loop.
+    """
+
+    def __init__(self, checks, max_workers=None, executor=None,
+                 deadline=None, cache=None, single_flight=False,
+                 metrics=None, include_durations=False, fail_fast=False,
+                 process_workers=None, history=None, profiler=None):
+        super(AsyncHealthChecker, self).__init__(
+            checks, max_workers=max_workers, executor=executor,
+            deadline=deadline, cache=cache, single_flight=single_flight,
+            metrics=metrics, include_durations=include_durations,
+            fail_fast=fail_fast, process_workers=process_workers,
+            history=history, profiler=profiler)
+        self._flight_task = None
+        if max_workers is None and executor is None and all(
+                isinstance(check, AsyncHealthCheck) for check in checks):
+            # Time limits don't need a pool for async checks, wait_for()
+            # enforces them on the loop. Sync ones get a thread each, as in
+            # HealthChecker, so that a hung one holds a single thread.
+            self._max_workers = None
+
+    async def __call__(self):
+        return self._summarize(await self.run_checks())
+
+    async def run_checks(self):
+        if not self._single_flight:
+            return await self._run_checks()
+
+        task = self._flight_task
+        if task is None or task.done():
+            task = self._flight_task = asyncio.ensure_future(
+                self._run_checks())
+            self.runs += 1
+        else:
+            self.coalesced_calls += 1
+        # A cancelled caller must not cancel the run the others are waiting
+        # for.
+        return await asyncio.shield(task)
+
+    async def _run_checks(self):
+        start = monotonic()
+        tasks_by_id = {}
+        # Dependencies come first, so their tasks exist when a dependent
+        # check's task is created.
+        for check in self._ordered_checks:
+            tasks_by_id[check.check_id] = asyncio.ensure_future(
+                self._run_check(check, start, tasks_by_id))
+        if not self._fail_fast:
+            results = await asyncio.gather(*tasks_by_id.values())
+            return dict(results)
+
+        tasks = dict((tasks_by_id[check.check_id], check)
+                     for check in self._checks)
+        results = {}
+        failed_check = None
+        try:
+            while tasks and failed_check is None:
+                done, _ = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    check = tasks.pop(task)
+                    check_id, result = task.result()
+                    results[check_id] = result
+                    if (failed_check is None and
+                            self._decides_failure(check, result)):
+                        failed_check = check
+        finally:
+            # Async checks stop here, sync ones finish in the executor.
+            for task in tasks:
+                task.cancel()
+        # In dependency order, so that skipped checks are seen by the checks
+        # depending on them.
+        skipped = set(tasks.values())
+        for check in self._ordered_checks:
+            if check in skipped:
+                results[check.check_id] = self._skipped_after(
+                    check, failed_check, results)
+        return results
+
+    async def _execute_async(self, check):
+        return self._observe(check, await check.execute_async())
+
+    async def _run_check(self, check, start, tasks_by_id):
+        for dependency_id in check.depends_on:
+            _, result = await asyncio.shield(tasks_by_id[dependency_id])
+            if not result.is_ok:
+                return check.check_id, self._skipped_dependency(dependency_id)
+
+        run = joined_run = None
+        if (isinstance(check, AsyncHealthCheck) and self._cache is None and
+                self._profiler is None and not check.isolated):
+            coroutine = self._execute_async(check)
+        elif self._get_executor() is None:
+            # Only to record a result which comes too late once.
+            run = _Run()
+            loop = asyncio.get_event_loop()
+            coroutine = loop.run_in_executor(None, self._execute, check, run)
+        else:
+            # Join the run still going since an earlier call, if any, and
+            # leave it running for others when giving up on it.
+            run = joined_run = self._join_run(self._get_executor(), check)
+            coroutine = asyncio.shield(asyncio.wrap_future(run.future))
+
+        joined = monotonic()
+        future = asyncio.ensure_future(coroutine)
+        try:
+            # The timeout is checked again when it runs out, as it counts
+            # from the start of the run, which may have been queued.
+            while not future.done():
+                time_left = self._time_left(
+                    check, start, self._run_start(run, joined))
+                if time_left == 0:
+                    return check.check_id, self._timed_out(
+                        check, self._run_start(run, joined), run)
+                await asyncio.wait([future], timeout=time_left)
+            return check.check_id, future.result()
+        finally:
+            # Also when the call is cancelled, e.g. by fail-fast. Joined runs
+            # are shielded, and keep running for other calls.
+            future.cancel()
+            if joined_run is not None:
+                self._leave_run(check, joined_run)
+
+
+class AsyncHealthCheckScheduler(HealthCheckScheduler):
+    """HealthCheckScheduler, which runs each check in its own asyncio task
+    instead of a background thread.
+
+    Usage:
+
+        scheduler = AsyncHealthCheckScheduler(checks, interval=10)
+        scheduler.start()  # From a coroutine, or with the loop set.
+        checker = AsyncHealthChecker(checks, cache=scheduler)
+
+    Sync checks are run in `executor`, or the loop's default executor. Check
+    timeouts and max_age work as in HealthCheckScheduler.
+    """
+
+    def __init__(self, checks, interval=10, jitter=0.1, executor=None,
+                 metrics=None, history=None, max_age=None):
+        super(AsyncHealthCheckScheduler, self).__init__(
+            checks, interval=interval, jitter=jitter, executor=executor,
+            metrics=metrics, history=history, max_age=max_age)
+        self._tasks = []
+
+    def start(self):
+        if self._tasks:
+            raise RuntimeError('The scheduler is already started.')
+        self._tasks = [asyncio.ensure_future(self._check_loop(check))
+                       for check in self.checks]
+
+    def stop(self, timeout=None):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def _check_loop(self, check):
+        # Spread the first runs, to avoid a burst on startup.
+        await asyncio.sleep(
+            random.uniform(0, self.interval_for(check) * self.jitter))
+        while True:
+            try:
+                await self._run_check_async(check)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(
+                    'Scheduled run of %r failed.', check.check_id)
+            await asyncio.sleep(self.next_delay(check))
+
+    async def _run_check_async(self, check):
+        if isinstance(check, AsyncHealthCheck):
+            coroutine = check.execute_async()
+        else:
+            with self._lock:
+                if check.check_id in self._running:
+                    # Timed out earlier, and still running in its thread.
+                    return
+                self._running.add(check.check_id)
+            loop = asyncio.get_event_loop()
+            coroutine = loop.run_in_executor(
+                self._executor, self._execute_marking_done, check)
+
+        start = monotonic()
+        try:
+            result = await asyncio.wait_for(coroutine, check.timeout)
+        except asyncio.TimeoutError:
+            self._record_timeout(check, start)
+        else:
+            self._record(check, result)
+
+    def _execute_marking_done(self, check):
+        try:
+            return check.execute()
+        finally:
+            self._done_running(check)
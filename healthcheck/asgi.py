@@ -0,0 +1,62 @@
+"""ASGI application serving the status of a HealthChecker, without any web
+framework (Python 3.5+)."""
+import asyncio
+
+from healthcheck.aio import AsyncHealthChecker
+from healthcheck.wsgi import StatusApp
+
+
+class AsyncStatusApp(StatusApp):
+    """ASGI (3.0) counterpart of StatusApp.
+
+    Usage:
+
+        application = AsyncStatusApp(AsyncHealthChecker(checks))
+
+    An AsyncHealthChecker is awaited on the event loop, any other checker is
+    run in the loop's default executor. Lifespan events are acknowledged, so
+    the app can be served on its own.
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(
+                'Unsupported ASGI scope type {0!r}.'.format(scope['type']))
+
+        method = scope['method']
+        path = scope.get('path') or '/'
+        query_string = scope.get('query_string', b'').decode('latin-1')
+        response = self.check_request(method, path, query_string)
+        if response is None:
+            selected = self.select_checker(path, query_string)
+            if isinstance(selected, AsyncHealthChecker):
+                ok, details = await selected()
+            else:
+                loop = asyncio.get_event_loop()
+                ok, details = await loop.run_in_executor(None, selected)
+            response = self.status_response(ok, details)
+
+        status, headers, body = response
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'),
+                         value.encode('latin-1'))
+                        for name, value in headers],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': b'' if method == 'HEAD' else body,
+        })
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
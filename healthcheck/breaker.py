@@ -0,0 +1,97 @@
+import threading
+
+from healthcheck.utils import monotonic
+
+
+class CircuitBreaker(object):
+    """Stops running a check which keeps failing, and retries it with
+    exponential backoff.
+
+    Usage:
+
+        check = DjangoDBsHealthCheck(circuit_breaker=CircuitBreaker())
+
+    After failure_threshold consecutive failures the breaker opens: the
+    check isn't run, its last failure is returned immediately instead. Once
+    the backoff has passed, the breaker is half-open and lets a single run
+    through. If that run succeeds the breaker closes, otherwise it opens
+    again for `multiplier` times longer, up to max_backoff seconds.
+
+    Every result of the check has a circuit_breaker entry with the state of
+    the breaker. A breaker keeps the state of one check, don't share it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=3, backoff=1, max_backoff=60,
+                 multiplier=2):
+        """Possible arguments:
+
+            - failure_threshold: consecutive failures which open the breaker.
+            - backoff: seconds the breaker stays open the first time.
+            - max_backoff: the longest it stays open.
+            - multiplier: how much longer it stays open after each failed
+                retry.
+        """
+        self.failure_threshold = failure_threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.multiplier = multiplier
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._openings = 0
+        self._retry_at = None
+        self._last_failure = None
+        self._lock = threading.Lock()
+
+    def before_run(self):
+        """Return the CheckResult to report instead of running the check, or
+        None if the check should run now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return None
+            if self.state == self.OPEN and self._now() >= self._retry_at:
+                # Let this run through as a probe, and hold the others.
+                self.state = self.HALF_OPEN
+                return None
+            return self._last_failure.replace(
+                duration=None, circuit_breaker=self._describe())
+
+    def after_run(self, result):
+        """Record the result of a run, and return it with the state of the
+        breaker."""
+        with self._lock:
+            if result.is_ok:
+                self.state = self.CLOSED
+                self.consecutive_failures = 0
+                self._openings = 0
+                self._last_failure = None
+            else:
+                self.consecutive_failures += 1
+                self._last_failure = result
+                if (self.state == self.HALF_OPEN or
+                        self.consecutive_failures >= self.failure_threshold):
+                    self._open()
+            return result.replace(circuit_breaker=self._describe())
+
+    def _open(self):
+        backoff = min(self.backoff * self.multiplier ** self._openings,
+                      self.max_backoff)
+        self._openings += 1
+        self.state = self.OPEN
+        self._retry_at = self._now() + backoff
+
+    def _describe(self):
+        description = {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+        }
+        if self.state == self.OPEN:
+            description['retry_in_ms'] = int(round(
+                max(self._retry_at - self._now(), 0) * 1000))
+        return description
+
+    def _now(self):
+        return monotonic()
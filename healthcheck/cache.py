@@ -0,0 +1,111 @@
+import threading
+
+from healthcheck.utils import monotonic
+
+
+class ResultCache(object):
+    """In-memory cache of check results, shared by all threads.
+
+    Usage:
+
+        checker = HealthChecker(checks, cache=ResultCache(ttl=5, failed_ttl=1))
+
+    Results are cached by check ID. A check can override the cache's TTLs
+    with its cache_ttl and failed_cache_ttl attributes.
+
+    Only one thread refreshes an expired result at a time. Other threads get
+    the expired result meanwhile, instead of piling up on the check.
+    """
+
+    def __init__(self, ttl, failed_ttl=None, stale_while_revalidate=False):
+        """Possible arguments:
+
+            - ttl: seconds to reuse a result.
+            - failed_ttl: seconds to reuse a FAILED result. Defaults to ttl.
+                A shorter value makes recovery visible sooner.
+            - stale_while_revalidate: if True, an expired result is still
+                returned immediately, while a background thread runs the
+                check again to refresh it. Only the first run of a check
+                blocks the caller.
+        """
+        self.ttl = ttl
+        self.failed_ttl = ttl if failed_ttl is None else failed_ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def fetch(self, check, run):
+        """Return a result for `check`, calling `run(check)` to get a new one
+        if there is no fresh result in the cache."""
+        result, fresh = self._lookup(check)
+        if fresh:
+            return result
+
+        claimed = self._claim(check)
+        if result is not None and (self.stale_while_revalidate or
+                                   not claimed):
+            if claimed:
+                self._refresh_in_background(check, run)
+            return result
+
+        return self._refresh(check, run, claimed)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _now(self):
+        return monotonic()
+
+    def _lookup(self, check):
+        """Return the cached result of `check` or None, and whether it's
+        fresh."""
+        with self._lock:
+            entry = self._entries.get(check.check_id)
+        if entry is None:
+            return None, False
+        result, expires_at = entry
+        return result, self._now() < expires_at
+
+    def _claim(self, check):
+        """Mark `check` as being refreshed. Return False if it already is."""
+        with self._lock:
+            if check.check_id in self._refreshing:
+                return False
+            self._refreshing.add(check.check_id)
+            return True
+
+    def _release(self, check):
+        with self._lock:
+            self._refreshing.discard(check.check_id)
+
+    def _store(self, check, result, expires_at):
+        with self._lock:
+            self._entries[check.check_id] = (result, expires_at)
+
+    def _refresh(self, check, run, claimed=True):
+        try:
+            result = run(check)
+            self._store(
+                check, result, self._now() + self._ttl_for(check, result))
+            return result
+        finally:
+            if claimed:
+                self._release(check)
+
+    def _refresh_in_background(self, check, run):
+        thread = threading.Thread(
+            target=self._refresh, args=(check, run),
+            name='healthcheck refresh: {0}'.format(check.check_id))
+        thread.daemon = True
+        thread.start()
+
+    def _ttl_for(self, check, result):
+        if result.is_ok:
+            ttl = check.cache_ttl
+            default = self.ttl
+        else:
+            ttl = check.failed_cache_ttl
+            default = self.failed_ttl
+        return default if ttl is None else ttl
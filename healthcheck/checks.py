@@ -1,11 +1,123 @@
-from healthcheck.utils import file_exists
+import copy
+import logging
+import math
+import os
+import threading
+
+from concurrent.futures import (
+    FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError, wait)
+
+from healthcheck.utils import file_exists, monotonic
+
+logger = logging.getLogger(__name__)
+
+
+class CheckResult(object):
+    """Immutable outcome of a single run of a check.
+
+    Attributes:
+
+        - status: 'ok', 'FAILED', or 'skipped' for checks a fail-fast
+            HealthChecker didn't wait for.
+        - details: check specific details, as returned in HealthChecker
+            results.
+        - duration: seconds the check took, or None if unknown.
+        - error: description of the exception raised by the check (or of its
+            time out), None if there was none.
+        - item_durations: for list checks, seconds each item took, by the
+            item IDs used in details. None for other checks.
+        - circuit_breaker: for checks with a CircuitBreaker, a dict
+            describing its state. None for other checks.
+    """
+    __slots__ = ('status', 'details', 'duration', 'error', 'item_durations',
+                 'circuit_breaker')
+
+    OK = 'ok'
+    FAILED = 'FAILED'
+    SKIPPED = 'skipped'
+
+    def __init__(self, status, details=None, duration=None, error=None,
+                 item_durations=None, circuit_breaker=None):
+        set_attr = super(CheckResult, self).__setattr__
+        set_attr('status', status)
+        set_attr('details', {} if details is None else details)
+        set_attr('duration', duration)
+        set_attr('error', error)
+        set_attr('item_durations', item_durations)
+        set_attr('circuit_breaker', circuit_breaker)
+
+    @classmethod
+    def from_ok(cls, ok, details, **kwargs):
+        return cls(cls.OK if ok else cls.FAILED, details, **kwargs)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CheckResult is immutable.')
+
+    def __delattr__(self, name):
+        raise AttributeError('CheckResult is immutable.')
+
+    def __reduce__(self):
+        return (self.__class__,
+                tuple(getattr(self, name) for name in self.__slots__))
+
+    def __eq__(self, other):
+        if not isinstance(other, CheckResult):
+            return NotImplemented
+        return self.__reduce__() == other.__reduce__()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'CheckResult({0})'.format(', '.join(
+            '{0}={1!r}'.format(name, getattr(self, name))
+            for name in self.__slots__))
+
+    @property
+    def is_ok(self):
+        return self.status == self.OK
+
+    def replace(self, **kwargs):
+        """Return a copy of the result with some attributes replaced."""
+        values = dict((name, getattr(self, name)) for name in self.__slots__)
+        values.update(kwargs)
+        return self.__class__(**values)
+
+    def as_dict(self, include_durations=False):
+        result = {'status': self.status, 'details': self.details}
+        if include_durations:
+            result['duration_ms'] = _to_ms(self.duration)
+            if self.item_durations is not None:
+                result['item_durations_ms'] = dict(
+                    (item_id, _to_ms(duration))
+                    for item_id, duration in self.item_durations.items())
+        if self.circuit_breaker is not None:
+            result['circuit_breaker'] = self.circuit_breaker
+        return result
+
+
+def _to_ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
 
 
 class HealthCheck(object):
     """Base class for all checks."""
     check_id = None
+    timeout = None
+    cache_ttl = None
+    failed_cache_ttl = None
+    interval = None
+    depends_on = ()
+    circuit_breaker = None
+    tags = ()
+    isolated = False
 
-    def __init__(self, is_critical=True, check_id=None):
+    def __init__(self, is_critical=True, check_id=None, timeout=None,
+                 cache_ttl=None, failed_cache_ttl=None, interval=None,
+                 depends_on=None, circuit_breaker=None, tags=None,
+                 isolated=None):
         """Possible arguments:
 
             - check_id: ID of check. It overrides class-level check_id. If it's
@@ -13,10 +125,47 @@ class HealthCheck(object):
                 raised.
             - is_critical: True/False. If True and check is failed, overall
                 system health considered as "NOT ok". Otherwise,
+            - timeout: seconds the HealthChecker waits for the check before
+                reporting it as FAILED, from when a thread starts running it,
+                or for it to start. It overrides class-level timeout.
+            - cache_ttl, failed_cache_ttl: seconds to reuse the check's ok
+                and FAILED results, when the HealthChecker has a
+                ResultCache. They override class-level values and the
+                cache's defaults.
+            - interval: seconds between runs of the check by a
+                HealthCheckScheduler. It overrides class-level interval and
+                the scheduler's default.
+            - depends_on: IDs of checks which must succeed for this check to
+                be run by a HealthChecker. Otherwise it's reported as
+                skipped. It overrides class-level depends_on.
+            - circuit_breaker: a CircuitBreaker (see healthcheck.breaker),
+                to stop running the check while it keeps failing.
+            - tags: names of groups the check belongs to, e.g. 'ready', to
+                run only some checks with HealthChecker.for_tags(). It
+                overrides class-level tags.
+            - isolated: if True, HealthChecker runs the check in a worker
+                process, which is killed if the check overruns its timeout.
+                It overrides class-level isolated.
         """
         self.is_critical = is_critical
         if check_id:
             self.check_id = check_id
+        if timeout is not None:
+            self.timeout = timeout
+        if cache_ttl is not None:
+            self.cache_ttl = cache_ttl
+        if failed_cache_ttl is not None:
+            self.failed_cache_ttl = failed_cache_ttl
+        if interval is not None:
+            self.interval = interval
+        if depends_on is not None:
+            self.depends_on = tuple(depends_on)
+        if circuit_breaker is not None:
+            self.circuit_breaker = circuit_breaker
+        if tags is not None:
+            self.tags = tuple(tags)
+        if isolated is not None:
+            self.isolated = isolated
 
         if self.check_id is None:
             raise ValueError('You must specify check_id for the check %s.' %
@@ -24,25 +173,115 @@ class HealthCheck(object):
 
         self._ok = None
         self._details = {}
+        self._last_result = None
 
     def run(self):
         """If you create your own HealthCheck, it should implement .run()
-        method, which sets self._ok and self._details properties."""
+        method, which returns a CheckResult, usually built with
+        self.report().
+
+        Older checks set self._ok and self._details properties instead. They
+        still work, but can't be shared between threads, because concurrent
+        runs overwrite each other's results.
+        """
         raise ValueError(
             'You must override "run" method for check %s.' %
             (self.__class__.__name__,)
         )
 
+    def report(self, ok, details, **kwargs):
+        """Build the CheckResult for .run() to return. Keyword arguments
+        are passed to CheckResult.
+
+        The result is also kept as the last result of the check, which is
+        what is_ok, details and as_dict() show. self._ok and self._details
+        are set too, for older subclasses that read them after calling
+        .run() of their parent.
+        """
+        result = CheckResult.from_ok(ok, details, **kwargs)
+        self._last_result = result
+        self._ok = ok
+        self._details = details
+        return result
+
+    def execute(self, runner=None):
+        """Run the check and return its CheckResult, including duration.
+
+        Exceptions raised by .run() are reported as a FAILED result. This is
+        what HealthChecker calls, and it doesn't depend on state shared
+        between runs of new-style checks.
+
+        With a circuit breaker, the check isn't run while the breaker is
+        open, and the last failure is returned instead.
+
+        `runner`, if given, is called with the check to get the result
+        instead of timed_run(), e.g. to run it in another process.
+        """
+        breaker = self.circuit_breaker
+        if breaker is not None:
+            result = breaker.before_run()
+            if result is not None:
+                return result
+
+        if runner is None:
+            result = self.timed_run()
+        else:
+            result = runner(self)
+
+        if breaker is not None:
+            result = breaker.after_run(result)
+        return result
+
+    def timed_run(self):
+        """Run the check and return its CheckResult, including duration.
+        Exceptions raised by .run() are reported as a FAILED result."""
+        start = monotonic()
+        try:
+            result = self.run()
+        except Exception as e:
+            logger.exception('Health check %r raised an error.', self.check_id)
+            return self._error_result(e, monotonic() - start)
+        return self._finish(result, monotonic() - start)
+
+    def _finish(self, result, duration):
+        if result is None:
+            # Old-style check, which sets self._ok and self._details.
+            # They may have changed since a parent's .run() returned its
+            # result, so they win over it.
+            self._last_result = None
+            return CheckResult.from_ok(
+                self._get_legacy_ok(), self._details, duration=duration)
+        result = result.replace(duration=duration)
+        self._last_result = result
+        return result
+
+    def _error_result(self, exception, duration):
+        error = '{0}: {1}'.format(exception.__class__.__name__, exception)
+        return CheckResult(CheckResult.FAILED, 'ERROR: ' + error,
+                           duration=duration, error=error)
+
+    @property
+    def last_result(self):
+        return self._last_result
+
     @property
     def is_ok(self):
+        if self._last_result is not None:
+            return self._last_result.is_ok
+        return self._get_legacy_ok()
+
+    def _get_legacy_ok(self):
         if self._ok is None:
             raise RuntimeError(
                 'You must call .run() first. And your run() must '
-                'set self._ok and self._details properties')
+                'return a CheckResult or set self._ok and self._details '
+                'properties')
         return self._ok
 
     @property
     def details(self):
+        if self._last_result is not None:
+            return self._last_result.details
         # Just to verify that .run() is called.
         self.is_ok
         return self._details
@@ -60,25 +299,49 @@ class ListHealthCheck(HealthCheck):
         See examples are below - DjangoDBsHealthCheck and FilesExistHealthCheck
     """
 
-    def __init__(self, items=None, **kwargs):
+    def __init__(self, items=None, max_workers=None, item_timeout=None,
+                 **kwargs):
+        """Possible arguments, besides HealthCheck's:
+
+            - items: list of items to check. It overrides class-level items.
+            - max_workers: if set, items are checked concurrently in a thread
+                pool of this size, owned by the check.
+            - item_timeout: seconds to wait for an item, before reporting it
+                as failed with check_item_timed_out(). Items are checked in
+                a thread pool then (with a thread per item, unless
+                max_workers is given).
+        """
         super(ListHealthCheck, self).__init__(**kwargs)
 
         if not items and not self.items:
             raise ValueError('You have to specify items inside class or '
                              'pass items list on object construction')
         self.kwarg_items = items
-
+        self.max_workers = max_workers
+        self.item_timeout = item_timeout
+        self._executor = None
+        self._executor_lock = threading.Lock()
 
     def run(self):
-        self._ok = True
-        self._details = {}
+        ok = True
+        details = {}
+        item_durations = {}
+
+        items = self.kwarg_items or self.items
+        if self.checks_items_concurrently:
+            results = self._check_items_concurrently(items)
+        else:
+            results = (self._timed_check_item(item) for item in items)
 
-        for item in self.kwarg_items or self.items:
-            item_ok, item_details = self.check_item(item)
+        for item_ok, item_details, duration in results:
             if not item_ok:
-                self._ok = False
+                ok = False
+
+            details.update(item_details)
+            for item_id in item_details:
+                item_durations[item_id] = duration
 
-            self._details.update(item_details)
+        return self.report(ok, details, item_durations=item_durations)
 
     def check_item(self, item):
         """ This is called to check each item. It must return the following:
@@ -89,11 +352,89 @@ class ListHealthCheck(HealthCheck):
             True, {'file /etc/passwd': 'file exists'}
         """
 
+    @property
+    def checks_items_concurrently(self):
+        return bool(self.max_workers) or self.item_timeout is not None
+
+    def check_item_timed_out(self, item, elapsed_ms):
+        """Return the result of an item, which wasn't checked within
+        item_timeout, in the same format as check_item()."""
+        return False, {item: 'timed out after {0}ms'.format(elapsed_ms)}
+
+    def shutdown(self, wait=True):
+        """Shut down the thread pool used to check items, if any."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+    def _check_items_concurrently(self, items):
+        items = list(items)
+        executor = self._get_executor(len(items))
+        start = monotonic()
+        futures = [(item, executor.submit(self._timed_check_item, item))
+                   for item in items]
+        for item, future in futures:
+            timeout = None
+            if self.item_timeout is not None:
+                timeout = max(start + self.item_timeout - monotonic(), 0)
+            try:
+                yield future.result(timeout)
+            except TimeoutError:
+                future.cancel()
+                elapsed = monotonic() - start
+                item_ok, item_details = self.check_item_timed_out(
+                    item, int(round(elapsed * 1000)))
+                yield item_ok, item_details, elapsed
+
+    def _timed_check_item(self, item):
+        start = monotonic()
+        item_ok, item_details = self.check_item(item)
+        return item_ok, item_details, monotonic() - start
+
+    def _get_executor(self, item_count):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers or max(item_count, 1))
+            return self._executor
+
 
 class DjangoDBsHealthCheck(ListHealthCheck):
-    """Fails if at least one of configured Django DBs is not usable."""
+    """Fails if at least one of configured Django DBs is not usable.
+
+    By default every DB is checked on the calling thread's connection, one
+    after another. For a cheaper and bounded check, pass:
+
+        - max_workers and/or item_timeout (see ListHealthCheck), to check
+            DBs in parallel and fail the ones which don't answer in time.
+            Each DB is then checked on a connection of a pool thread, which
+            is closed afterwards.
+        - probe_connections=True, to check each DB on a dedicated
+            connection, opened once and reused by all runs of the check,
+            instead of the one the calling thread happens to have. The
+            details then include the round trip time of each DB. When
+            item_timeout is set, it also bounds connecting and the probe
+            query on the connection: it's passed as connect timeout to
+            MySQL and PostgreSQL, as statement timeout to PostgreSQL and as
+            read timeout to MySQL.
+
+    Without both, nothing bounds a query to a DB which accepts connections
+    but doesn't answer: item_timeout fails the DB, but the query holds a
+    pool thread until the DB answers. Nor are other backends bounded.
+    """
 
     check_id = 'Django Databases Health Check'
+    tags = ('db', 'ready')
+
+    # Backends, which accept OPTIONS['connect_timeout'] in seconds.
+    CONNECT_TIMEOUT_VENDORS = ('mysql', 'postgresql')
+
+    def __init__(self, probe_connections=False, **kwargs):
+        super(DjangoDBsHealthCheck, self).__init__(**kwargs)
+        self.probe_connections = probe_connections
+        self._probes = {}
+        self._probes_lock = threading.Lock()
 
     @property
     def items(self):
@@ -101,6 +442,23 @@ class DjangoDBsHealthCheck(ListHealthCheck):
         return connections.all()
 
     def check_item(self, connection):
+        if self.probe_connections:
+            return self._probe(connection.alias)
+
+        if not self.checks_items_concurrently:
+            return self._check_connection(connection)
+
+        from django.db import connections
+        # Connections belong to the thread which created them.
+        connection = connections[connection.alias]
+        try:
+            return self._check_connection(connection)
+        finally:
+            # Pool threads never see request_finished, which closes the
+            # connections of request threads.
+            connection.close()
+
+    def _check_connection(self, connection):
         from django.db.utils import OperationalError
         try:
             connection.ensure_connection()
@@ -111,13 +469,102 @@ class DjangoDBsHealthCheck(ListHealthCheck):
         details = {connection.alias: 'ok' if db_ok else 'FAILED'}
         return db_ok, details
 
+    def check_item_timed_out(self, connection, elapsed_ms):
+        description = 'timed out after {0}ms'.format(elapsed_ms)
+        if self.probe_connections:
+            description = {'status': 'FAILED', 'details': description}
+        return False, {connection.alias: description}
+
+    def _probe(self, alias):
+        from django.db.utils import DatabaseError
+        probe, lock = self._get_probe(alias)
+        # Connections can't be used by two threads at once.
+        with lock:
+            start = monotonic()
+            try:
+                probe.ensure_connection()
+                db_ok = probe.is_usable()
+            except DatabaseError:
+                db_ok = False
+            latency_ms = round((monotonic() - start) * 1000, 3)
+            if not db_ok:
+                # Reconnect on the next run.
+                probe.close()
+
+        details = {'status': 'ok' if db_ok else 'FAILED',
+                   'latency_ms': latency_ms}
+        return db_ok, {alias: details}
+
+    def _get_probe(self, alias):
+        with self._probes_lock:
+            if alias not in self._probes:
+                self._probes[alias] = (
+                    self._create_probe(alias), threading.Lock())
+            return self._probes[alias]
+
+    def _create_probe(self, alias):
+        from django.db import connections
+        from django.db.utils import load_backend
+
+        settings_dict = copy.deepcopy(connections[alias].settings_dict)
+        probe = load_backend(settings_dict['ENGINE']).DatabaseWrapper(
+            settings_dict, alias)
+        if self.item_timeout is not None:
+            self._set_timeouts(probe.vendor, probe.settings_dict['OPTIONS'])
+        # Runs of the check may come from different threads.
+        if hasattr(probe, 'inc_thread_sharing'):
+            probe.inc_thread_sharing()
+        else:
+            probe.allow_thread_sharing = True
+        return probe
+
+    def _set_timeouts(self, vendor, options):
+        """Bound connecting to the DB and the probe query by item_timeout,
+        in the OPTIONS of a probe connection, unless they're set already."""
+        seconds = max(int(math.ceil(self.item_timeout)), 1)
+        if vendor in self.CONNECT_TIMEOUT_VENDORS:
+            options.setdefault('connect_timeout', seconds)
+        if vendor == 'postgresql':
+            # The server cancels queries running longer.
+            server_options = options.get('options', '')
+            if 'statement_timeout' not in server_options:
+                options['options'] = (
+                    server_options + ' -c statement_timeout={0}'.format(
+                        int(math.ceil(self.item_timeout * 1000)))).strip()
+        elif vendor == 'mysql':
+            # The driver gives up waiting for an answer, pings included.
+            options.setdefault('read_timeout', seconds)
+
 
-class FilesExistHealthCheck(ListHealthCheck):
+class _FilesHealthCheck(ListHealthCheck):
+    """Base class for checks of existence of files."""
+
+    def __init__(self, items=None, watcher=None, **kwargs):
+        """Possible arguments, besides ListHealthCheck's:
+
+            - watcher: a PathWatcher (see healthcheck.watch). If given, file
+                existence is looked up in it, instead of calling stat() on
+                every run. healthcheck.watch.get_default_watcher() returns
+                one shared by the process.
+        """
+        super(_FilesHealthCheck, self).__init__(items=items, **kwargs)
+        self.watcher = watcher
+        if watcher is not None:
+            for filename in self.kwarg_items or self.items:
+                watcher.watch(filename)
+
+    def file_exists(self, filename):
+        if self.watcher is not None:
+            return self.watcher.exists(filename)
+        return file_exists(filename)
+
+
+class FilesExistHealthCheck(_FilesHealthCheck):
     """Fails if at least one of passed files doesn't exist."""
 
     def check_item(self, filename):
         try:
-            ok = file_exists(filename)
+            ok = self.file_exists(filename)
         except OSError as e:
             ok = False
             description = 'ERROR: ' + str(e.strerror)
@@ -127,12 +574,12 @@ class FilesExistHealthCheck(ListHealthCheck):
         return ok, details
 
 
-class FilesDontExistHealthCheck(ListHealthCheck):
+class FilesDontExistHealthCheck(_FilesHealthCheck):
     """Fails if at least one of passed files exists."""
 
     def check_item(self, filename):
         try:
-            ok = not file_exists(filename)
+            ok = not self.file_exists(filename)
         except OSError as e:
             ok = False
             description = 'ERROR: ' + str(e.strerror)
@@ -142,6 +589,68 @@ class FilesDontExistHealthCheck(ListHealthCheck):
         return ok, details
 
 
+class ProcessHealthCheck(HealthCheck):
+    """Always ok, while the process can run checks. Tagged 'live', for
+    liveness probes, which must not fail because a dependency is down."""
+    check_id = 'process'
+    tags = ('live',)
+
+    def run(self):
+        return self.report(True, {'pid': os.getpid()})
+
+
+class _Flight(object):
+    """A run of the checks, which concurrent single-flight calls join."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.results = None
+
+    def wait(self):
+        self.done.wait()
+        if self.results is None:
+            raise RuntimeError('The health checks run that this call joined '
+                               'failed.')
+        return self.results
+
+
+class _Run(object):
+    """A run of a check in a checker's thread pool. Calls made while it's
+    running join it instead of running the check again, so that a hung check
+    never holds more than one thread."""
+
+    def __init__(self):
+        self.future = None
+        # Calls waiting for the run. It's cancelled when they all give up.
+        self.callers = 0
+        # When a worker started running the check, None while it's queued.
+        self.started = None
+        self._timed_out = False
+        self._has_result = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.started = monotonic()
+
+    def claim_result(self):
+        """Return whether to record the result of the run: not if a call
+        already reported it as timed out."""
+        with self._lock:
+            if self._timed_out:
+                return False
+            self._has_result = True
+            return True
+
+    def claim_timeout(self):
+        """Return whether to record that the run timed out: not if its
+        result was recorded already, as it finished just in time."""
+        with self._lock:
+            if self._has_result:
+                return False
+            self._timed_out = True
+            return True
+
+
 class HealthChecker(object):
     """Health Checker class.
 
@@ -154,10 +663,112 @@ class HealthChecker(object):
         ])
 
         system_health_ok, details = system_health_checker()
+
+    Pass max_workers (or a shared executor) to run the checks concurrently,
+    so the call takes about as long as the slowest check instead of the sum
+    of all of them.
+
+    A check declaring depends_on is run once the checks it depends on have
+    succeeded, or reported as skipped if one of them didn't. Its timeout
+    counts from its own start.
+
+    Checks with a timeout, and all checks when the checker has a deadline,
+    are reported as FAILED with a "timed out after Xms" detail if they
+    don't finish in time. The hung check keeps its worker thread busy until
+    it returns, but the call itself comes back within the limit. Later calls
+    wait for that run instead of starting another one, so a hung check holds
+    one thread at most, and the pool never runs out of threads for the other
+    checks.
     """
 
-    def __init__(self, checks):
+    def __init__(self, checks, max_workers=None, executor=None,
+                 deadline=None, cache=None, single_flight=False,
+                 metrics=None, include_durations=False, fail_fast=False,
+                 process_workers=None, history=None, profiler=None):
+        """Possible arguments:
+
+            - checks: list of HealthCheck instances.
+            - max_workers: if set, checks are run concurrently in a thread
+                pool of this size, owned by the checker and created on first
+                call. By default checks are run one after another.
+            - executor: a concurrent.futures.Executor to run checks in. It
+                allows sharing one pool between several checkers, and
+                overrides max_workers. The checker never shuts it down.
+            - deadline: seconds the whole call may take. Checks still
+                running after that are reported as timed out. Timeouts need
+                worker threads, so if neither max_workers nor executor is
+                given, a pool with a thread per check is used.
+            - cache: a ResultCache (see healthcheck.cache), to reuse recent
+                results instead of running every check on every call, or a
+                HealthCheckScheduler (see healthcheck.scheduler), to return
+                the results of its background runs.
+            - single_flight: if True, a call made while another one is
+                running doesn't run the checks again, but waits for the
+                running call and returns its results. The runs and
+                coalesced_calls attributes count runs of the checks and
+                calls that joined one.
+            - metrics: a MetricsRegistry (see healthcheck.metrics) to record
+                durations and outcomes of check runs in.
+            - include_durations: if True, the result of each check includes
+                its duration_ms, and list checks also item_durations_ms.
+            - fail_fast: if True, once a critical check fails, the checks
+                which haven't finished are reported as skipped instead of
+                waited for. Checks which haven't started are cancelled, the
+                running ones finish in the background.
+            - process_workers: number of worker processes to run isolated
+                checks in (see ProcessCheckPool in healthcheck.process).
+                Defaults to one per isolated check. Those checks, and the
+                whole call when a deadline is set, are killed when they
+                overrun.
+            - history: a HealthHistory (see healthcheck.history) to record
+                the last runs of each check in. If it has a fail_threshold,
+                the overall status is decided by the failure rates it keeps
+                instead of the latest results.
+            - profiler: a CheckProfiler (see healthcheck.profiling) to run
+                the checks under. Results served from a cache aren't
+                profiled.
+        """
         self._checks = self._validate_checks(checks)
+        # Checks in an order where dependencies come first.
+        self._ordered_checks = self._sort_by_dependencies(self._checks)
+        self._checks_by_tag = self._index_tags(self._checks)
+        self._tagged_checkers = {}
+        self._options = {
+            'deadline': deadline,
+            'cache': cache,
+            'single_flight': single_flight,
+            'metrics': metrics,
+            'include_durations': include_durations,
+            'fail_fast': fail_fast,
+            'history': history,
+            'profiler': profiler,
+        }
+        self._isolated_checks = [
+            check for check in self._checks if check.isolated]
+        self._process_workers = process_workers
+        self._process_pool = None
+        self._owns_process_pool = True
+        self._fail_fast = fail_fast
+        self._deadline = deadline
+        self._cache = cache
+        self._metrics = metrics
+        self._history = history
+        self._profiler = profiler
+        self._include_durations = include_durations
+        self._single_flight = single_flight
+        self._flight = None
+        self._flight_lock = threading.Lock()
+        self.runs = 0
+        self.coalesced_calls = 0
+        if max_workers is None and self._has_time_limits():
+            max_workers = max(len(self._checks), 1)
+        self._max_workers = max_workers
+        self._executor = executor
+        self._owns_executor = False
+        self._executor_lock = threading.Lock()
+        # _Run of each check running in the thread pool, by check ID.
+        self._runs = {}
+        self._runs_lock = threading.Lock()
 
     def _validate_checks(self, checks):
         for check in checks:
@@ -171,19 +782,410 @@ class HealthChecker(object):
 
         return checks
 
+    def _sort_by_dependencies(self, checks):
+        checks_by_id = dict((check.check_id, check) for check in checks)
+        for check in checks:
+            for dependency_id in check.depends_on:
+                if dependency_id not in checks_by_id:
+                    raise ValueError(
+                        'Check {0!r} depends on unknown check {1!r}.'.format(
+                            check.check_id, dependency_id))
+
+        ordered = []
+        done = set()
+
+        def visit(check, path):
+            if check.check_id in done:
+                return
+            if check.check_id in path:
+                cycle = path[path.index(check.check_id):] + [check.check_id]
+                raise ValueError('Dependency cycle detected: {0}.'.format(
+                    ' -> '.join(repr(check_id) for check_id in cycle)))
+            for dependency_id in check.depends_on:
+                visit(checks_by_id[dependency_id], path + [check.check_id])
+            done.add(check.check_id)
+            ordered.append(check)
+
+        for check in checks:
+            visit(check, [])
+        return ordered
+
+    def _index_tags(self, checks):
+        """Return the checks to run for each tag: the tagged checks and the
+        checks they depend on."""
+        checks_by_id = dict((check.check_id, check) for check in checks)
+        needed_by_tag = {}
+        for check in checks:
+            for tag in check.tags:
+                needed_by_tag.setdefault(tag, set()).add(check.check_id)
+
+        checks_by_tag = {}
+        for tag, needed in needed_by_tag.items():
+            pending = list(needed)
+            while pending:
+                for dependency_id in checks_by_id[pending.pop()].depends_on:
+                    if dependency_id not in needed:
+                        needed.add(dependency_id)
+                        pending.append(dependency_id)
+            checks_by_tag[tag] = frozenset(needed)
+        return checks_by_tag
+
+    @property
+    def checks(self):
+        """The checks run by the checker."""
+        return list(self._checks)
+
+    @property
+    def tags(self):
+        return sorted(self._checks_by_tag)
+
+    def for_tags(self, tags):
+        """Return a checker for the checks with any of `tags`, and the
+        checks they depend on. Unknown tags are ignored.
+
+        Checkers are made once per set of tags, and use this checker's
+        options and thread pool, so shut down this checker, not them. They
+        also join the runs of this checker, and the other way round, so that
+        a check is never run twice at once in the pool.
+        """
+        tags = frozenset(tags) & frozenset(self._checks_by_tag)
+        with self._executor_lock:
+            checker = self._tagged_checkers.get(tags)
+        if checker is not None:
+            return checker
+
+        selected = set()
+        for tag in tags:
+            selected |= self._checks_by_tag[tag]
+        checker = self.__class__(
+            [check for check in self._checks if check.check_id in selected],
+            executor=self._get_executor(), **self._options)
+        checker._runs = self._runs
+        checker._runs_lock = self._runs_lock
+        if checker._isolated_checks:
+            checker._process_pool = self._get_process_pool()
+            checker._owns_process_pool = False
+        with self._executor_lock:
+            return self._tagged_checkers.setdefault(tags, checker)
+
     def __call__(self):
-        overall_details = {}
-        for check in self._checks:
-            check.run()
-            overall_details.update({check.check_id: check.as_dict()})
+        return self._summarize(self.run_checks())
 
-        overall_status = self._assess_overall_status()
+    def _summarize(self, results):
+        overall_details = dict(
+            (check_id, self.format_result(result))
+            for check_id, result in results.items())
+        overall_status = self.assess_overall_status(results)
         return overall_status, overall_details
 
-    def _assess_overall_status(self):
+    def format_result(self, result):
+        """Return the details entry of a CheckResult."""
+        return result.as_dict(self._include_durations)
+
+    def run_checks(self):
+        """Run all checks and return a dict of their CheckResults by check
+        ID."""
+        if not self._single_flight:
+            return self._run_checks()
+
+        with self._flight_lock:
+            flight = self._flight
+            leader = flight is None
+            if leader:
+                flight = self._flight = _Flight()
+                self.runs += 1
+            else:
+                self.coalesced_calls += 1
+        if not leader:
+            return flight.wait()
+
+        try:
+            flight.results = self._run_checks()
+            return flight.results
+        finally:
+            with self._flight_lock:
+                self._flight = None
+            flight.done.set()
+
+    def _run_checks(self):
+        return dict(self.iter_results())
+
+    def iter_results(self):
+        """Run all checks and yield (check ID, CheckResult) pairs as the
+        checks finish, so that fast results can be shown before slow ones.
+
+        Unlike run_checks(), this never joins a single-flight run.
+        """
+        executor = self._get_executor()
+        results = {}
+        if executor is None:
+            for index, check in enumerate(self._ordered_checks):
+                dependency_id = self._failed_dependency(check, results)
+                if dependency_id is None:
+                    result = self._execute(check)
+                else:
+                    result = self._skipped_dependency(dependency_id)
+                results[check.check_id] = result
+                yield check.check_id, result
+                if self._decides_failure(check, result):
+                    for skipped in self._ordered_checks[index + 1:]:
+                        result = results[skipped.check_id] = (
+                            self._skipped_after(skipped, check, results))
+                        yield skipped.check_id, result
+                    return
+            return
+
+        start = monotonic()
+        waiting = list(self._ordered_checks)
+        # (check, _Run, time the call joined it) of running checks.
+        running = []
+        failed_check = None
+        while waiting or running:
+            # Dependencies come first, so skipping a check here is seen by
+            # the checks depending on it in the same pass.
+            still_waiting = []
+            for check in waiting:
+                dependency_id = self._failed_dependency(check, results)
+                if dependency_id is not None:
+                    result = results[check.check_id] = (
+                        self._skipped_dependency(dependency_id))
+                    yield check.check_id, result
+                elif all(dependency_id in results
+                         for dependency_id in check.depends_on):
+                    running.append(
+                        (check, self._join_run(executor, check), monotonic()))
+                else:
+                    still_waiting.append(check)
+            waiting = still_waiting
+            if not running:
+                break
+
+            limits = [
+                self._time_left(check, start, self._run_start(run, submitted))
+                for check, run, submitted in running]
+            limits = [limit for limit in limits if limit is not None]
+            done, _ = wait([run.future for _, run, _ in running],
+                           timeout=min(limits) if limits else None,
+                           return_when=FIRST_COMPLETED)
+            still_running = []
+            for check, run, submitted in running:
+                if run.future in done:
+                    self._leave_run(check, run)
+                    result = run.future.result()
+                elif self._time_left(
+                        check, start, self._run_start(run, submitted)) == 0:
+                    self._leave_run(check, run)
+                    result = self._timed_out(
+                        check, self._run_start(run, submitted), run)
+                else:
+                    still_running.append((check, run, submitted))
+                    continue
+                results[check.check_id] = result
+                yield check.check_id, result
+                if (failed_check is None and
+                        self._decides_failure(check, result)):
+                    failed_check = check
+            running = still_running
+            if failed_check is not None:
+                break
+
+        for check, run, _ in running:
+            self._leave_run(check, run)
+        # Waiting checks are still in dependency order.
+        for check in [check for check, _, _ in running] + waiting:
+            result = results[check.check_id] = (
+                self._skipped_after(check, failed_check, results))
+            yield check.check_id, result
+
+    def _join_run(self, executor, check):
+        """Return the _Run of `check` in `executor`, starting one unless the
+        check is still running since an earlier call."""
+        with self._runs_lock:
+            run = self._runs.get(check.check_id)
+            started = run is None
+            if started:
+                run = _Run()
+                run.future = executor.submit(self._execute, check, run)
+                self._runs[check.check_id] = run
+            run.callers += 1
+        if started:
+            # Not under the lock, as the callback runs right away if the
+            # check is already done.
+            run.future.add_done_callback(
+                lambda future: self._end_run(check, run))
+        return run
+
+    def _leave_run(self, check, run):
+        """Stop waiting for `run` of `check`, cancelling it if no other call
+        waits for it and it hasn't started yet."""
+        with self._runs_lock:
+            run.callers -= 1
+            abandoned = run.callers == 0 and not (
+                run.future.running() or run.future.done())
+            if abandoned and self._runs.get(check.check_id) is run:
+                # So that no call joins it before it's cancelled.
+                del self._runs[check.check_id]
+        if abandoned:
+            # Not under the lock, as cancelling runs the done callback.
+            run.future.cancel()
+
+    def _end_run(self, check, run):
+        with self._runs_lock:
+            if self._runs.get(check.check_id) is run:
+                del self._runs[check.check_id]
+
+    def _failed_dependency(self, check, results):
+        """Return the ID of a dependency of `check` which didn't succeed, or
+        None."""
+        for dependency_id in check.depends_on:
+            result = results.get(dependency_id)
+            if result is not None and not result.is_ok:
+                return dependency_id
+        return None
+
+    def _skipped_dependency(self, dependency_id):
+        return CheckResult(
+            CheckResult.SKIPPED,
+            'skipped, dependency {0!r} failed'.format(dependency_id))
+
+    def _decides_failure(self, check, result):
+        """Whether `result` of `check` ends a fail-fast run. Checks skipped
+        because a dependency failed don't: that dependency decided it, if
+        it's critical."""
+        return (self._fail_fast and check.is_critical and
+                result.status == CheckResult.FAILED)
+
+    def _skipped(self, failed_check):
+        return CheckResult(
+            CheckResult.SKIPPED,
+            'skipped, critical check {0!r} failed'.format(
+                failed_check.check_id))
+
+    def _skipped_after(self, check, failed_check, results):
+        """Return the result of `check`, skipped as `failed_check` ended a
+        fail-fast run, naming its own failed dependency if it has one."""
+        dependency_id = self._failed_dependency(check, results)
+        if dependency_id is not None:
+            return self._skipped_dependency(dependency_id)
+        return self._skipped(failed_check)
+
+    def _execute(self, check, run=None):
+        if run is not None:
+            run.start()
+        if self._cache is None:
+            return self._execute_uncached(check, run)
+        return self._cache.fetch(
+            check, lambda check: self._execute_uncached(check, run))
+
+    def _execute_uncached(self, check, run=None):
+        if self._profiler is not None:
+            result = self._profiler.run(check, self._execute_check)
+        else:
+            result = self._execute_check(check)
+        return self._observe(check, result, run)
+
+    def _execute_check(self, check):
+        if check.isolated:
+            return check.execute(self._get_process_pool().run)
+        return check.execute()
+
+    def _observe(self, check, result, run=None):
+        """Record `result` of `check`, unless it's the late result of a `run`
+        already recorded as timed out, so that each run counts once."""
+        if run is not None and not run.claim_result():
+            return result
+        if self._metrics is not None:
+            self._metrics.observe(check.check_id, result)
+        if self._history is not None:
+            self._history.record(check.check_id, result)
+        return result
+
+    def _has_time_limits(self):
+        return self._deadline is not None or any(
+            check.timeout is not None for check in self._checks)
+
+    def _time_left(self, check, start, check_start=None):
+        """Seconds to wait for `check`. The deadline counts from `start` of
+        the call, the check's timeout from `check_start`, which defaults to
+        `start`. None means no limit."""
+        ends = []
+        if check.timeout is not None:
+            ends.append(
+                (start if check_start is None else check_start) +
+                check.timeout)
+        if self._deadline is not None:
+            ends.append(start + self._deadline)
+        if not ends:
+            return None
+        return max(min(ends) - monotonic(), 0)
+
+    def _run_start(self, run, joined):
+        """Return when the timeout of `run` counts from, for a call which
+        joined it at `joined`: when a worker started it, so that time spent
+        queued for a thread doesn't count. While it's queued, the call's
+        join time, so that a check which can't get a thread times out too.
+        """
+        if run is None or run.started is None:
+            return joined
+        return run.started
+
+    def _timed_out(self, check, start, run=None):
+        """Return the FAILED result of a call which gave up waiting for `run`
+        of `check`, recording it unless the run's result was recorded."""
+        elapsed = monotonic() - start
+        error = 'timed out after {0}ms'.format(int(round(elapsed * 1000)))
+        result = CheckResult(CheckResult.FAILED, error, duration=elapsed,
+                             error=error)
+        if run is not None and not run.claim_timeout():
+            return result
+        if self._metrics is not None:
+            self._metrics.observe_timeout(check.check_id)
+        if self._history is not None:
+            self._history.record(check.check_id, result)
+        return result
+
+    def _get_executor(self):
+        if self._executor is None and self._max_workers:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self._max_workers)
+                    self._owns_executor = True
+        return self._executor
+
+    def _get_process_pool(self):
+        with self._executor_lock:
+            if self._process_pool is None:
+                # Imported here, as it's available on Unix only.
+                from healthcheck.process import ProcessCheckPool
+                self._process_pool = ProcessCheckPool(
+                    self._isolated_checks,
+                    max_workers=(self._process_workers or
+                                 len(self._isolated_checks)),
+                    timeout=self._deadline)
+            return self._process_pool
+
+    def shutdown(self, wait=True):
+        """Shut down the thread pool and worker processes created by the
+        checker, if any."""
+        with self._executor_lock:
+            if self._process_pool is not None and self._owns_process_pool:
+                self._process_pool.shutdown()
+                self._process_pool = None
+            if self._owns_executor:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+                self._owns_executor = False
+            # They use the pools which were just shut down.
+            self._tagged_checkers.clear()
+
+    def assess_overall_status(self, results):
+        """Return whether the system is healthy, given a dict of
+        CheckResults of all checks by check ID."""
         if not self._checks:
             return True
-        failed_checks = [check for check in self._checks if not check.is_ok]
+        failed_checks = [
+            check for check in self._checks
+            if self._is_failing(check, results[check.check_id])]
         failed_critical_checks = [
             check for check in failed_checks if check.is_critical]
 
@@ -193,3 +1195,8 @@ class HealthChecker(object):
             return False
 
         return True
+
+    def _is_failing(self, check, result):
+        if self._history is None:
+            return not result.is_ok
+        return self._history.is_failing(check.check_id, result)
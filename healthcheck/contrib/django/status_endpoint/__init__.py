@@ -0,0 +1,2 @@
+default_app_config = (
+    'healthcheck.contrib.django.status_endpoint.apps.StatusEndpointConfig')
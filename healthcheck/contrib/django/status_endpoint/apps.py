@@ -0,0 +1,26 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
+
+
+class StatusEndpointConfig(AppConfig):
+    name = 'healthcheck.contrib.django.status_endpoint'
+    label = 'status_endpoint'
+    verbose_name = 'Status endpoint'
+
+    def ready(self):
+        # The checker is built on first use, unless warming up. Threads of
+        # the master process of pre-forking servers don't survive the fork,
+        # so worker processes start their own warm up on their first request,
+        # which waits for it.
+        if getattr(settings, 'STATUS_WARM_UP', False):
+            start_warm_up()
+            request_started.connect(
+                start_warm_up, dispatch_uid='status_endpoint_warm_up')
+
+
+def start_warm_up(**kwargs):
+    """Warm up the checker, once per process."""
+    from healthcheck.contrib.django.status_endpoint.views import (
+        checker_registry)
+    checker_registry.start_warm_up()
@@ -0,0 +1,12 @@
+from django.conf.urls import url
+
+from healthcheck.contrib.django.status_endpoint.async_views import status
+from healthcheck.contrib.django.status_endpoint.views import history, metrics
+
+urlpatterns = [
+    url(r'^$', status),
+    url(r'^live$', status, {'tags': ['live']}),
+    url(r'^ready$', status, {'tags': ['ready']}),
+    url(r'^metrics$', metrics),
+    url(r'^history$', history),
+]
@@ -0,0 +1,30 @@
+"""Async version of the status view, for Django served under ASGI (Python 3.5+,
+Django 3.1+)."""
+import asyncio
+
+from django.http import HttpResponseNotAllowed
+
+from healthcheck.aio import AsyncHealthChecker
+from healthcheck.contrib.django.status_endpoint.views import (
+    checker_registry, get_tags, select_checks, status_response,
+    unknown_tags_response)
+
+
+async def status(request, tags=None):
+    # require_http_methods() doesn't support coroutines on older Djangos.
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    if checker_registry.is_warming_up():
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, checker_registry.wait_for_warm_up)
+    checker = checker_registry.get_checker(AsyncHealthChecker)
+    tags = get_tags(request, tags)
+    not_found = unknown_tags_response(checker, tags)
+    if not_found is not None:
+        return not_found
+
+    selected = select_checks(checker, tags)
+    ok, details = await selected()
+
+    return status_response(ok, details, request, selected)
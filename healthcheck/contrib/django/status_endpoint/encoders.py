@@ -0,0 +1,63 @@
+"""JSON encoders for the status views, selected with STATUS_JSON_ENCODER.
+
+An encoder takes the data to return and gives bytes of UTF-8 JSON.
+"""
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def json_encoder(data):
+    return json.dumps(data).encode('utf-8')
+
+
+def orjson_encoder(data):
+    # Item IDs used in details aren't always strings.
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+
+def ujson_encoder(data):
+    return ujson.dumps(data).encode('utf-8')
+
+
+ENCODERS = {
+    'json': json_encoder,
+    'orjson': orjson_encoder,
+    'ujson': ujson_encoder,
+}
+
+
+def is_available(name):
+    """Whether the module of the encoder `name` is installed."""
+    return globals()[name] is not None
+
+
+def get_encoder():
+    """Return the encoder named by STATUS_JSON_ENCODER: 'json' (the
+    default), 'orjson', 'ujson', 'fastest' (the first of those which is
+    installed) or the dotted path of an encoder function."""
+    name = getattr(settings, 'STATUS_JSON_ENCODER', 'json')
+    if name == 'fastest':
+        name = next(name for name in ('orjson', 'ujson', 'json')
+                    if is_available(name))
+
+    if name in ENCODERS:
+        if not is_available(name):
+            raise ImproperlyConfigured(
+                'STATUS_JSON_ENCODER is {0!r}, but {0} is not '
+                'installed.'.format(name))
+        return ENCODERS[name]
+
+    return import_string(name)
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from healthcheck.contrib.django.status_endpoint.encoders import get_encoder
+from healthcheck.contrib.django.status_endpoint.views import checker_registry
+from healthcheck.server import StatusServer
+
+
+class Command(BaseCommand):
+    help = ('Serve the status of the checks configured in settings on its '
+            'own port, so that probes bypass the application server.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--host', help='address to listen on (default: '
+            'STATUS_SERVER_HOST, or 127.0.0.1)')
+        parser.add_argument(
+            '--port', type=int, help='port to listen on (default: '
+            'STATUS_SERVER_PORT, or 8001)')
+
+    def handle(self, **options):
+        host = options['host'] or getattr(
+            settings, 'STATUS_SERVER_HOST', '127.0.0.1')
+        port = options['port']
+        if port is None:
+            port = getattr(settings, 'STATUS_SERVER_PORT', 8001)
+
+        checker = checker_registry.get_checker()
+        server = StatusServer(checker, host=host, port=port,
+                              encoder=get_encoder())
+        self.stdout.write(
+            'Serving health checks on http://{0}:{1}/'.format(host, port))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            checker_registry.reset()
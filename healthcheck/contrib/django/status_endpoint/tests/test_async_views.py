@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+
+from healthcheck.contrib.django.status_endpoint import async_views
+from healthcheck.contrib.django.status_endpoint.tests.test_views import (
+    HungCheck, hung_check_released)
+from healthcheck.contrib.django.status_endpoint.views import (
+    checker_registry)
+
+
+class AsyncStatusEndpointViewsTestCase(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def get_response(self, request, **kwargs):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        return loop.run_until_complete(async_views.status(request, **kwargs))
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_PROCESS=False,
+        STATUS_CHECK_FILES=('/etc/quiesce',)
+    )
+    def test_ok(self):
+        response = self.get_response(self.factory.get('/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content.decode()), {
+            "quiesce file doesn't exist": {
+                'details': {'/etc/quiesce': 'no such file'},
+                'status': 'ok',
+            }
+        })
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_FILES=('/usr/bin/env',)
+    )
+    def test_failed_check(self):
+        response = self.get_response(self.factory.get('/'))
+        self.assertEqual(response.status_code, 500)
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_PROCESS=False,
+        STATUS_CHECK_FILES=('/etc/quiesce',)
+    )
+    def test_unknown_tags_are_not_found(self):
+        response = self.get_response(self.factory.get('/live'),
+                                     tags=['live'])
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_FILES=(),
+        STATUS_CHECKS=[
+            'healthcheck.contrib.django.status_endpoint.tests.test_views.'
+            'HungCheck',
+            'healthcheck.contrib.django.status_endpoint.tests.test_views.'
+            'PingCheck',
+        ],
+    )
+    def test_hung_check_doesnt_starve_later_requests(self):
+        self.addCleanup(checker_registry.reset)
+        hung_check_released.clear()
+        self.addCleanup(hung_check_released.set)
+        HungCheck.runs = 0
+
+        for _ in range(5):
+            response = self.get_response(self.factory.get('/ready'),
+                                         tags=['ready'])
+            self.assertEqual(response.status_code, 500)
+        response = self.get_response(self.factory.get('/live'),
+                                     tags=['live'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(HungCheck.runs, 1)
+
+    def test_only_get_is_allowed(self):
+        response = self.get_response(self.factory.post('/'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import json
+from unittest import skipIf
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+from mock import patch
+
+from healthcheck.contrib.django.status_endpoint import encoders
+
+DETAILS = {'check': {'status': 'ok', 'details': {1: 'ok', 'db': u'✓'}}}
+
+
+class EncodersTestCase(SimpleTestCase):
+    def assert_encodes(self, encoder):
+        self.assertEqual(
+            json.loads(encoder(DETAILS).decode('utf-8')),
+            {'check': {'status': 'ok', 'details': {'1': 'ok', 'db': u'✓'}}})
+
+    def test_stdlib_is_the_default(self):
+        self.assertIs(encoders.get_encoder(), encoders.json_encoder)
+        self.assert_encodes(encoders.json_encoder)
+
+    @skipIf(encoders.orjson is None, 'orjson is not installed')
+    @override_settings(STATUS_JSON_ENCODER='orjson')
+    def test_orjson(self):
+        self.assert_encodes(encoders.get_encoder())
+
+    @skipIf(encoders.ujson is None, 'ujson is not installed')
+    @override_settings(STATUS_JSON_ENCODER='ujson')
+    def test_ujson(self):
+        self.assert_encodes(encoders.get_encoder())
+
+    @override_settings(STATUS_JSON_ENCODER='fastest')
+    @patch.object(encoders, 'orjson', None)
+    @patch.object(encoders, 'ujson', None)
+    def test_fastest_falls_back_to_stdlib(self):
+        self.assertIs(encoders.get_encoder(), encoders.json_encoder)
+
+    @override_settings(STATUS_JSON_ENCODER='orjson')
+    @patch.object(encoders, 'orjson', None)
+    def test_missing_encoder(self):
+        self.assertRaisesRegexp(
+            ImproperlyConfigured, 'orjson is not installed',
+            encoders.get_encoder)
+
+    @override_settings(STATUS_JSON_ENCODER=(
+        'healthcheck.contrib.django.status_endpoint.encoders.json_encoder'))
+    def test_dotted_path(self):
+        self.assertIs(encoders.get_encoder(), encoders.json_encoder)
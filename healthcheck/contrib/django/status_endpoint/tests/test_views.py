@@ -1,14 +1,61 @@
 import json
 import os
+import re
+import shutil
+import tempfile
+import threading
+import time
 
+try:
+    from urllib.request import urlopen
+except ImportError:  # Python 2
+    from urllib2 import urlopen
 
+from django.core.management import call_command
+from django.core.signals import request_started
 from django.core.urlresolvers import reverse
 from django.db import connections
+from django.http import Http404
 from django.test import TestCase
 from django.test.client import RequestFactory
 from django.test.utils import override_settings
+from django.utils.six import StringIO
+from mock import Mock, patch
 
+from healthcheck import HealthCheck
+from healthcheck.breaker import CircuitBreaker
+from healthcheck.contrib.django import status_endpoint
 from healthcheck.contrib.django.status_endpoint import views
+from healthcheck.contrib.django.status_endpoint.apps import (
+    StatusEndpointConfig)
+from healthcheck.contrib.django.status_endpoint.management.commands import (
+    status_server)
+from healthcheck.server import StatusServer
+
+
+class PingCheck(HealthCheck):
+    check_id = 'ping'
+    tags = ('live',)
+
+    def run(self):
+        return self.report(True, 'pong')
+
+
+ping_check = PingCheck(check_id='ping instance')
+
+hung_check_released = threading.Event()
+
+
+class HungCheck(HealthCheck):
+    check_id = 'hung'
+    tags = ('ready',)
+    timeout = 0.05
+    runs = 0
+
+    def run(self):
+        HungCheck.runs += 1
+        hung_check_released.wait(5)
+        return self.report(True, 'finished')
 
 
 class StatusEndpointViewsTestCase(TestCase):
@@ -46,6 +93,7 @@ class StatusEndpointViewsTestCase(TestCase):
 
     @override_settings(
         STATUS_CHECK_DBS=False,
+        STATUS_CHECK_PROCESS=False,
         STATUS_CHECK_FILES=()
     )
     def test_no_checks_raises_200(self):
@@ -65,6 +113,7 @@ class StatusEndpointViewsTestCase(TestCase):
 
     @override_settings(
         STATUS_CHECK_DBS=False,
+        STATUS_CHECK_PROCESS=False,
         STATUS_CHECK_FILES=('/usr/bin/env',)
     )
     def test_failed_check(self):
@@ -88,3 +137,648 @@ class StatusEndpointViewsTestCase(TestCase):
         }
 
         self.assertEqual(response, expected_response)
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_FILES=('/etc/quiesce',),
+        STATUS_CHECK_TIMEOUT=0.05,
+    )
+    @patch('healthcheck.checks.file_exists')
+    def test_check_timeout(self, file_exists_mock):
+        released = threading.Event()
+        self.addCleanup(released.set)
+        file_exists_mock.side_effect = lambda path: released.wait(5)
+
+        request = self.factory.get(reverse(views.status))
+        response = views.status(request)
+        content = json.loads(response.content.decode())
+
+        self.assertEqual(response.status_code, 500)
+        check = content["quiesce file doesn't exist"]
+        self.assertEqual(check['status'], 'FAILED')
+        self.assertTrue(re.match(r'timed out after \d+ms', check['details']))
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_FILES=('/etc/quiesce',),
+        STATUS_CACHE_TTL=60,
+    )
+    @patch('healthcheck.checks.file_exists', return_value=False)
+    def test_results_are_cached(self, file_exists_mock):
+        self.addCleanup(views.checker_registry.reset)
+        request = self.factory.get(reverse(views.status))
+
+        first = views.status(request)
+        second = views.status(request)
+
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(file_exists_mock.call_count, 1)
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_FILES=('/etc/quiesce',),
+        STATUS_CHECK_INTERVAL=60,
+    )
+    def test_results_come_from_scheduler(self):
+        self.addCleanup(views.checker_registry.reset)
+        request = self.factory.get(reverse(views.status))
+
+        response = views.status(request)
+
+        scheduler = views.checker_registry.get_cache()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            scheduler.snapshot()["quiesce file doesn't exist"].details,
+            {'/etc/quiesce': 'no such file'})
+        self.assertEqual(scheduler.checks,
+                         views.checker_registry.get_checker().checks)
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_FILES=('/etc/quiesce',),
+        STATUS_CACHE_TTL=60,
+    )
+    def test_results_are_shared_through_file(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'results')
+        self.addCleanup(views.checker_registry.reset)
+        request = self.factory.get(reverse(views.status))
+
+        with override_settings(STATUS_CACHE_PATH=path):
+            response = views.status(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(os.path.exists(path))
+
+    @override_settings(
+        STATUS_CHECK_DBS=True,
+        STATUS_CHECK_DBS_OPTIONS={
+            'probe_connections': True, 'item_timeout': 5},
+        STATUS_CHECK_FILES=(),
+    )
+    def test_db_probe_connections(self):
+        request = self.factory.get(reverse(views.status))
+        response = views.status(request)
+        response_json = json.loads(response.content.decode())
+
+        self.assertEqual(response.status_code, 200)
+        db_details = response_json['Django Databases Health Check']['details']
+        self.assertEqual(db_details['default']['status'], 'ok')
+        self.assertIn('latency_ms', db_details['default'])
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_FILES=('/etc/quiesce',),
+    )
+    def test_metrics(self):
+        views.status(self.factory.get(reverse(views.status)))
+
+        request = self.factory.get(reverse(views.metrics))
+        response = views.metrics(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(
+            'healthcheck_check_runs_total{check="quiesce file doesn\'t '
+            'exist"}', response.content.decode())
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_FILES=('/etc/quiesce',),
+        STATUS_INCLUDE_DURATIONS=True,
+    )
+    def test_include_durations(self):
+        response = views.status(self.factory.get(reverse(views.status)))
+        check = json.loads(response.content.decode())[
+            "quiesce file doesn't exist"]
+        self.assertIn('duration_ms', check)
+        self.assertIn('/etc/quiesce', check['item_durations_ms'])
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_FILES=('/usr/bin/env',),
+        STATUS_WATCH_FILES=True,
+    )
+    def test_watch_files(self):
+        request = self.factory.get(reverse(views.status))
+        with patch('os.stat') as stat_mock:
+            views.status(request)
+            stat_mock.reset_mock()
+            response = views.status(request)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(stat_mock.called)
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_PROCESS=False,
+        STATUS_CHECK_FILES=('/usr/bin/env',),
+    )
+    def test_ndjson_status(self):
+        request = self.factory.get(reverse(views.status), {'format': 'ndjson'})
+        response = views.status(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in
+                 b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(lines, [
+            {'check_id': "quiesce file doesn't exist",
+             'details': {'/usr/bin/env': 'FILE EXISTS'},
+             'status': 'FAILED'},
+            {'overall_status': 'FAILED'},
+        ])
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_FILES=('/etc/quiesce',),
+    )
+    def test_ndjson_status_is_selected_by_accept_header(self):
+        request = self.factory.get(reverse(views.status),
+                                   HTTP_ACCEPT='application/x-ndjson')
+        response = views.status(request)
+
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(json.loads(content.splitlines()[-1]),
+                         {'overall_status': 'ok'})
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_FILES=('/usr/bin/env',),
+        STATUS_CIRCUIT_BREAKER={'failure_threshold': 1, 'backoff': 60},
+    )
+    @patch('healthcheck.checks.file_exists', return_value=True)
+    def test_circuit_breaker_outlives_requests(self, file_exists_mock):
+        self.addCleanup(views._breakers.clear)
+        request = self.factory.get(reverse(views.status))
+
+        views.status(request)
+        response = views.status(request)
+        content = json.loads(response.content.decode())
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(file_exists_mock.call_count, 1)
+        breaker = content["quiesce file doesn't exist"]['circuit_breaker']
+        self.assertEqual(breaker['state'], 'open')
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_PROCESS=False,
+        STATUS_CHECK_FILES=(),
+        STATUS_CHECKS=[
+            'healthcheck.contrib.django.status_endpoint.tests.test_views.'
+            'ping_check',
+        ],
+    )
+    def test_own_circuit_breakers_are_kept(self):
+        breaker = CircuitBreaker()
+        with patch.object(ping_check, 'circuit_breaker', breaker):
+            self.assertIs(views.get_checks()[0].circuit_breaker, breaker)
+            with override_settings(STATUS_CIRCUIT_BREAKER={'backoff': 60}):
+                self.addCleanup(views._breakers.clear)
+                self.assertIs(views.get_checks()[0].circuit_breaker,
+                              breaker)
+        self.assertIsNone(ping_check.circuit_breaker)
+
+    @override_settings(
+        STATUS_CHECK_DBS=True,
+        STATUS_CHECK_FILES=('/etc/quiesce',),
+    )
+    def test_live_runs_only_the_process_check_by_default(self):
+        request = self.factory.get('/status/live')
+        response = views.status(request, tags=['live'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content.decode()), {
+            'process': {'details': {'pid': os.getpid()}, 'status': 'ok'},
+        })
+
+    @override_settings(
+        STATUS_CHECK_DBS=True,
+        STATUS_CHECK_PROCESS=False,
+        STATUS_CHECK_FILES=('/etc/quiesce',),
+    )
+    def test_live_is_not_found_without_live_checks(self):
+        request = self.factory.get('/status/live')
+        response = views.status(request, tags=['live'])
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content.decode()),
+                         {'error': "No checks are tagged 'live'."})
+
+    @override_settings(
+        STATUS_CHECK_DBS=True,
+        STATUS_CHECK_FILES=('/etc/quiesce',),
+    )
+    def test_ready_runs_tagged_checks(self):
+        request = self.factory.get('/status/ready')
+        response = views.status(request, tags=['ready'])
+        self.assertEqual(
+            sorted(json.loads(response.content.decode())),
+            ['Django Databases Health Check', "quiesce file doesn't exist"])
+
+    @override_settings(
+        STATUS_CHECK_DBS=True,
+        STATUS_CHECK_FILES=('/etc/quiesce',),
+    )
+    def test_tags_query_parameter(self):
+        request = self.factory.get(reverse(views.status), {'tags': 'files'})
+        response = views.status(request)
+        self.assertEqual(list(json.loads(response.content.decode())),
+                         ["quiesce file doesn't exist"])
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_FILES=('/etc/quiesce',),
+    )
+    def test_unknown_tags_are_not_found(self):
+        request = self.factory.get(reverse(views.status),
+                                   {'tags': 'files,redy,dbs'})
+        response = views.status(request)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content.decode()),
+                         {'error': "No checks are tagged 'dbs', 'redy'."})
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_FILES=('/etc/quiesce',),
+    )
+    def test_unknown_tags_are_not_found_when_streaming(self):
+        request = self.factory.get(reverse(views.status),
+                                   {'tags': 'redy', 'format': 'ndjson'})
+        response = views.status(request)
+        self.assertEqual(response.status_code, 404)
+
+
+class CheckerRegistryTestCase(TestCase):
+    def setUp(self):
+        self.registry = views.CheckerRegistry()
+        self.addCleanup(self.registry.reset)
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=())
+    def test_checker_is_built_once(self):
+        self.assertIs(self.registry.get_checker(),
+                      self.registry.get_checker())
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=())
+    def test_status_view_reuses_checker(self):
+        self.addCleanup(views.checker_registry.reset)
+        request = RequestFactory().get(reverse(views.status))
+        views.status(request)
+        checker = views.checker_registry.get_checker()
+
+        views.status(request)
+
+        self.assertIs(views.checker_registry.get_checker(), checker)
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_PROCESS=False,
+                       STATUS_CHECK_FILES=())
+    def test_changing_settings_resets_checkers(self):
+        checker = views.checker_registry.get_checker()
+        with override_settings(STATUS_CHECK_FILES=('/etc/quiesce',)):
+            new_checker = views.checker_registry.get_checker()
+        self.assertIsNot(new_checker, checker)
+        self.assertEqual(list(new_checker.run_checks()),
+                         ["quiesce file doesn't exist"])
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_PROCESS=False,
+                       STATUS_CHECK_FILES=(), STATUS_CHECK_INTERVAL=60)
+    def test_changing_settings_replaces_scheduler(self):
+        registry = views.checker_registry
+        scheduler = registry.get_cache()
+        self.assertIs(registry.get_checker()._cache, scheduler)
+
+        with override_settings(STATUS_CHECK_FILES=('/etc/quiesce',)):
+            new_scheduler = registry.get_cache()
+            self.assertIs(registry.get_checker()._cache, new_scheduler)
+
+        self.assertIsNot(new_scheduler, scheduler)
+        self.assertTrue(scheduler._stopped.is_set())
+        self.assertEqual([check.check_id for check in new_scheduler.checks],
+                         ["quiesce file doesn't exist"])
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=(),
+                       STATUS_CACHE_TTL=60)
+    def test_changing_settings_replaces_cache(self):
+        cache = views.checker_registry.get_cache()
+        with override_settings(STATUS_CACHE_TTL=30):
+            new_cache = views.checker_registry.get_cache()
+        self.assertIsNot(new_cache, cache)
+        self.assertEqual(new_cache.ttl, 30)
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_PROCESS=False,
+        STATUS_CHECK_FILES=(),
+        STATUS_CHECKS=[
+            'healthcheck.contrib.django.status_endpoint.tests.test_views.'
+            'PingCheck',
+            'healthcheck.contrib.django.status_endpoint.tests.test_views.'
+            'ping_check',
+        ],
+    )
+    def test_checks_are_loaded_by_dotted_path(self):
+        ok, details = self.registry.get_checker().for_tags(['live'])()
+        self.assertTrue(ok)
+        self.assertEqual(details, {
+            'ping': {'details': 'pong', 'status': 'ok'},
+            'ping instance': {'details': 'pong', 'status': 'ok'},
+        })
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_FILES=(),
+        STATUS_CHECKS=[
+            'healthcheck.contrib.django.status_endpoint.tests.test_views.'
+            'HungCheck',
+            'healthcheck.contrib.django.status_endpoint.tests.test_views.'
+            'PingCheck',
+        ],
+    )
+    def test_hung_check_doesnt_starve_later_requests(self):
+        self.addCleanup(views.checker_registry.reset)
+        hung_check_released.clear()
+        self.addCleanup(hung_check_released.set)
+        HungCheck.runs = 0
+        factory = RequestFactory()
+
+        for _ in range(5):
+            response = views.status(factory.get('/status/ready'),
+                                    tags=['ready'])
+            self.assertEqual(response.status_code, 500)
+        start = time.time()
+        response = views.status(factory.get('/status/live'), tags=['live'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(HungCheck.runs, 1)
+
+    @override_settings(
+        STATUS_CHECK_DBS=False,
+        STATUS_CHECK_FILES=(),
+        STATUS_CHECKS=['json.dumps'],
+    )
+    def test_checks_must_be_health_checks(self):
+        self.assertRaisesRegexp(
+            ValueError, 'STATUS_CHECKS must list HealthCheck',
+            self.registry.get_checker)
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/x',))
+    @patch('healthcheck.checks.file_exists', return_value=False)
+    def test_warm_up_runs_checks(self, file_exists_mock):
+        self.registry.warm_up()
+        file_exists_mock.assert_called_once_with('/x')
+
+    @override_settings(
+        STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=(), STATUS_WARM_UP=True)
+    @patch.object(views.CheckerRegistry, 'warm_up')
+    def test_app_warms_up_when_ready(self, warm_up_mock):
+        self.addCleanup(views.checker_registry.reset)
+        self.addCleanup(request_started.disconnect,
+                        dispatch_uid='status_endpoint_warm_up')
+        config = StatusEndpointConfig(status_endpoint.__name__,
+                                      status_endpoint)
+
+        with patch.object(views.checker_registry, '_warm_up_pid', None):
+            config.ready()
+            # Requests of the same process don't warm up again.
+            request_started.send(sender=self.__class__)
+            views.checker_registry.wait_for_warm_up()
+        warm_up_mock.assert_called_once_with()
+
+    @override_settings(
+        STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=(), STATUS_WARM_UP=True)
+    @patch.object(views.CheckerRegistry, 'warm_up')
+    def test_forked_processes_warm_up_on_first_request(self, warm_up_mock):
+        self.addCleanup(request_started.disconnect,
+                        dispatch_uid='status_endpoint_warm_up')
+        config = StatusEndpointConfig(status_endpoint.__name__,
+                                      status_endpoint)
+        config.ready()
+
+        # As if ready() ran in the master process.
+        with patch.object(views.checker_registry, '_warm_up_pid', -1):
+            request_started.send(sender=self.__class__)
+            views.checker_registry.wait_for_warm_up()
+        self.assertEqual(warm_up_mock.call_count, 2)
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=())
+    def test_requests_wait_for_warm_up(self):
+        self.addCleanup(views.checker_registry.reset)
+        released = threading.Event()
+        self.addCleanup(released.set)
+        responses = []
+        request = RequestFactory().get(reverse(views.status))
+        thread = threading.Thread(
+            target=lambda: responses.append(views.status(request)))
+
+        with patch.object(views.CheckerRegistry, 'warm_up',
+                          side_effect=lambda: released.wait(5)), \
+                patch.object(views.checker_registry, '_warm_up_pid', None):
+            views.checker_registry.start_warm_up()
+            thread.start()
+            thread.join(0.1)
+            self.assertEqual(responses, [])
+
+            released.set()
+            thread.join(5)
+
+        self.assertEqual(responses[0].status_code, 200)
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/x',),
+                       STATUS_SERVER_PORT=0)
+    def test_status_server_command(self):
+        self.addCleanup(views.checker_registry.reset)
+        served = []
+
+        def serve_forever(server):
+            served.append(server)
+            server.start()
+            try:
+                response = urlopen(
+                    'http://127.0.0.1:{0}/ready'.format(server.port),
+                    timeout=5)
+                served.append(json.loads(response.read().decode()))
+            finally:
+                server.stop()
+
+        with patch.object(StatusServer, 'serve_forever', serve_forever):
+            call_command(status_server.Command(), stdout=StringIO())
+
+        server, data = served
+        self.assertEqual(server.host, '127.0.0.1')
+        self.assertEqual(list(data), ["quiesce file doesn't exist"])
+
+    @override_settings(STATUS_SERVER_PORT=8001)
+    def test_app_doesnt_start_status_server(self):
+        config = StatusEndpointConfig(status_endpoint.__name__,
+                                      status_endpoint)
+        with patch.object(StatusServer, 'start') as start:
+            config.ready()
+        self.assertFalse(start.called)
+
+
+class StatusCachingTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.addCleanup(views.checker_registry.reset)
+
+    def get(self, **headers):
+        return views.status(self.factory.get(reverse(views.status), **headers))
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/x',))
+    def test_matching_etag_gets_not_modified(self):
+        etag = self.get()['ETag']
+
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/x',))
+    def test_other_etag_gets_status(self):
+        response = self.get(HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content)
+
+    @override_settings(
+        STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/usr/bin/env',))
+    def test_failures_are_sent_in_full(self):
+        etag = self.get()['ETag']
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 500)
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/x',))
+    def test_unchanged_status_isnt_encoded_again(self):
+        first = self.get()
+        with patch.object(views, 'get_encoder') as get_encoder_mock:
+            second = self.get()
+
+        self.assertFalse(get_encoder_mock.called)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/x',))
+    def test_changed_status_gets_new_etag(self):
+        first = self.get()
+        with patch('healthcheck.checks.file_exists', return_value=True):
+            second = self.get()
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+
+class StatusHistoryTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.addCleanup(views._histories.clear)
+        self.addCleanup(views.checker_registry.reset)
+
+    def get_status(self):
+        return views.status(self.factory.get(reverse(views.status)))
+
+    def get_history(self, **params):
+        response = views.history(
+            self.factory.get(reverse(views.history), params))
+        return json.loads(response.content.decode())
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/x',))
+    def test_history_needs_a_size(self):
+        request = self.factory.get(reverse(views.history))
+        with self.assertRaises(Http404):
+            views.history(request)
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/x',),
+                       STATUS_HISTORY_SIZE=10)
+    def test_history(self):
+        self.get_status()
+        self.get_status()
+
+        check = self.get_history()["quiesce file doesn't exist"]
+        self.assertEqual(check['runs'], 2)
+        self.assertEqual(check['failures'], 0)
+        self.assertNotIn('recent_runs', check)
+
+        check = self.get_history(runs='')["quiesce file doesn't exist"]
+        self.assertEqual([run['status'] for run in check['recent_runs']],
+                         ['ok', 'ok'])
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/x',),
+                       STATUS_HISTORY_SIZE=10,
+                       STATUS_HISTORY_FAIL_THRESHOLD=2)
+    def test_fail_threshold(self):
+        self.assertEqual(self.get_status().status_code, 200)
+        with patch('healthcheck.checks.file_exists', return_value=True):
+            self.assertEqual(self.get_status().status_code, 200)
+            self.assertEqual(self.get_status().status_code, 500)
+
+
+class StatusProfilingTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def get(self, user=None, **headers):
+        request = self.factory.get(reverse(views.status), {'profile': '1'},
+                                   **headers)
+        if user is not None:
+            request.user = user
+        return views.status(request)
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/x',))
+    def test_profiling_is_off_by_default(self):
+        self.assertEqual(self.get().status_code, 403)
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/x',),
+                       STATUS_PROFILING=True, STATUS_PROFILE_TOKEN='secret')
+    def test_wrong_token_is_forbidden(self):
+        response = self.get(HTTP_X_STATUS_PROFILE_TOKEN='guess')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/x',),
+                       STATUS_PROFILING=True, STATUS_PROFILE_TOKEN='secret',
+                       STATUS_CACHE_TTL=60)
+    def test_token_allows_profiling(self):
+        response = self.get(HTTP_X_STATUS_PROFILE_TOKEN='secret')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        data = json.loads(response.content.decode())
+        self.assertEqual(data["quiesce file doesn't exist"]['status'], 'ok')
+        self.assertIn("quiesce file doesn't exist", data['profile']['checks'])
+        self.assertIn('hotspots', data['profile'])
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/x',),
+                       STATUS_PROFILING=True)
+    def test_superuser_may_profile(self):
+        user = Mock(is_active=True, is_superuser=True)
+        self.assertEqual(self.get(user).status_code, 200)
+
+        user.is_superuser = False
+        self.assertEqual(self.get(user).status_code, 403)
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/x',),
+                       STATUS_PROFILING=True)
+    def test_profile_is_a_boolean(self):
+        for value in ('0', 'false', 'no', ''):
+            request = self.factory.get(reverse(views.status),
+                                       {'profile': value})
+            response = views.status(request)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn(b'profile', response.content)
+
+    @override_settings(STATUS_CHECK_DBS=False, STATUS_CHECK_FILES=('/x',),
+                       STATUS_PROFILING=True, STATUS_PROFILE_TOKEN='secret',
+                       STATUS_HISTORY_SIZE=10)
+    def test_profiling_reuses_checks_and_records_nothing(self):
+        self.addCleanup(views.checker_registry.reset)
+        views.checker_registry.get_checker()
+        self.addCleanup(views._histories.clear)
+
+        with patch.object(views, 'get_checks') as get_checks, \
+                patch.object(views.metrics_registry, 'observe') as observe:
+            response = self.get(HTTP_X_STATUS_PROFILE_TOKEN='secret')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(get_checks.called)
+        self.assertFalse(observe.called)
+        self.assertIsNone(views.get_history().describe(
+            "quiesce file doesn't exist"))
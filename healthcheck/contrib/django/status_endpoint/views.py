@@ -1,42 +1,517 @@
-import json
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import weakref
 
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.http import parse_etags
+from django.utils.module_loading import import_string
 from django.views.decorators.http import require_http_methods
-from django.http import HttpResponse
+from django.http import (
+    Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse)
 
 from healthcheck import (
-    DjangoDBsHealthCheck, FilesDontExistHealthCheck, HealthChecker)
+    DjangoDBsHealthCheck, FilesDontExistHealthCheck, HealthCheck,
+    HealthChecker, ProcessHealthCheck)
+from healthcheck.breaker import CircuitBreaker
+from healthcheck.cache import ResultCache
+from healthcheck.contrib.django.status_endpoint.encoders import get_encoder
+from healthcheck.history import HealthHistory
+from healthcheck.metrics import MetricsRegistry
+from healthcheck.profiling import CheckProfiler
+from healthcheck.scheduler import HealthCheckScheduler
+from healthcheck.watch import get_default_watcher
+
+logger = logging.getLogger(__name__)
+
+# Circuit breakers and histories outlive the checkers, which are rebuilt when
+# settings change, so they're kept here, one per configuration.
+_breakers = {}
+_histories = {}
+_lock = threading.Lock()
+
+# The last response body of each checker, to reuse while results don't
+# change.
+_encoded = weakref.WeakKeyDictionary()
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson')
+
+# Values of boolean query parameters, like ?profile, which turn them on.
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+# Statistics of all check runs made by the views, exposed by the metrics view.
+metrics_registry = MetricsRegistry()
 
 
 class JsonResponse(HttpResponse):
-    def __init__(self, data, **kwargs):
+    def __init__(self, data=None, encoded=None, **kwargs):
+        """Pass the data to return, or its `encoded` JSON."""
         kwargs.setdefault('content_type', 'application/json')
-        data = json.dumps(data)
-        super(JsonResponse, self).__init__(content=data, **kwargs)
+        if encoded is None:
+            encoded = get_encoder()(data)
+        super(JsonResponse, self).__init__(content=encoded, **kwargs)
 
 
 class JsonResponseServerError(JsonResponse):
     status_code = 500
 
 
-@require_http_methods(['GET'])
-def status(request):
+class JsonResponseForbidden(JsonResponse):
+    status_code = 403
+
+
+class JsonResponseNotFound(JsonResponse):
+    status_code = 404
+
+
+def get_checks():
+    """Build the checks configured in Django settings."""
     checks = []
+    timeout = getattr(settings, 'STATUS_CHECK_TIMEOUT', None)
+
+    if getattr(settings, 'STATUS_CHECK_PROCESS', True):
+        checks.append(ProcessHealthCheck())
 
     if getattr(settings, 'STATUS_CHECK_DBS', True):
-        checks.append(DjangoDBsHealthCheck())
+        options = getattr(settings, 'STATUS_CHECK_DBS_OPTIONS', {})
+        checks.append(DjangoDBsHealthCheck(timeout=timeout, **options))
 
     files_to_check = getattr(settings, 'STATUS_CHECK_FILES', None)
     if files_to_check:
+        watcher = None
+        if getattr(settings, 'STATUS_WATCH_FILES', False):
+            watcher = get_default_watcher()
         checks.append(FilesDontExistHealthCheck(
-            files_to_check, check_id="quiesce file doesn't exist"))
+            files_to_check, check_id="quiesce file doesn't exist",
+            timeout=timeout, watcher=watcher, tags=('files', 'ready')))
+
+    for path in getattr(settings, 'STATUS_CHECKS', ()):
+        checks.append(load_check(path))
+
+    for check in checks:
+        # Keep the breakers checks were given.
+        if check.circuit_breaker is None:
+            check.circuit_breaker = get_circuit_breaker(check.check_id)
+
+    return checks
+
+
+def load_check(path):
+    """Import a check listed in STATUS_CHECKS by dotted path: a HealthCheck
+    subclass, which is instantiated without arguments, or an instance."""
+    check = import_string(path)
+    if isinstance(check, type) and issubclass(check, HealthCheck):
+        check = check()
+    if not isinstance(check, HealthCheck):
+        raise ValueError(
+            'STATUS_CHECKS must list HealthCheck subclasses or instances, '
+            '{0} is {1!r}.'.format(path, check))
+    return check
+
+
+def get_circuit_breaker(check_id):
+    """Return the CircuitBreaker of a check, if STATUS_CIRCUIT_BREAKER (a
+    dict of CircuitBreaker arguments) is set."""
+    options = getattr(settings, 'STATUS_CIRCUIT_BREAKER', None)
+    if options is None:
+        return None
+
+    key = (check_id, tuple(sorted(options.items())))
+    with _lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker(**options)
+        return _breakers[key]
+
+
+def get_history():
+    """Return the HealthHistory configured in Django settings, if
+    STATUS_HISTORY_SIZE is set."""
+    size = getattr(settings, 'STATUS_HISTORY_SIZE', None)
+    if size is None:
+        return None
 
-    ok, details = HealthChecker(checks)()
+    config = (
+        size,
+        getattr(settings, 'STATUS_HISTORY_FLAPPING_THRESHOLD', 0.3),
+        getattr(settings, 'STATUS_HISTORY_FAIL_THRESHOLD', None),
+        getattr(settings, 'STATUS_HISTORY_FAIL_WINDOW', None),
+    )
+    with _lock:
+        if config not in _histories:
+            _histories[config] = HealthHistory(*config)
+        return _histories[config]
 
+
+def status_response(ok, details, request=None, checker=None):
+    """Return the status as JSON. Pass the `request`, to answer a matching
+    If-None-Match with 304 Not Modified, and the `checker` which produced
+    the status, to reuse its last response body if the status is the same.
+    """
     if ok and not details:
         details = 'There were no checks.'
 
-    if not ok:
-        return JsonResponseServerError(details)
+    encoded, etag = encode_status(ok, details, checker)
+    if ok and request is not None and etag in parse_etags(
+            request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+    elif ok:
+        response = JsonResponse(encoded=encoded)
+    else:
+        # Failures are always sent in full, for their status code.
+        response = JsonResponseServerError(encoded=encoded)
+    response['ETag'] = etag
+    return response
+
+
+def encode_status(ok, details, checker=None):
+    """Return the JSON of `details` and its ETag, reusing those of the last
+    status of `checker` if it's the same. Comparing details is much cheaper
+    than encoding them."""
+    if checker is not None:
+        with _lock:
+            last = _encoded.get(checker)
+        if last is not None and last[:2] == (ok, details):
+            return last[2:]
+
+    encoded = get_encoder()(details)
+    etag = '"{0}"'.format(hashlib.sha1(encoded).hexdigest())
+    if checker is not None:
+        with _lock:
+            _encoded[checker] = (ok, details, encoded, etag)
+    return encoded, etag
+
+
+class CheckerRegistry(object):
+    """Keeps the checkers configured in Django settings, so that they are
+    built once, not on every request.
+
+    Checkers are built on first use, in the process serving requests, with
+    the result cache or scheduler they share. All of them are dropped when a
+    setting changes (e.g. in tests), and rebuilt with the new settings on
+    next use, so that no scheduler keeps running the old checks.
+
+    With time limits, each checker runs the checks in a pool with a thread
+    per check, and a hung check holds one of them at most: later requests
+    wait for its run instead of starting another one (see HealthChecker).
+    """
+
+    def __init__(self):
+        self._checks = None
+        self._checkers = {}
+        self._cache = None
+        self._lock = threading.Lock()
+        self._warm_up_pid = None
+        # Set when the warm up of the process is done.
+        self._warmed_up = None
+
+    def get_checks(self):
+        """Return the configured checks, built once, so that all checkers
+        share their connections and thread pools."""
+        with self._lock:
+            if self._checks is None:
+                self._checks = get_checks()
+            return self._checks
+
+    def get_cache(self):
+        """Return the result cache configured in Django settings, if any.
+
+        With STATUS_CHECK_INTERVAL set, that's a started
+        HealthCheckScheduler, which runs the checks in the background. With
+        STATUS_CACHE_PATH set, the results are shared by all processes using
+        that file.
+        """
+        interval = getattr(settings, 'STATUS_CHECK_INTERVAL', None)
+        if interval is not None:
+            return self.get_scheduler(interval)
+
+        ttl = getattr(settings, 'STATUS_CACHE_TTL', None)
+        if ttl is None:
+            return None
+
+        config = (
+            ttl,
+            getattr(settings, 'STATUS_CACHE_FAILED_TTL', None),
+            getattr(settings, 'STATUS_CACHE_STALE_WHILE_REVALIDATE', False),
+        )
+        path = getattr(settings, 'STATUS_CACHE_PATH', None)
+        with self._lock:
+            if self._cache is None:
+                if path:
+                    # Imported here, as it's available on Unix only.
+                    from healthcheck.shared import SharedResultCache
+                    self._cache = SharedResultCache(path, *config)
+                else:
+                    self._cache = ResultCache(*config)
+            return self._cache
+
+    def get_scheduler(self, interval):
+        jitter = getattr(settings, 'STATUS_CHECK_INTERVAL_JITTER', 0.1)
+        history = get_history()
+        # Not under the lock, which get_checks() takes.
+        checks = self.get_checks()
+        with self._lock:
+            if self._cache is None:
+                # A thread per check, so that a hung check doesn't hold up
+                # the others.
+                scheduler = HealthCheckScheduler(
+                    checks, interval=interval, jitter=jitter,
+                    max_workers=max(len(checks), 1), metrics=metrics_registry,
+                    history=history)
+                scheduler.start()
+                self._cache = scheduler
+            return self._cache
+
+    def get_checker_options(self):
+        """Return HealthChecker arguments configured in Django settings."""
+        return {
+            'deadline': getattr(settings, 'STATUS_DEADLINE', None),
+            'cache': self.get_cache(),
+            'metrics': metrics_registry,
+            'include_durations': getattr(
+                settings, 'STATUS_INCLUDE_DURATIONS', False),
+            'fail_fast': getattr(settings, 'STATUS_FAIL_FAST', False),
+            'single_flight': getattr(settings, 'STATUS_SINGLE_FLIGHT', False),
+            'history': get_history(),
+        }
+
+    def get_checker(self, checker_class=HealthChecker):
+        """Return the checker of `checker_class` for the configured
+        checks."""
+        with self._lock:
+            checker = self._checkers.get(checker_class)
+        if checker is not None:
+            return checker
+
+        # Not under the lock, as the options may need the checks too.
+        checker = checker_class(self.get_checks(),
+                                **self.get_checker_options())
+        with self._lock:
+            return self._checkers.setdefault(checker_class, checker)
+
+    def warm_up(self):
+        """Run all checks once, so that the first request doesn't pay for
+        opening connections and filling caches."""
+        results = self.get_checker().run_checks()
+        failed = sorted(check_id for check_id, result in results.items()
+                        if not result.is_ok)
+        if failed:
+            logger.warning('Health checks failed during warm up: %s',
+                           ', '.join(failed))
+
+    def start_warm_up(self):
+        """Start warm_up() in a daemon thread, once per process, so that a
+        slow dependency doesn't hold up startup."""
+        with self._lock:
+            # Forked worker processes each warm up their own checker.
+            if self._warm_up_pid == os.getpid():
+                return
+            self._warm_up_pid = os.getpid()
+            warmed_up = self._warmed_up = threading.Event()
+        thread = threading.Thread(target=self._warm_up, args=(warmed_up,),
+                                  name='healthcheck warm up')
+        thread.daemon = True
+        thread.start()
+
+    def _warm_up(self, warmed_up):
+        try:
+            self.warm_up()
+        finally:
+            warmed_up.set()
 
-    return JsonResponse(details)
+    def is_warming_up(self):
+        """Whether the warm up of this process is running."""
+        with self._lock:
+            return (self._warm_up_pid == os.getpid() and
+                    not self._warmed_up.is_set())
+
+    def wait_for_warm_up(self):
+        """Wait for the warm up of this process to finish, if it's running,
+        so that requests don't run the checks cold next to it."""
+        with self._lock:
+            if self._warm_up_pid != os.getpid():
+                return
+            warmed_up = self._warmed_up
+        warmed_up.wait()
+
+    def reset(self):
+        with self._lock:
+            checkers = list(self._checkers.values())
+            self._checkers.clear()
+            self._checks = None
+            cache, self._cache = self._cache, None
+        for checker in checkers:
+            # Don't wait for running checks, they finish in the background.
+            checker.shutdown(wait=False)
+        if isinstance(cache, HealthCheckScheduler):
+            cache.stop()
+        elif hasattr(cache, 'close'):
+            cache.close()
+
+
+checker_registry = CheckerRegistry()
+
+
+@receiver(setting_changed)
+def reset_checkers(setting, **kwargs):
+    if setting.startswith('STATUS_') or setting == 'DATABASES':
+        checker_registry.reset()
+
+
+def wants_ndjson(request):
+    """Whether the client asked for a streamed, newline-delimited JSON
+    status, with `?format=ndjson` or its Accept header."""
+    if request.GET.get('format') == 'ndjson':
+        return True
+    accept = request.META.get('HTTP_ACCEPT', '')
+    return any(content_type in accept for content_type in NDJSON_CONTENT_TYPES)
+
+
+def get_tags(request, tags=None):
+    """Return the tags of the checks to run: those of the `tags` query
+    parameter (comma separated), else those given by the URLconf. None means
+    all checks."""
+    if 'tags' in request.GET:
+        return [tag.strip() for tag in request.GET['tags'].split(',')
+                if tag.strip()]
+    return tags
+
+
+def select_checks(checker, tags):
+    return checker if tags is None else checker.for_tags(tags)
+
+
+def unknown_tags_response(checker, tags):
+    """Return a 404 response if no check of `checker` has some of `tags`,
+    so that a typo in a probe's URL doesn't pass as healthy. Else None."""
+    if tags is None:
+        return None
+    unknown = sorted(set(tags) - set(checker.tags))
+    if not unknown:
+        return None
+    return JsonResponseNotFound({'error': 'No checks are tagged {0}.'.format(
+        ', '.join("'{0}'".format(tag) for tag in unknown))})
+
+
+def ndjson_status_response(checker, tags=None):
+    """Stream a line for each check as it finishes, then a summary line.
+
+    The status code has to be sent before the checks finish, so it's always
+    200. Clients read the overall status from the last line.
+    """
+    encode = get_encoder()
+
+    def lines():
+        results = {}
+        selected = select_checks(checker, tags)
+        for check_id, result in selected.iter_results():
+            results[check_id] = result
+            line = {'check_id': check_id}
+            line.update(selected.format_result(result))
+            yield encode(line) + b'\n'
+        ok = selected.assess_overall_status(results)
+        yield encode({'overall_status': 'ok' if ok else 'FAILED'}) + b'\n'
+
+    response = StreamingHttpResponse(
+        lines(), content_type=NDJSON_CONTENT_TYPES[0])
+    # Ask nginx not to hold back lines until the response is complete.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def can_profile(request):
+    """Whether the request may profile the checks: STATUS_PROFILING must be
+    set, and the request must come from a superuser, or carry
+    STATUS_PROFILE_TOKEN in an X-Status-Profile-Token header."""
+    if not getattr(settings, 'STATUS_PROFILING', False):
+        return False
+
+    token = getattr(settings, 'STATUS_PROFILE_TOKEN', None)
+    if token:
+        given = request.META.get('HTTP_X_STATUS_PROFILE_TOKEN', '')
+        if hmac.compare_digest(given.encode('utf-8'), token.encode('utf-8')):
+            return True
+
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_active and user.is_superuser)
+
+
+def wants_profile(request):
+    """Whether the request asks to profile the checks, with e.g.
+    `?profile=1`."""
+    return request.GET.get('profile', '').lower() in TRUE_VALUES
+
+
+def profiled_status_response(request, tags=None):
+    """Run the checks under a CheckProfiler, bypassing caches, and return
+    the status with its report under the 'profile' key.
+
+    The checks are those of the shared checker, but they're run by a
+    checker built for the request, so that the shared one is never
+    profiled. Its results aren't cached, nor recorded in the metrics or the
+    history, so profiling can't change the status served to others.
+    """
+    if not can_profile(request):
+        return JsonResponseForbidden({'error': 'Profiling is not allowed.'})
+
+    profiler = CheckProfiler(top=getattr(settings, 'STATUS_PROFILE_TOP', 20))
+    options = checker_registry.get_checker_options()
+    options.update(cache=None, single_flight=False, metrics=None,
+                   history=None, profiler=profiler)
+    checker = HealthChecker(checker_registry.get_checker().checks, **options)
+    try:
+        with profiler:
+            ok, details = select_checks(checker, tags)()
+    finally:
+        # Don't wait for timed out checks.
+        checker.shutdown(wait=False)
+
+    details = dict(details, profile=profiler.report())
+    response_class = JsonResponse if ok else JsonResponseServerError
+    response = response_class(details)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@require_http_methods(['GET'])
+def status(request, tags=None):
+    """Run the checks, or only those with any of `tags` (see get_tags()),
+    or return 404 if no check has some of them. Add `?profile=1` to profile
+    them (see profiled_status_response())."""
+    tags = get_tags(request, tags)
+    checker_registry.wait_for_warm_up()
+    checker = checker_registry.get_checker()
+    not_found = unknown_tags_response(checker, tags)
+    if not_found is not None:
+        return not_found
+
+    if wants_profile(request):
+        return profiled_status_response(request, tags)
+
+    if wants_ndjson(request):
+        return ndjson_status_response(checker, tags)
+
+    selected = select_checks(checker, tags)
+    ok, details = selected()
+    return status_response(ok, details, request, selected)
+
+
+@require_http_methods(['GET'])
+def metrics(request):
+    return HttpResponse(
+        metrics_registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@require_http_methods(['GET'])
+def history(request):
+    """Statistics of the last runs of each check. Add `?runs` for the runs
+    themselves."""
+    check_history = get_history()
+    if check_history is None:
+        raise Http404('STATUS_HISTORY_SIZE is not set.')
+    return JsonResponse(
+        check_history.as_dict(include_runs='runs' in request.GET))
@@ -0,0 +1,214 @@
+"""Status of a fleet of instances, from their status endpoints.
+
+From the command line:
+
+    python -m healthcheck.fleet http://web1/status/ http://web2/status/
+    healthcheck-fleet --file nodes.txt --min-ready 90
+"""
+import argparse
+import json
+import sys
+
+from healthcheck.network import HTTPHealthCheck
+
+# Threads polling nodes, unless max_workers says otherwise.
+DEFAULT_MAX_WORKERS = 32
+
+
+class FleetHealthCheck(HTTPHealthCheck):
+    """Polls the status endpoints of many instances, and fails unless enough
+    of them are ready.
+
+    Usage:
+
+        FleetHealthCheck(['http://web1/status/', 'http://web2/status/'],
+                         min_ready_percent=90)
+
+    A node is ready if its status endpoint answers 200 with the JSON output
+    of a HealthChecker, such as the Django app's status view. Nodes are
+    polled concurrently, over connections which are kept alive for the next
+    runs, within connect_timeout and read_timeout (see HTTPHealthCheck).
+
+    The details show each node, and how each check fares across nodes:
+
+        {"ready_percent": 50.0,
+         "nodes": {
+            "http://web1/status/": {"status": "ok", "http_status": 200,
+                                    "latency_ms": 3.1,
+                                    "checks": {"db": "ok"}},
+            "http://web2/status/": {"status": "FAILED", "http_status": 500,
+                                    "latency_ms": 2.7,
+                                    "checks": {"db": "FAILED"}}},
+         "checks": {"db": {"ok": 1, "failed": 1,
+                           "failed_nodes": ["http://web2/status/"]}}}
+    """
+
+    check_id = 'Fleet Health Check'
+
+    def __init__(self, items=None, min_ready_percent=100, max_workers=None,
+                 **kwargs):
+        """Possible arguments, besides HTTPHealthCheck's:
+
+            - items: URLs of the status endpoints of the nodes.
+            - min_ready_percent: percentage of nodes which must be ready for
+                the check to succeed.
+            - max_workers: number of nodes polled at once. Defaults to the
+                number of nodes, up to DEFAULT_MAX_WORKERS.
+        """
+        if max_workers is None and items:
+            max_workers = min(len(items), DEFAULT_MAX_WORKERS)
+        super(FleetHealthCheck, self).__init__(
+            items=items, max_workers=max_workers, **kwargs)
+        self.min_ready_percent = min_ready_percent
+
+    def run(self):
+        result = super(FleetHealthCheck, self).run()
+        ok, details = summarize(result.details, self.min_ready_percent)
+        return self.report(ok, details, item_durations=result.item_durations)
+
+    def check_response(self, url, response, body):
+        node_ok, details = super(FleetHealthCheck, self).check_response(
+            url, response, body)
+        try:
+            status = json.loads(body.decode('utf-8'))
+        except ValueError:
+            details['details'] = 'invalid JSON status'
+            return False, details
+
+        checks = {}
+        # A node without checks answers with a message instead.
+        if isinstance(status, dict):
+            for check_id, check in status.items():
+                if isinstance(check, dict):
+                    checks[check_id] = check.get('status')
+        details['checks'] = checks
+        return node_ok, details
+
+
+def summarize(nodes, min_ready_percent=100):
+    """Merge the details of nodes polled by FleetHealthCheck, by URL, into
+    the check's details. Return whether enough nodes are ready, and the
+    details."""
+    checks = {}
+    ready = 0
+    for url in sorted(nodes):
+        node = nodes[url]
+        if node['status'] == 'ok':
+            ready += 1
+        for check_id, status in node.get('checks', {}).items():
+            summary = checks.setdefault(
+                check_id, {'ok': 0, 'failed': 0, 'failed_nodes': []})
+            if status == 'ok':
+                summary['ok'] += 1
+            else:
+                summary['failed'] += 1
+                summary['failed_nodes'].append(url)
+
+    ready_percent = 100.0 * ready / len(nodes) if nodes else 100.0
+    details = {
+        'ready_percent': round(ready_percent, 2),
+        'nodes': nodes,
+        'checks': checks,
+    }
+    return ready * 100 >= min_ready_percent * len(nodes), details
+
+
+def format_summary(result):
+    """Return the CheckResult of a FleetHealthCheck as lines of text."""
+    if not isinstance(result.details, dict):
+        return [result.details]
+
+    nodes = result.details['nodes']
+    ready = sum(1 for node in nodes.values() if node['status'] == 'ok')
+    lines = ['{0}: {1} of {2} nodes ready ({3}%)'.format(
+        result.status, ready, len(nodes), result.details['ready_percent'])]
+
+    width = max(len(url) for url in nodes)
+    for url in sorted(nodes):
+        node = nodes[url]
+        notes = []
+        if 'http_status' in node:
+            notes.append('HTTP {0}'.format(node['http_status']))
+        failed_checks = sorted(
+            check_id for check_id, status in node.get('checks', {}).items()
+            if status != 'ok')
+        if failed_checks:
+            notes.append('failed: ' + ', '.join(failed_checks))
+        if 'details' in node:
+            notes.append(node['details'])
+        latency = node.get('latency_ms')
+        lines.append('  {0}  {1:<6}  {2:>10}  {3}'.format(
+            url.ljust(width), node['status'],
+            '-' if latency is None else '{0:.1f}ms'.format(latency),
+            '; '.join(notes)).rstrip())
+
+    checks = result.details['checks']
+    if checks:
+        lines.append('Checks:')
+    for check_id in sorted(checks):
+        summary = checks[check_id]
+        line = '  {0}: {1} ok, {2} failed'.format(
+            check_id, summary['ok'], summary['failed'])
+        if summary['failed_nodes']:
+            line += ' ({0})'.format(', '.join(summary['failed_nodes']))
+        lines.append(line)
+    return lines
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='healthcheck-fleet',
+        description='Poll the status endpoints of many instances, and '
+                    'summarize their health.')
+    parser.add_argument('urls', nargs='*', metavar='URL',
+                        help='status endpoint of a node')
+    parser.add_argument('-f', '--file', action='append', default=[],
+                        help='file listing URLs, one per line')
+    parser.add_argument('--min-ready', type=float, default=100,
+                        metavar='PERCENT',
+                        help='percentage of nodes which must be ready '
+                             '(default: %(default)s)')
+    parser.add_argument('--connect-timeout', type=float, default=2,
+                        metavar='SECONDS')
+    parser.add_argument('--read-timeout', type=float, default=5,
+                        metavar='SECONDS')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='nodes polled at once (default: up to {0})'
+                             .format(DEFAULT_MAX_WORKERS))
+    parser.add_argument('--json', action='store_true',
+                        help='print the whole result as JSON')
+    args = parser.parse_args(argv)
+
+    for path in args.file:
+        with open(path) as f:
+            args.urls.extend(line.strip() for line in f
+                             if line.strip() and not line.startswith('#'))
+    if not args.urls:
+        parser.error('no URLs given')
+    return args
+
+
+def main(argv=None):
+    """Entry point of healthcheck-fleet. Exits with status 0 if enough
+    nodes are ready, 1 otherwise."""
+    args = parse_args(argv)
+    check = FleetHealthCheck(
+        args.urls, min_ready_percent=args.min_ready,
+        max_workers=args.workers, connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout)
+    try:
+        result = check.execute()
+    finally:
+        check.shutdown()
+
+    if args.json:
+        sys.stdout.write(json.dumps(
+            result.as_dict(include_durations=True), indent=2,
+            sort_keys=True) + '\n')
+    else:
+        sys.stdout.write('\n'.join(format_summary(result)) + '\n')
+    return 0 if result.is_ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
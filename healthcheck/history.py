@@ -0,0 +1,233 @@
+import math
+import threading
+import time
+from array import array
+
+from healthcheck.checks import CheckResult
+
+_NAN = float('nan')
+
+# Statuses are stored as small integers.
+_STATUS_CODES = {CheckResult.OK: 0, CheckResult.FAILED: 1,
+                 CheckResult.SKIPPED: 2}
+_STATUSES = dict((code, status) for status, code in _STATUS_CODES.items())
+
+_PERCENTILES = (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))
+
+
+class HealthHistory(object):
+    """Keeps the last runs of each check, to tell a check which fails now
+    and then, or flaps, from one which is down.
+
+    Usage:
+
+        history = HealthHistory(size=100, fail_threshold=3, fail_window=5)
+        checker = HealthChecker(checks, history=history)
+        ...
+        history.describe('my check')
+
+    Like metrics, only actual runs of checks are recorded, results served
+    from a cache aren't. A run which times out is recorded as FAILED; if it
+    finishes later, its result is recorded too.
+
+    With fail_threshold, the overall status of the checker follows failure
+    rates instead of the latest results: a critical check counts as failed
+    while at least fail_threshold of its last fail_window runs failed. So a
+    single failure doesn't flip the status, and neither does a single
+    success after an outage.
+    """
+
+    def __init__(self, size=100, flapping_threshold=0.3, fail_threshold=None,
+                 fail_window=None):
+        """Possible arguments:
+
+            - size: number of runs to keep per check.
+            - flapping_threshold: fraction of runs changing the status of a
+                check (from ok to failed or back), above which the check is
+                flapping. At least min(size, 10) runs are needed to tell.
+            - fail_threshold: number of failed runs among the last
+                fail_window ones, which make a check count as failed. By
+                default, the latest result does.
+            - fail_window: number of runs fail_threshold is counted in.
+                Defaults to fail_threshold.
+        """
+        if fail_threshold is not None:
+            if fail_window is None:
+                fail_window = fail_threshold
+            if not 1 <= fail_threshold <= fail_window <= size:
+                raise ValueError(
+                    'fail_threshold and fail_window must satisfy 1 <= '
+                    'fail_threshold <= fail_window <= size, got {0}, {1} and '
+                    '{2}.'.format(fail_threshold, fail_window, size))
+        self.size = size
+        self.flapping_threshold = flapping_threshold
+        self.fail_threshold = fail_threshold
+        self.fail_window = fail_window
+        self._checks = {}
+        self._lock = threading.Lock()
+
+    def record(self, check_id, result, timestamp=None):
+        """Record a run of a check, which returned `result`, at the Unix time
+        `timestamp` (now by default). HealthChecker records a timed out run
+        once, as FAILED, and drops the result it returns later."""
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            runs = self._checks.get(check_id)
+            if runs is None:
+                runs = self._checks[check_id] = CheckHistory(self.size)
+            runs.append(result.status, result.duration, timestamp)
+
+    def is_failing(self, check_id, result):
+        """Whether a check whose latest result is `result` counts as failed
+        (see fail_threshold)."""
+        if self.fail_threshold is None:
+            return not result.is_ok
+        with self._lock:
+            runs = self._checks.get(check_id)
+            if runs is None or not len(runs):
+                return not result.is_ok
+            return runs.recent_failures(self.fail_window) >= (
+                self.fail_threshold)
+
+    def is_flapping(self, check_id):
+        with self._lock:
+            runs = self._checks.get(check_id)
+            return runs is not None and self._is_flapping(runs)
+
+    def describe(self, check_id, include_runs=False):
+        """Return statistics of the recorded runs of a check, or None if it
+        has none. With include_runs, also the runs themselves, oldest
+        first."""
+        with self._lock:
+            runs = self._checks.get(check_id)
+            if runs is None:
+                return None
+            return self._describe(runs, include_runs)
+
+    def as_dict(self, include_runs=False):
+        """Return statistics of all checks by check ID."""
+        with self._lock:
+            return dict((check_id, self._describe(runs, include_runs))
+                        for check_id, runs in self._checks.items())
+
+    def _is_flapping(self, runs):
+        if len(runs) < min(self.size, 10):
+            return False
+        return runs.status_changes >= self.flapping_threshold * (
+            len(runs) - 1)
+
+    def _describe(self, runs, include_runs):
+        description = {
+            'runs': len(runs),
+            'failures': runs.failures,
+            'failure_rate': round(runs.failure_rate, 4),
+            'status_changes': runs.status_changes,
+            'flapping': self._is_flapping(runs),
+            'duration_ms': dict(
+                (name, _to_ms(runs.duration_percentile(fraction)))
+                for name, fraction in _PERCENTILES),
+        }
+        if self.fail_threshold is not None:
+            description['recent_failures'] = runs.recent_failures(
+                self.fail_window)
+        if include_runs:
+            description['recent_runs'] = [
+                {'timestamp': timestamp, 'status': status,
+                 'duration_ms': _to_ms(duration)}
+                for timestamp, status, duration in runs.runs()]
+        return description
+
+
+def _to_ms(seconds):
+    if seconds is None:
+        return None
+    return round(seconds * 1000, 3)
+
+
+class CheckHistory(object):
+    """Ring buffer of the last `size` runs of a check, kept in flat arrays.
+
+    Appending is O(1), and so are the failure and status change counts,
+    which are updated as runs come in and drop out. It isn't thread-safe,
+    HealthHistory locks around it.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._timestamps = array('d', [0.0]) * size
+        # NaN when a result has no duration.
+        self._durations = array('d', [_NAN]) * size
+        self._statuses = array('b', [0]) * size
+        self._next = 0
+        self._count = 0
+        self.failures = 0
+        self.status_changes = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, status, duration, timestamp):
+        size = self.size
+        index = self._next
+        if self._count == size:
+            # Drop the oldest run, which is overwritten.
+            failed = self._statuses[index] != 0
+            if failed:
+                self.failures -= 1
+            if failed != (self._statuses[(index + 1) % size] != 0):
+                self.status_changes -= 1
+        else:
+            self._count += 1
+
+        code = _STATUS_CODES[status]
+        if self._count > 1 and (code != 0) != (
+                self._statuses[(index - 1) % size] != 0):
+            self.status_changes += 1
+        if code != 0:
+            self.failures += 1
+
+        self._timestamps[index] = timestamp
+        self._durations[index] = _NAN if duration is None else duration
+        self._statuses[index] = code
+        self._next = (index + 1) % size
+
+    @property
+    def failure_rate(self):
+        if not self._count:
+            return 0.0
+        return float(self.failures) / self._count
+
+    def recent_failures(self, count):
+        """Number of failures among the last `count` runs."""
+        statuses = self._statuses
+        return sum(1 for index in self._indexes(count) if statuses[index])
+
+    def duration_percentile(self, fraction):
+        """Nearest-rank percentile of the durations, in seconds, or None if
+        no run has one."""
+        durations = sorted(
+            duration for duration in (
+                self._durations[index] for index in self._indexes())
+            if duration == duration)  # NaN isn't equal to itself.
+        if not durations:
+            return None
+        rank = int(math.ceil(fraction * len(durations)))
+        return durations[min(max(rank, 1), len(durations)) - 1]
+
+    def runs(self):
+        """Return (timestamp, status, duration) of the runs, oldest first.
+        Duration is None when unknown."""
+        return [(self._timestamps[index],
+                 _STATUSES[self._statuses[index]],
+                 None if self._durations[index] != self._durations[index]
+                 else self._durations[index])
+                for index in self._indexes()]
+
+    def _indexes(self, count=None):
+        """Indexes of the last `count` runs (all by default), oldest
+        first."""
+        if count is None or count > self._count:
+            count = self._count
+        start = self._next - count
+        return [(start + offset) % self.size for offset in range(count)]
@@ -0,0 +1,179 @@
+import threading
+import time
+from bisect import bisect_left
+
+
+class MetricsRegistry(object):
+    """Collects statistics of check runs, and renders them in the Prometheus
+    text exposition format.
+
+    Usage:
+
+        metrics = MetricsRegistry()
+        checker = HealthChecker(checks, metrics=metrics)
+        ...
+        text = metrics.render()
+
+    Only actual runs of checks are recorded, results served from a cache
+    aren't.
+    """
+
+    DEFAULT_BUCKETS = (
+        0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+        10)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='healthcheck'):
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._checks = {}
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def observe(self, check_id, result):
+        """Record a run of a check, which returned `result`."""
+        with self._lock:
+            stats = self._checks.get(check_id)
+            if stats is None:
+                stats = self._checks[check_id] = _CheckStats(self.buckets)
+            stats.observe(result)
+
+            for item_id, duration in (result.item_durations or {}).items():
+                key = (check_id, item_id)
+                histogram = self._items.get(key)
+                if histogram is None:
+                    histogram = self._items[key] = _Histogram(self.buckets)
+                histogram.observe(duration)
+
+    def observe_timeout(self, check_id):
+        """Record that a check didn't finish in time, which counts as a
+        failed run. HealthChecker doesn't record the result the check returns
+        later."""
+        with self._lock:
+            stats = self._checks.get(check_id)
+            if stats is None:
+                stats = self._checks[check_id] = _CheckStats(self.buckets)
+            stats.observe_timeout()
+
+    def render(self):
+        """Return all metrics in the Prometheus text format."""
+        name = self.prefix + '_check_'
+        lines = []
+        with self._lock:
+            checks = sorted(self._checks.items())
+            items = sorted(self._items.items(), key=lambda item: (
+                item[0][0], str(item[0][1])))
+
+            lines.extend(_header(name + 'duration_seconds', 'histogram',
+                                 'Duration of health check runs.'))
+            for check_id, stats in checks:
+                lines.extend(stats.duration.render(
+                    name + 'duration_seconds', {'check': check_id}))
+
+            for metric, kind, description, value in (
+                    ('runs_total', 'counter', 'Health check runs.',
+                     lambda stats: stats.runs),
+                    ('failures_total', 'counter', 'Failed health check runs.',
+                     lambda stats: stats.failures),
+                    ('timeouts_total', 'counter',
+                     'Health checks which did not finish in time.',
+                     lambda stats: stats.timeouts),
+                    ('up', 'gauge',
+                     'Whether the last run of the health check succeeded.',
+                     lambda stats: stats.up),
+                    ('last_success_timestamp_seconds', 'gauge',
+                     'Unix time of the last successful health check run.',
+                     lambda stats: stats.last_success)):
+                lines.extend(_header(name + metric, kind, description))
+                for check_id, stats in checks:
+                    if value(stats) is not None:
+                        lines.append(_sample(
+                            name + metric, {'check': check_id},
+                            value(stats)))
+
+            item_name = self.prefix + '_item_duration_seconds'
+            lines.extend(_header(
+                item_name, 'histogram',
+                'Duration of checks of single items of list health checks.'))
+            for (check_id, item_id), histogram in items:
+                lines.extend(histogram.render(
+                    item_name, {'check': check_id, 'item': item_id}))
+
+        return '\n'.join(lines) + '\n'
+
+
+class _CheckStats(object):
+    def __init__(self, buckets):
+        self.duration = _Histogram(buckets)
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.up = None
+        self.last_success = None
+
+    def observe(self, result):
+        self.runs += 1
+        if result.duration is not None:
+            self.duration.observe(result.duration)
+        if result.is_ok:
+            self.up = 1
+            self.last_success = time.time()
+        else:
+            self.up = 0
+            self.failures += 1
+
+    def observe_timeout(self):
+        self.runs += 1
+        self.timeouts += 1
+        self.up = 0
+        self.failures += 1
+
+
+class _Histogram(object):
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(_sample(name + '_bucket', dict(
+                labels, le=_format_value(bound)), cumulative))
+        lines.append(_sample(name + '_bucket', dict(labels, le='+Inf'),
+                             self.count))
+        lines.append(_sample(name + '_sum', labels, self.sum))
+        lines.append(_sample(name + '_count', labels, self.count))
+        return lines
+
+
+def _header(name, kind, description):
+    return ['# HELP {0} {1}'.format(name, description),
+            '# TYPE {0} {1}'.format(name, kind)]
+
+
+def _sample(name, labels, value):
+    label_text = ','.join(
+        '{0}="{1}"'.format(key, _escape(labels[key]))
+        for key in sorted(labels))
+    return '{0}{{{1}}} {2}'.format(name, label_text, _format_value(value))
+
+
+def _escape(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
@@ -0,0 +1,274 @@
+import socket
+import threading
+
+try:
+    import http.client as http_client
+    from urllib.parse import urlsplit
+except ImportError:  # Python 2
+    import httplib as http_client
+    from urlparse import urlsplit
+
+from healthcheck.checks import ListHealthCheck
+from healthcheck.utils import monotonic
+
+
+class NetworkHealthCheck(ListHealthCheck):
+    """Base class of checks of network targets, which keeps idle
+    connections to each target for the next runs of the check.
+
+    Subclasses implement connect() and probe().
+    """
+
+    def __init__(self, items=None, connect_timeout=2, read_timeout=5,
+                 pool_size=2, **kwargs):
+        """Possible arguments, besides ListHealthCheck's:
+
+            - connect_timeout: seconds to wait for a connection.
+            - read_timeout: seconds to wait for each read of a response.
+            - pool_size: idle connections to keep per target.
+
+        Targets are checked concurrently, unless max_workers says otherwise.
+        """
+        if kwargs.get('max_workers') is None and items:
+            kwargs['max_workers'] = len(items)
+        super(NetworkHealthCheck, self).__init__(items=items, **kwargs)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = pool_size
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+
+    def check_item(self, target):
+        start = monotonic()
+        try:
+            item_ok, details = self._with_connection(target)
+        except (socket.error, http_client.HTTPException) as e:
+            item_ok = False
+            details = {'details': '{0}: {1}'.format(e.__class__.__name__, e)}
+        details['status'] = 'ok' if item_ok else 'FAILED'
+        details['latency_ms'] = round((monotonic() - start) * 1000, 3)
+        return item_ok, {self.item_id(target): details}
+
+    def check_item_timed_out(self, target, elapsed_ms):
+        return False, {self.item_id(target): {
+            'status': 'FAILED',
+            'details': 'timed out after {0}ms'.format(elapsed_ms)}}
+
+    def shutdown(self, wait=True):
+        """Shut down the thread pool, and close idle connections."""
+        super(NetworkHealthCheck, self).shutdown(wait=wait)
+        with self._pools_lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
+
+    def item_id(self, target):
+        return target
+
+    def pool_key(self, target):
+        """Targets with the same key share connections."""
+        return target
+
+    def connect(self, target):
+        """Return a new connection to `target`."""
+        raise ValueError(
+            'You must override "connect" method for check %s.' %
+            (self.__class__.__name__,)
+        )
+
+    def probe(self, connection, target):
+        """Check `target` over `connection`. Return whether it's ok, a dict
+        of details, and whether the connection can be reused."""
+        raise ValueError(
+            'You must override "probe" method for check %s.' %
+            (self.__class__.__name__,)
+        )
+
+    def _with_connection(self, target):
+        pool = self._get_pool(self.pool_key(target))
+        connection = pool.get()
+        if connection is not None:
+            try:
+                return self._probe(pool, connection, target)
+            except socket.timeout:
+                raise
+            except (socket.error, http_client.HTTPException):
+                # The target may have closed an idle connection, retry on a
+                # new one.
+                pass
+        return self._probe(pool, self.connect(target), target)
+
+    def _probe(self, pool, connection, target):
+        try:
+            item_ok, details, reusable = self.probe(connection, target)
+        except Exception:
+            connection.close()
+            raise
+        if reusable:
+            pool.put(connection)
+        else:
+            connection.close()
+        return item_ok, details
+
+    def _get_pool(self, key):
+        with self._pools_lock:
+            if key not in self._pools:
+                self._pools[key] = _ConnectionPool(self.pool_size)
+            return self._pools[key]
+
+
+class TCPHealthCheck(NetworkHealthCheck):
+    """Fails if at least one of the TCP targets doesn't accept connections.
+
+    Usage:
+
+        TCPHealthCheck(['redis:6379', ('memcached', 11211)])
+
+    By default, every run opens a new connection to each target, as that's
+    what is checked. With `send`, those bytes are sent on the connection,
+    which must be answered by bytes containing `expect` (or any bytes, if
+    not given), and connections are kept open and reused:
+
+        TCPHealthCheck(['redis:6379'], send=b'PING\\r\\n', expect=b'+PONG')
+    """
+
+    check_id = 'TCP Health Check'
+
+    def __init__(self, items=None, send=None, expect=None, **kwargs):
+        super(TCPHealthCheck, self).__init__(items=items, **kwargs)
+        self.send = send
+        self.expect = expect
+
+    def item_id(self, target):
+        return '{0}:{1}'.format(*self._address(target))
+
+    def pool_key(self, target):
+        return self._address(target)
+
+    def connect(self, target):
+        connection = socket.create_connection(
+            self._address(target), self.connect_timeout)
+        connection.settimeout(self.read_timeout)
+        return connection
+
+    def probe(self, connection, target):
+        if self.send is None:
+            return True, {}, False
+
+        connection.sendall(self.send)
+        response = b''
+        while True:
+            data = connection.recv(4096)
+            if not data:
+                return False, {'details': 'connection closed'}, False
+            response += data
+            if self.expect is None or self.expect in response:
+                return True, {}, True
+            if len(response) > 64 * 1024:
+                return False, {'details': 'unexpected response'}, False
+
+    def _address(self, target):
+        if isinstance(target, (tuple, list)):
+            host, port = target
+        else:
+            host, _, port = target.rpartition(':')
+        return host.strip('[]'), int(port)
+
+
+class HTTPHealthCheck(NetworkHealthCheck):
+    """Fails if at least one of the URLs doesn't answer a GET with an
+    expected status.
+
+    Usage:
+
+        HTTPHealthCheck(['http://users/status/', 'https://example.com/'])
+
+    Connections are kept alive, and reused by the next runs of the check.
+    """
+
+    check_id = 'HTTP Health Check'
+
+    def __init__(self, items=None, expected_statuses=None, headers=None,
+                 ssl_context=None, **kwargs):
+        """Possible arguments, besides NetworkHealthCheck's:
+
+            - expected_statuses: HTTP statuses meaning the target is ok.
+                Defaults to any status below 400.
+            - headers: dict of headers to send.
+            - ssl_context: ssl.SSLContext for HTTPS URLs. Defaults to
+                Python's, which verifies certificates.
+        """
+        super(HTTPHealthCheck, self).__init__(items=items, **kwargs)
+        for url in items or ():
+            if urlsplit(url).scheme not in ('http', 'https'):
+                raise ValueError('Unsupported URL: {0}'.format(url))
+        self.expected_statuses = expected_statuses
+        self.headers = headers or {}
+        self.ssl_context = ssl_context
+
+    def pool_key(self, url):
+        parts = urlsplit(url)
+        return parts.scheme, parts.netloc
+
+    def connect(self, url):
+        parts = urlsplit(url)
+        if parts.scheme == 'https':
+            connection = http_client.HTTPSConnection(
+                parts.netloc, timeout=self.connect_timeout,
+                context=self.ssl_context)
+        else:
+            connection = http_client.HTTPConnection(
+                parts.netloc, timeout=self.connect_timeout)
+        connection.connect()
+        connection.sock.settimeout(self.read_timeout)
+        return connection
+
+    def probe(self, connection, url):
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        connection.request('GET', path, headers=self.headers)
+        response = connection.getresponse()
+        # The whole body has to be read to reuse the connection.
+        body = response.read()
+        item_ok, details = self.check_response(url, response, body)
+        return item_ok, details, not response.will_close
+
+    def check_response(self, url, response, body):
+        """Return whether the response to the GET of `url` is ok, and a
+        dict of details. `body` is the content of the response."""
+        if self.expected_statuses is None:
+            item_ok = response.status < 400
+        else:
+            item_ok = response.status in self.expected_statuses
+        return item_ok, {'http_status': response.status}
+
+
+class _ConnectionPool(object):
+    """Idle connections to a target."""
+
+    def __init__(self, size):
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return None
+
+    def put(self, connection):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        with self._lock:
+            connections, self._idle = self._idle, []
+        for connection in connections:
+            connection.close()
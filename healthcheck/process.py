@@ -0,0 +1,183 @@
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+
+from healthcheck.checks import CheckResult
+from healthcheck.utils import monotonic
+
+logger = logging.getLogger(__name__)
+
+if hasattr(multiprocessing, 'get_context'):
+    # Workers must inherit the checks, which may not be picklable.
+    _multiprocessing = multiprocessing.get_context('fork')
+else:
+    _multiprocessing = multiprocessing
+
+
+class ProcessCheckPool(object):
+    """Runs checks in worker processes, so that a check which hangs, even
+    without releasing the GIL, can't freeze the calling process.
+
+    Usage:
+
+        pool = ProcessCheckPool([LibraryHealthCheck(timeout=2)])
+        result = pool.run(check)
+
+    HealthChecker makes one for the checks marked as isolated, see its
+    process_workers argument.
+
+    Workers are forked on first use, with a copy of the checks, and reused.
+    Only the check ID goes to a worker, and the CheckResult comes back
+    pickled, so its details must be picklable. A worker which doesn't answer
+    within the timeout is killed, and replaced on next use.
+
+    Workers are forked from the calling process, so this works on Unix only,
+    and checks shouldn't use connections opened before the fork.
+    """
+
+    def __init__(self, checks, max_workers=1, timeout=None):
+        """Possible arguments:
+
+            - checks: list of HealthCheck instances the workers can run.
+            - max_workers: number of worker processes. Runs wait for a free
+                worker beyond that.
+            - timeout: seconds after which a worker running a check without
+                a timeout of its own is killed. None means never.
+        """
+        self._checks = dict((check.check_id, check) for check in checks)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __contains__(self, check):
+        return self._checks.get(check.check_id) is check
+
+    def run(self, check, timeout=None):
+        """Run `check` in a worker and return its CheckResult. It's reported
+        as FAILED if it takes longer than `timeout`, which defaults to the
+        check's own timeout, then to the pool's."""
+        if check not in self:
+            raise ValueError(
+                'Check {0!r} is not in the pool.'.format(check.check_id))
+        if timeout is None:
+            timeout = check.timeout
+        if timeout is None:
+            timeout = self.timeout
+
+        with self._slots:
+            worker = self._get_worker()
+            start = monotonic()
+            try:
+                result = worker.run(check.check_id, timeout)
+            except _WorkerTimeout:
+                worker.kill()
+                elapsed = monotonic() - start
+                error = 'timed out after {0}ms, worker killed'.format(
+                    int(round(elapsed * 1000)))
+                return CheckResult(CheckResult.FAILED, error,
+                                   duration=elapsed, error=error)
+            except (EOFError, IOError, OSError) as e:
+                worker.kill()
+                error = 'worker process died: {0!r}'.format(e)
+                return CheckResult(CheckResult.FAILED, 'ERROR: ' + error,
+                                   duration=monotonic() - start, error=error)
+            self._release(worker)
+            return result
+
+    def shutdown(self):
+        """Stop all idle workers. Busy ones stop when they finish."""
+        with self._lock:
+            self._closed = True
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.stop()
+
+    def _get_worker(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('The pool is shut down.')
+            # Workers forked by another process (e.g. before a pre-fork
+            # server forked this one) aren't ours.
+            self._idle = [worker for worker in self._idle
+                          if worker.parent_pid == os.getpid()]
+            if self._idle:
+                return self._idle.pop()
+        return _Worker(self._checks)
+
+    def _release(self, worker):
+        with self._lock:
+            if not self._closed:
+                self._idle.append(worker)
+                return
+        worker.stop()
+
+
+class _WorkerTimeout(Exception):
+    pass
+
+
+class _Worker(object):
+    def __init__(self, checks):
+        self.parent_pid = os.getpid()
+        self._conn, child_conn = _multiprocessing.Pipe()
+        self._process = _multiprocessing.Process(
+            target=_serve, args=(child_conn, self._conn, checks),
+            name='healthcheck worker')
+        self._process.daemon = True
+        self._process.start()
+        child_conn.close()
+
+    def run(self, check_id, timeout):
+        self._conn.send(check_id)
+        if not self._conn.poll(timeout):
+            raise _WorkerTimeout()
+        return self._conn.recv()
+
+    def kill(self):
+        # SIGKILL, as a check holding the GIL never runs signal handlers.
+        try:
+            os.kill(self._process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self._process.join()
+        self._conn.close()
+
+    def stop(self):
+        try:
+            self._conn.send(None)
+        except (IOError, OSError):
+            pass
+        self._conn.close()
+        self._process.join(1)
+        if self._process.is_alive():
+            self.kill()
+
+
+def _serve(conn, parent_conn, checks):
+    """Main loop of a worker: run the checks the parent asks for, until it
+    sends None."""
+    parent_conn.close()
+    # Interrupting the parent shouldn't show tracebacks from every worker.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        try:
+            check_id = conn.recv()
+        except EOFError:
+            return
+        if check_id is None:
+            return
+        result = checks[check_id].timed_run()
+        try:
+            conn.send(result)
+        except Exception as e:
+            logger.exception('Can\'t send result of health check %r.',
+                             check_id)
+            error = 'result can\'t be sent: {0}: {1}'.format(
+                e.__class__.__name__, e)
+            conn.send(CheckResult(CheckResult.FAILED, 'ERROR: ' + error,
+                                  duration=result.duration, error=error))
@@ -0,0 +1,213 @@
+import cProfile
+import pstats
+import threading
+import time
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+from healthcheck.utils import monotonic
+
+if hasattr(time, 'thread_time'):
+    _cpu_time = time.thread_time
+else:  # Python < 3.7
+    _cpu_time = time.clock
+
+# Only one profiler may trace allocations at a time.
+_tracing_lock = threading.Lock()
+
+
+class CheckProfiler(object):
+    """Profiles runs of checks, to find out where a slow status spends its
+    time.
+
+    Usage:
+
+        profiler = CheckProfiler()
+        checker = HealthChecker(checks, profiler=profiler)
+        with profiler:
+            system_health_ok, details = checker()
+        profiler.report()
+
+    Each check runs under cProfile, and its wall and CPU time are measured.
+    Within the `with` block, allocations are traced with tracemalloc
+    (Python 3.4+), which makes the checks several times slower.
+
+    Each check is profiled in the thread it runs in, and no lock is held
+    while it runs, so concurrent checks don't wait for each other and their
+    timeouts mean the same as without a profiler. Allocations are traced for
+    the whole process though, so allocated_kb and peak_kb are only reported
+    for checks which didn't overlap with another one. Isolated checks run in
+    another process, and only the wait for them is seen here.
+    """
+
+    def __init__(self, top=20, trace_allocations=True):
+        """Possible arguments:
+
+            - top: number of functions and allocation sites to report.
+            - trace_allocations: whether to trace allocations.
+        """
+        self.top = top
+        self.trace_allocations = trace_allocations and tracemalloc is not None
+        self._checks = {}
+        self._stats = None
+        # Profiles of finished runs, merged into _stats by report().
+        self._profiles = []
+        self._running = set()
+        self._lock = threading.Lock()
+        self._tracing = False
+        self._started_tracing = False
+        self._start_snapshot = None
+        self._end_snapshot = None
+        self._traced_memory = None
+
+    def __enter__(self):
+        if self.trace_allocations:
+            _tracing_lock.acquire()
+            self._tracing = True
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+            self._start_snapshot = tracemalloc.take_snapshot()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self._tracing:
+            return
+        try:
+            with self._lock:
+                self._traced_memory = tracemalloc.get_traced_memory()
+                self._end_snapshot = tracemalloc.take_snapshot()
+                self._tracing = False
+            if self._started_tracing:
+                tracemalloc.stop()
+        finally:
+            _tracing_lock.release()
+
+    def run(self, check, execute):
+        """Return `execute(check)`, profiled."""
+        run = _ProfiledRun()
+        with self._lock:
+            # Allocations of overlapping runs can't be told apart.
+            run.overlapped = bool(self._running)
+            for other in self._running:
+                other.overlapped = True
+            self._running.add(run)
+            if self._tracing:
+                run.allocated_before = tracemalloc.get_traced_memory()[0]
+                if not run.overlapped and hasattr(tracemalloc, 'reset_peak'):
+                    tracemalloc.reset_peak()  # Python 3.9+
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler at a time, which sees
+            # the calls of all threads.
+            profile = None
+        start = monotonic()
+        cpu_start = _cpu_time()
+        try:
+            return execute(check)
+        finally:
+            measurements = {
+                'wall_ms': _to_ms(monotonic() - start),
+                'cpu_ms': _to_ms(_cpu_time() - cpu_start),
+            }
+            if profile is not None:
+                profile.disable()
+            self._finish(check, run, profile, measurements)
+
+    def _finish(self, check, run, profile, measurements):
+        with self._lock:
+            self._running.discard(run)
+            if (self._tracing and run.allocated_before is not None and
+                    not run.overlapped):
+                allocated, peak = tracemalloc.get_traced_memory()
+                measurements['allocated_kb'] = _to_kb(
+                    allocated - run.allocated_before)
+                if hasattr(tracemalloc, 'reset_peak'):
+                    measurements['peak_kb'] = _to_kb(
+                        peak - run.allocated_before)
+            self._checks[check.check_id] = measurements
+            if profile is not None:
+                self._profiles.append(profile)
+
+    def report(self):
+        """Return the measurements of each check, the functions which took
+        the most time (excluding time spent in the functions they called),
+        and allocation totals. Checks still running aren't included."""
+        with self._lock:
+            profiles, self._profiles = self._profiles, []
+            for profile in profiles:
+                self._add_stats(profile)
+            report = {
+                'checks': dict(self._checks),
+                'hotspots': self._hotspots(),
+            }
+            if self._end_snapshot is not None:
+                report['allocations'] = self._allocations()
+            return report
+
+    def _add_stats(self, profile):
+        profile.create_stats()
+        if not profile.stats:
+            return
+        if self._stats is None:
+            self._stats = pstats.Stats(profile)
+        else:
+            self._stats.add(profile)
+
+    def _hotspots(self):
+        if self._stats is None:
+            return []
+        functions = sorted(self._stats.stats.items(),
+                           key=lambda item: item[1][2], reverse=True)
+        hotspots = []
+        for (filename, line, name), stats in functions[:self.top]:
+            _, calls, own_time, cumulative_time, _ = stats
+            hotspots.append({
+                'function': pstats.func_std_string((filename, line, name)),
+                'calls': calls,
+                'own_ms': _to_ms(own_time),
+                'cumulative_ms': _to_ms(cumulative_time),
+            })
+        return hotspots
+
+    def _allocations(self):
+        current, peak = self._traced_memory
+        ignored = [tracemalloc.Filter(False, tracemalloc.__file__),
+                   tracemalloc.Filter(False, __file__)]
+        differences = self._end_snapshot.filter_traces(ignored).compare_to(
+            self._start_snapshot.filter_traces(ignored), 'lineno')
+        top = [{
+            'location': '{0}:{1}'.format(difference.traceback[0].filename,
+                                         difference.traceback[0].lineno),
+            'size_kb': _to_kb(difference.size_diff),
+            'count': difference.count_diff,
+        } for difference in differences[:self.top] if difference.size_diff]
+        return {
+            'retained_kb': _to_kb(sum(
+                difference.size_diff for difference in differences)),
+            'traced_kb': _to_kb(current),
+            'peak_kb': _to_kb(peak),
+            'top': top,
+        }
+
+
+class _ProfiledRun(object):
+    __slots__ = ('overlapped', 'allocated_before')
+
+    def __init__(self):
+        self.overlapped = False
+        self.allocated_before = None
+
+
+def _to_ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+def _to_kb(size):
+    return round(size / 1024.0, 1)
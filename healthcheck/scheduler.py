@@ -0,0 +1,254 @@
+import heapq
+import logging
+import random
+import threading
+
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from healthcheck.checks import CheckResult
+from healthcheck.utils import monotonic
+
+logger = logging.getLogger(__name__)
+
+
+class HealthCheckScheduler(object):
+    """Runs checks periodically in a background thread and keeps the latest
+    result of each one.
+
+    Usage:
+
+        scheduler = HealthCheckScheduler(checks, interval=10)
+        scheduler.start()
+        checker = HealthChecker(checks, cache=scheduler)
+
+        system_health_ok, details = checker()
+
+    Used as the cache of a HealthChecker, the scheduler returns the latest
+    result of each check instantly. A check which has no result yet (or isn't
+    scheduled) is run by the checker as usual.
+
+    Each check runs every check.interval seconds, or every `interval` seconds
+    if it doesn't set one. Every wait is randomly stretched or shrunk by up to
+    `jitter` (a fraction of the interval), so that checks and processes
+    started together don't all hit a dependency at the same moment.
+
+    A check which doesn't finish within its timeout gets a FAILED "timed out"
+    result, and isn't run again until it returns. A result older than
+    `max_age` is served as FAILED, so a check which hangs, or a scheduler
+    which stopped, can't leave an old ok result in place.
+    """
+
+    def __init__(self, checks, interval=10, jitter=0.1, executor=None,
+                 metrics=None, history=None, max_workers=None,
+                 max_age=None):
+        """Possible arguments:
+
+            - checks: list of HealthCheck instances to run.
+            - interval: default seconds between runs of a check.
+            - jitter: fraction of the interval to randomize waits by.
+            - executor: a concurrent.futures.Executor to run checks in. The
+                scheduler never shuts it down.
+            - max_workers: if set, and no executor is given, checks run in a
+                thread pool of this size, owned by the scheduler. By default
+                checks run one by one in the scheduler's thread, so a slow
+                check delays the others (by up to its timeout, if it has
+                one).
+            - metrics: a MetricsRegistry to record check runs in.
+            - history: a HealthHistory to record check runs in.
+            - max_age: seconds the latest result of a check is served for.
+                Defaults to three intervals of the check, plus its timeout.
+        """
+        self.checks = checks
+        self.interval = interval
+        self.jitter = jitter
+        self.max_age = max_age
+        self._executor = executor
+        self._max_workers = max_workers
+        self._owned_executor = None
+        # Runs checks with a timeout, while the caller waits for them.
+        self._timeout_executor = None
+        self._executor_lock = threading.Lock()
+        self._metrics = metrics
+        self._history = history
+        self._scheduled_ids = frozenset(check.check_id for check in checks)
+        # (CheckResult, time it was kept) by check ID.
+        self._results = {}
+        self._running = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def interval_for(self, check):
+        return self.interval if check.interval is None else check.interval
+
+    def next_delay(self, check):
+        """Seconds to wait before the next run of `check`."""
+        interval = self.interval_for(check)
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def max_age_for(self, check):
+        if self.max_age is not None:
+            return self.max_age
+        return 3 * self.interval_for(check) + (check.timeout or 0)
+
+    def start(self):
+        """Start running checks in a daemon thread."""
+        if self._thread is not None:
+            raise RuntimeError('The scheduler is already started.')
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name='healthcheck scheduler')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._executor_lock:
+            # Don't wait for hung checks, they finish in the background.
+            for executor in (self._owned_executor, self._timeout_executor):
+                if executor is not None:
+                    executor.shutdown(wait=False)
+            self._owned_executor = self._timeout_executor = None
+
+    def snapshot(self):
+        """Return the latest CheckResults by check ID, those of scheduled
+        checks older than their max age replaced by FAILED ones."""
+        checks_by_id = dict((check.check_id, check) for check in self.checks)
+        with self._lock:
+            results = dict(self._results)
+        now = monotonic()
+        snapshot = {}
+        for check_id, (result, kept) in results.items():
+            check = checks_by_id.get(check_id)
+            if check is not None and self._is_stale(check, kept, now):
+                result = self._stale(now - kept)
+            snapshot[check_id] = result
+        return snapshot
+
+    def fetch(self, check, run):
+        """Return the latest result of `check`, running it with `run(check)`
+        if there is none yet. This makes the scheduler usable as the cache of
+        a HealthChecker.
+
+        A result older than the check's max age is returned as FAILED, or
+        run again if the check isn't scheduled."""
+        with self._lock:
+            result, kept = self._results.get(check.check_id, (None, None))
+        if result is not None:
+            now = monotonic()
+            if not self._is_stale(check, kept, now):
+                return result
+            if check.check_id in self._scheduled_ids:
+                return self._stale(now - kept)
+        result = run(check)
+        self._store(check, result)
+        return result
+
+    def run_check(self, check):
+        """Run `check` now and keep its result.
+
+        If it has a timeout, the check runs in a thread of the scheduler,
+        which waits for it for that long at most."""
+        with self._lock:
+            if check.check_id in self._running:
+                # Still running since the previous time it was due.
+                return
+            self._running.add(check.check_id)
+        if check.timeout is None:
+            try:
+                self._record(check, check.execute())
+            finally:
+                self._done_running(check)
+            return
+
+        start = monotonic()
+        future = self._get_timeout_executor().submit(check.execute)
+        # A timed out check isn't run again until it returns.
+        future.add_done_callback(lambda future: self._done_running(check))
+        try:
+            result = future.result(check.timeout)
+        except TimeoutError:
+            self._record_timeout(check, start)
+        else:
+            self._record(check, result)
+
+    def _done_running(self, check):
+        with self._lock:
+            self._running.discard(check.check_id)
+
+    def _is_stale(self, check, kept, now):
+        return now - kept > self.max_age_for(check)
+
+    def _stale(self, age):
+        error = 'no result for {0}ms'.format(int(round(age * 1000)))
+        return CheckResult(CheckResult.FAILED, 'stale, ' + error, error=error)
+
+    def _store(self, check, result):
+        with self._lock:
+            self._results[check.check_id] = (result, monotonic())
+
+    def _record(self, check, result):
+        """Keep the result of a scheduled run."""
+        if self._metrics is not None:
+            self._metrics.observe(check.check_id, result)
+        if self._history is not None:
+            self._history.record(check.check_id, result)
+        self._store(check, result)
+
+    def _record_timeout(self, check, start):
+        elapsed = monotonic() - start
+        error = 'timed out after {0}ms'.format(int(round(elapsed * 1000)))
+        result = CheckResult(CheckResult.FAILED, error, duration=elapsed,
+                             error=error)
+        if self._metrics is not None:
+            self._metrics.observe_timeout(check.check_id)
+        if self._history is not None:
+            self._history.record(check.check_id, result)
+        self._store(check, result)
+
+    def _get_executor(self):
+        if self._executor is not None or not self._max_workers:
+            return self._executor
+        with self._executor_lock:
+            if self._owned_executor is None:
+                self._owned_executor = ThreadPoolExecutor(self._max_workers)
+            return self._owned_executor
+
+    def _get_timeout_executor(self):
+        with self._executor_lock:
+            if self._timeout_executor is None:
+                # A check runs once at a time, so runs never queue.
+                self._timeout_executor = ThreadPoolExecutor(
+                    max(len(self.checks), 1))
+            return self._timeout_executor
+
+    def _loop(self):
+        now = monotonic()
+        queue = []
+        for index, check in enumerate(self.checks):
+            # Spread the first runs, to avoid a burst on startup.
+            first_delay = random.uniform(
+                0, self.interval_for(check) * self.jitter)
+            queue.append((now + first_delay, index, check))
+        heapq.heapify(queue)
+
+        while queue and not self._stopped.is_set():
+            due, index, check = queue[0]
+            if self._stopped.wait(max(due - monotonic(), 0)):
+                break
+            heapq.heapreplace(
+                queue, (monotonic() + self.next_delay(check), index, check))
+            executor = self._get_executor()
+            if executor is None:
+                self._run_logging_errors(check)
+            else:
+                executor.submit(self._run_logging_errors, check)
+
+    def _run_logging_errors(self, check):
+        try:
+            self.run_check(check)
+        except Exception:
+            logger.exception('Scheduled run of %r failed.', check.check_id)
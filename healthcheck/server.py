@@ -0,0 +1,153 @@
+"""Standalone HTTP server for the status of a HealthChecker.
+
+From the command line:
+
+    python -m healthcheck.server myapp.health:checker --port 8001
+    healthcheck-server myapp.health:checks --host 0.0.0.0
+"""
+import argparse
+import importlib
+import logging
+import os
+import sys
+import threading
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+try:
+    from socketserver import ThreadingMixIn
+except ImportError:  # Python 2
+    from SocketServer import ThreadingMixIn
+
+from healthcheck.checks import HealthChecker
+from healthcheck.wsgi import StatusApp
+
+logger = logging.getLogger(__name__)
+
+
+class StatusServer(object):
+    """Serves a StatusApp on its own port, from a daemon thread, so that
+    probes don't go through the application's request pipeline, and are
+    answered even when all of its workers are busy.
+
+    Usage:
+
+        server = StatusServer(checker, port=8001)
+        server.start()
+        ...
+        server.stop()
+
+    Each request is handled in its own thread. Use a checker with
+    single_flight, or a cache, to keep a burst of probes from running the
+    checks many times over.
+    """
+
+    def __init__(self, checker, host='127.0.0.1', port=8001, routes=None,
+                 encoder=None):
+        """Possible arguments:
+
+            - checker: the HealthChecker to run.
+            - host: address to listen on.
+            - port: port to listen on. 0 picks a free one, see .port.
+            - routes, encoder: see StatusApp.
+        """
+        kwargs = {'routes': routes}
+        if encoder is not None:
+            kwargs['encoder'] = encoder
+        self.app = StatusApp(checker, **kwargs)
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Listen on the port, and serve requests in a daemon thread."""
+        if self._thread is not None:
+            raise RuntimeError('The server is already started.')
+        self._server = self._make_server()
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.1},
+            name='healthcheck server')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Listen on the port, and serve requests in this thread."""
+        self._server = self._make_server()
+        logger.info('Serving health checks on http://%s:%s/', self.host,
+                    self.port)
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._thread = None
+
+    def _make_server(self):
+        server = _ThreadingWSGIServer((self.host, self.port), _RequestHandler)
+        server.set_app(self.app)
+        self.port = server.server_address[1]
+        return server
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _RequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        # Probes come every few seconds, don't log each one to stderr.
+        logger.debug(format, *args)
+
+
+def load_checker(path):
+    """Import a HealthChecker, or a list of checks, given as
+    'module:attribute'."""
+    module_name, _, attribute = path.partition(':')
+    if not attribute:
+        raise ValueError(
+            'Expected module:attribute, got {0!r}.'.format(path))
+    target = getattr(importlib.import_module(module_name), attribute)
+    if isinstance(target, HealthChecker):
+        return target
+    return HealthChecker(list(target))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='healthcheck-server',
+        description='Serve the status of health checks over HTTP.')
+    parser.add_argument(
+        'checker', metavar='MODULE:ATTRIBUTE',
+        help='a HealthChecker, or a list of checks, to serve')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='address to listen on (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=8001,
+                        help='port to listen on (default: %(default)s)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    # Like python -m, find the modules of the current directory.
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    checker = load_checker(args.checker)
+    server = StatusServer(checker, host=args.host, port=args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        checker.shutdown(wait=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from contextlib import contextmanager
+
+from healthcheck.cache import ResultCache
+from healthcheck.checks import CheckResult
+
+logger = logging.getLogger(__name__)
+
+# The file starts with the length of the JSON document stored after it.
+_HEADER = struct.Struct('<Q')
+
+
+class SharedResultCache(ResultCache):
+    """ResultCache kept in a memory-mapped file, which all processes on a
+    host share.
+
+    Usage, e.g. in every gunicorn worker:
+
+        cache = SharedResultCache('/run/myapp/healthcheck', ttl=10)
+        checker = HealthChecker(checks, cache=cache)
+
+    When a result expires, the first process to notice takes a lease on it
+    and runs the check. The others keep returning the expired result until
+    the new one is stored, or until the lease runs out (e.g. because that
+    process died). So a host runs each check about once per TTL, whatever
+    the number of workers.
+
+    The file is locked with flock(), so this works on Unix only. Check
+    details must be JSON serializable, as they are for the status views.
+    """
+
+    def __init__(self, path, ttl, failed_ttl=None,
+                 stale_while_revalidate=False, size=1024 * 1024,
+                 lease_time=30):
+        """Possible arguments:
+
+            - path: the file to keep results in. It's created if missing.
+            - ttl, failed_ttl, stale_while_revalidate: see ResultCache.
+            - size: bytes to map. Results which don't fit aren't shared.
+            - lease_time: seconds other processes wait for a refresh
+                before running the check themselves.
+        """
+        super(SharedResultCache, self).__init__(
+            ttl, failed_ttl=failed_ttl,
+            stale_while_revalidate=stale_while_revalidate)
+        self.path = path
+        self.size = size
+        self.lease_time = lease_time
+        self._fd = None
+        self._map = None
+        self._pid = None
+
+    def clear(self):
+        with self._locked(fcntl.LOCK_EX):
+            self._write({'results': {}, 'leases': {}})
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _now(self):
+        # Processes don't share monotonic clocks everywhere.
+        return time.time()
+
+    def _lookup(self, check):
+        with self._locked(fcntl.LOCK_SH):
+            entry = self._read()['results'].get(check.check_id)
+        if entry is None:
+            return None, False
+        result = CheckResult(entry['status'], entry['details'],
+                             duration=entry['duration'], error=entry['error'],
+                             item_durations=entry.get('item_durations'),
+                             circuit_breaker=entry.get('circuit_breaker'))
+        return result, self._now() < entry['expires']
+
+    def _claim(self, check):
+        with self._locked(fcntl.LOCK_EX):
+            data = self._read()
+            lease = data['leases'].get(check.check_id)
+            now = self._now()
+            if lease is not None and lease[1] > now:
+                return False
+            data['leases'][check.check_id] = [
+                os.getpid(), now + self.lease_time]
+            self._write(data)
+            return True
+
+    def _release(self, check):
+        with self._locked(fcntl.LOCK_EX):
+            data = self._read()
+            lease = data['leases'].get(check.check_id)
+            # The lease may have run out and been taken by another process.
+            if lease is not None and lease[0] == os.getpid():
+                del data['leases'][check.check_id]
+                self._write(data)
+
+    def _store(self, check, result, expires_at):
+        with self._locked(fcntl.LOCK_EX):
+            data = self._read()
+            data['results'][check.check_id] = {
+                'status': result.status,
+                'details': result.details,
+                'duration': result.duration,
+                'error': result.error,
+                'item_durations': result.item_durations,
+                'circuit_breaker': result.circuit_breaker,
+                'expires': expires_at,
+            }
+            self._write(data)
+
+    @contextmanager
+    def _locked(self, operation):
+        with self._lock:
+            self._open()
+            fcntl.flock(self._fd, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _open(self):
+        # flock() locks are shared by file descriptors inherited over fork(),
+        # so every process needs its own.
+        if self._pid == os.getpid():
+            return
+        self._close()
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_size < self.size:
+                    os.ftruncate(fd, self.size)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._map = mmap.mmap(fd, self.size)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._pid = os.getpid()
+
+    def _close(self):
+        if self._map is not None:
+            self._map.close()
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = None
+        self._map = None
+        self._pid = None
+
+    def _read(self):
+        length, = _HEADER.unpack_from(self._map, 0)
+        if length:
+            start = _HEADER.size
+            try:
+                return json.loads(
+                    self._map[start:start + length].decode('utf-8'))
+            except ValueError:
+                logger.warning('Ignoring corrupt health check results in %s.',
+                               self.path)
+        return {'results': {}, 'leases': {}}
+
+    def _write(self, data):
+        try:
+            payload = json.dumps(data).encode('utf-8')
+        except (TypeError, ValueError) as e:
+            logger.warning('Can\'t share health check results: %s', e)
+            return
+        start = _HEADER.size
+        if start + len(payload) > self.size:
+            logger.warning('Health check results don\'t fit in %s (%d bytes), '
+                           'not sharing them.', self.path, self.size)
+            return
+        self._map[start:start + len(payload)] = payload
+        _HEADER.pack_into(self._map, 0, len(payload))
@@ -1,5 +1,9 @@
 import errno
 import os
+import time
+
+# Python 2 has no monotonic clock in the standard library.
+monotonic = getattr(time, 'monotonic', time.time)
 
 
 def file_exists(path):
@@ -0,0 +1,272 @@
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+
+from healthcheck.utils import file_exists, monotonic
+
+logger = logging.getLogger(__name__)
+
+# From <sys/inotify.h>.
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+_WATCH_MASK = (IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+               IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class PathWatcher(object):
+    """Keeps track of whether paths exist, so that checking one is a dict
+    lookup instead of a stat() call, which can stall on network mounts.
+
+    Usage:
+
+        watcher = PathWatcher()
+        watcher.watch('/etc/yola/quiesce')
+        watcher.start()
+        ...
+        watcher.exists('/etc/yola/quiesce')
+
+    On Linux, the parent directories of the paths are watched with inotify,
+    so local changes are seen within milliseconds. All paths are also polled
+    every poll_interval seconds, in the watcher's daemon thread: inotify
+    doesn't see changes made by other clients of NFS and other network
+    filesystems, nor can it follow paths whose parent directory doesn't
+    exist, and it isn't available elsewhere.
+    """
+
+    def __init__(self, poll_interval=1.0, use_inotify=True):
+        self.poll_interval = poll_interval
+        self._states = {}
+        self._lock = threading.Lock()
+        self._inotify = None
+        if use_inotify and sys.platform.startswith('linux'):
+            try:
+                self._inotify = _Inotify()
+            except OSError as e:
+                logger.warning('Can\'t use inotify, polling paths instead: '
+                               '%s', e)
+        self._watched_dirs = {}  # Directory path by inotify watch descriptor.
+        self._dirs_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def uses_inotify(self):
+        return self._inotify is not None
+
+    def watch(self, path):
+        """Start tracking `path`."""
+        with self._lock:
+            if path in self._states:
+                return
+            self._states[path] = None
+        self._watch_directory(os.path.dirname(os.path.abspath(path)))
+        # Stat after adding the watch, so that no change is missed.
+        self._update(path)
+
+    def exists(self, path):
+        """Return whether `path` exists, like healthcheck.utils.file_exists,
+        and start tracking it if it isn't yet."""
+        with self._lock:
+            state = self._states.get(path)
+        if state is None:
+            self.watch(path)
+            with self._lock:
+                state = self._states[path]
+            if state is None:
+                # Another thread is adding the path right now.
+                return file_exists(path)
+        if isinstance(state, OSError):
+            raise state
+        return state
+
+    def start(self):
+        """Start following changes in a daemon thread."""
+        if self._thread is not None:
+            raise RuntimeError('The watcher is already started.')
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name='healthcheck path watcher')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._inotify is not None:
+            self._inotify.wake_up()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._dirs_lock:
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+                self._watched_dirs.clear()
+
+    def _loop(self):
+        next_poll = monotonic() + self.poll_interval
+        while not self._stopped.is_set():
+            if self._inotify is None:
+                self._stopped.wait(self.poll_interval)
+                self._update_all(self._tracked_paths())
+                continue
+
+            events = self._inotify.read_events(
+                max(next_poll - monotonic(), 0))
+            if events:
+                self._handle_events(events)
+            if monotonic() >= next_poll:
+                self._poll()
+                next_poll = monotonic() + self.poll_interval
+
+    def _handle_events(self, events):
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                self._update_all(self._tracked_paths())
+                continue
+            with self._dirs_lock:
+                directory = self._watched_dirs.get(wd)
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                    self._watched_dirs.pop(wd, None)
+            if directory is None:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                self._update_all(self._paths_in(directory))
+            else:
+                self._update_all(
+                    [path for path in self._paths_in(directory)
+                     if os.path.basename(path) == name])
+
+    def _poll(self):
+        """Retry watching the directories inotify doesn't follow, and update
+        all paths, including watched ones, whose changes inotify misses on
+        network filesystems."""
+        with self._dirs_lock:
+            watched = set(self._watched_dirs.values())
+        paths = self._tracked_paths()
+        for path in paths:
+            directory = os.path.dirname(os.path.abspath(path))
+            if directory not in watched and self._watch_directory(directory):
+                watched.add(directory)
+        self._update_all(paths)
+
+    def _tracked_paths(self):
+        with self._lock:
+            return list(self._states)
+
+    def _paths_in(self, directory):
+        return [path for path in self._tracked_paths()
+                if os.path.dirname(os.path.abspath(path)) == directory]
+
+    def _watch_directory(self, directory):
+        with self._dirs_lock:
+            if self._inotify is None:
+                return False
+            if directory in self._watched_dirs.values():
+                return True
+            try:
+                wd = self._inotify.add_watch(directory, _WATCH_MASK)
+            except OSError:
+                # Missing or unreadable directory: poll its paths.
+                return False
+            self._watched_dirs[wd] = directory
+            return True
+
+    def _update_all(self, paths):
+        for path in paths:
+            self._update(path)
+
+    def _update(self, path):
+        try:
+            state = file_exists(path)
+        except OSError as e:
+            state = e
+        with self._lock:
+            self._states[path] = state
+
+
+class _Inotify(object):
+    """Minimal ctypes binding of the Linux inotify API."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise()
+        # Writing to this pipe interrupts read_events().
+        self._wake_up_read, self._wake_up_write = os.pipe()
+
+    def add_watch(self, path, mask):
+        wd = self._libc.inotify_add_watch(
+            self.fd, path.encode(sys.getfilesystemencoding()), mask)
+        if wd < 0:
+            self._raise(path)
+        return wd
+
+    def read_events(self, timeout):
+        """Return a list of (wd, mask, name) events, or None if there were
+        none within `timeout` seconds."""
+        readable, _, _ = select.select(
+            [self.fd, self._wake_up_read], [], [], timeout)
+        if self.fd not in readable:
+            return None
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return []
+            raise
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            events.append(
+                (wd, mask, name.decode(sys.getfilesystemencoding())))
+        return events
+
+    def wake_up(self):
+        os.write(self._wake_up_write, b'\0')
+
+    def close(self):
+        for fd in (self.fd, self._wake_up_read, self._wake_up_write):
+            os.close(fd)
+
+    def _raise(self, path=None):
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error), path)
+
+
+_default_watcher = None
+_default_watcher_lock = threading.Lock()
+
+
+def get_default_watcher():
+    """Return a started PathWatcher shared by the whole process."""
+    global _default_watcher
+    with _default_watcher_lock:
+        if _default_watcher is None:
+            _default_watcher = PathWatcher()
+            _default_watcher.start()
+        return _default_watcher
@@ -0,0 +1,127 @@
+"""WSGI application serving the status of a HealthChecker, without any web
+framework."""
+import json
+
+try:
+    from urllib.parse import parse_qs
+except ImportError:  # Python 2
+    from urlparse import parse_qs
+
+# Checks run by each path: all of them, or those with any of the tags.
+DEFAULT_ROUTES = {
+    '/': None,
+    '/live': ('live',),
+    '/ready': ('ready',),
+}
+
+_REASONS = {
+    200: 'OK',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error',
+}
+
+
+def json_encoder(data):
+    return json.dumps(data).encode('utf-8')
+
+
+class StatusApp(object):
+    """WSGI application answering GET requests with the status of a
+    HealthChecker, like the Django app's status view: the JSON details of
+    the checks, with status 200 if the system is healthy, 500 otherwise.
+
+    Usage:
+
+        application = StatusApp(HealthChecker(checks))
+
+    By default, / runs all checks, /live those tagged 'live' and /ready those
+    tagged 'ready'. A `tags` query parameter (comma separated) picks other
+    tags. Tags no check has get 404. See healthcheck.server to serve it on
+    its own port.
+    """
+
+    def __init__(self, checker, routes=None, encoder=json_encoder):
+        """Possible arguments:
+
+            - checker: the HealthChecker to run.
+            - routes: dict of the tags of the checks to run by path, None
+                meaning all checks. Defaults to DEFAULT_ROUTES.
+            - encoder: function turning the details into bytes of JSON.
+        """
+        self.checker = checker
+        self.routes = DEFAULT_ROUTES if routes is None else routes
+        self.encoder = encoder
+
+    def __call__(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        path = environ.get('PATH_INFO') or '/'
+        query_string = environ.get('QUERY_STRING', '')
+        response = self.check_request(method, path, query_string)
+        if response is None:
+            selected = self.select_checker(path, query_string)
+            response = self.status_response(*selected())
+
+        status, headers, body = response
+        start_response('{0} {1}'.format(status, _REASONS[status]), headers)
+        if method == 'HEAD':
+            return [b'']
+        return [body]
+
+    def check_request(self, method, path, query_string=''):
+        """Return the response to a request which can't be answered with the
+        status, or None."""
+        if method not in ('GET', 'HEAD'):
+            return self.error_response(
+                405, 'Method not allowed.', [('Allow', 'GET, HEAD')])
+        if self._normalize(path) not in self.routes:
+            return self.error_response(404, 'Not found.')
+
+        # So that a typo in a probe's URL doesn't pass as healthy.
+        unknown = sorted(set(self.get_tags(path, query_string) or ()) -
+                         set(self.checker.tags))
+        if unknown:
+            return self.error_response(404, 'No checks are tagged {0}.'.format(
+                ', '.join("'{0}'".format(tag) for tag in unknown)))
+        return None
+
+    def get_tags(self, path, query_string):
+        """Return the tags of the checks to run at `path`, None meaning all
+        checks."""
+        tags = self.routes[self._normalize(path)]
+        query = parse_qs(query_string)
+        if 'tags' in query:
+            tags = [tag.strip() for tag in query['tags'][-1].split(',')
+                    if tag.strip()]
+        return tags
+
+    def select_checker(self, path, query_string):
+        """Return the checker for the checks to run at `path`."""
+        tags = self.get_tags(path, query_string)
+        if tags is None:
+            return self.checker
+        return self.checker.for_tags(tags)
+
+    def status_response(self, ok, details):
+        """Return (HTTP status, headers, body) of the status."""
+        if ok and not details:
+            details = 'There were no checks.'
+        return self._json_response(200 if ok else 500, details)
+
+    def error_response(self, status, message, headers=()):
+        status, json_headers, body = self._json_response(
+            status, {'error': message})
+        return status, json_headers + list(headers), body
+
+    def _json_response(self, status, data):
+        body = self.encoder(data)
+        return status, [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(body))),
+            ('Cache-Control', 'no-store'),
+        ], body
+
+    def _normalize(self, path):
+        if path != '/':
+            path = path.rstrip('/')
+        return path
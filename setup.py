@@ -13,7 +13,18 @@ setup(
     author_email='engineers@yola.com',
     license='MIT (Expat)',
     url=healthcheck.__url__,
-    packages=find_packages(exclude=('tests', '*.tests')),
+    packages=find_packages(exclude=('tests', '*.tests', 'benchmarks')),
+    install_requires=['futures; python_version < "3"'],
+    extras_require={
+        'orjson': ['orjson'],
+        'ujson': ['ujson'],
+    },
+    entry_points={
+        'console_scripts': [
+            'healthcheck-fleet = healthcheck.fleet:main',
+            'healthcheck-server = healthcheck.server:main',
+        ],
+    },
     tests_require=test_requirements,
     test_suite='nose.collector',
     classifiers=[
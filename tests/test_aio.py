@@ -0,0 +1,294 @@
+import asyncio
+import threading
+from unittest import TestCase
+
+from healthcheck.aio import (
+    AsyncHealthCheck, AsyncHealthChecker, AsyncHealthCheckScheduler,
+    AsyncListHealthCheck)
+from healthcheck.checks import HealthCheck
+from tests.test_checks import SleepingCheck
+
+
+def run_async(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class MyAsyncCheck(AsyncHealthCheck):
+    check_id = 'async_check'
+
+    def __init__(self, ok=True, delay=0, **kwargs):
+        super(MyAsyncCheck, self).__init__(**kwargs)
+        self.mock_ok = ok
+        self.delay = delay
+
+    async def run_async(self):
+        await asyncio.sleep(self.delay)
+        self._ok = self.mock_ok
+        self._details = 'async details'
+
+
+class MySyncCheck(HealthCheck):
+    check_id = 'sync_check'
+
+    def run(self):
+        self.thread = threading.current_thread()
+        self._ok = True
+        self._details = 'sync details'
+
+
+class HungSyncCheck(HealthCheck):
+    check_id = 'hung_check'
+
+    def __init__(self, released, **kwargs):
+        super(HungSyncCheck, self).__init__(**kwargs)
+        self.released = released
+        self.runs = 0
+
+    def run(self):
+        self.runs += 1
+        self.released.wait(5)
+        return self.report(True, 'finished')
+
+
+class MyAsyncListCheck(AsyncListHealthCheck):
+    check_id = 'async_list_check'
+
+    async def check_item_async(self, item):
+        await asyncio.sleep(0)
+        return item % 2 == 1, {item: 'checked'}
+
+
+class TestAsyncHealthCheck(TestCase):
+    def test_cant_create_async_check_without_run_async_method(self):
+        class MyCheck(AsyncHealthCheck):
+            check_id = 'check_id'
+
+        self.assertRaisesRegexp(
+            ValueError,
+            'You must override "run_async" method for check MyCheck',
+            MyCheck().run)
+
+    def test_run_drives_run_async(self):
+        check = MyAsyncCheck()
+        check.run()
+        self.assertEqual(check.as_dict(),
+                         {'details': 'async details', 'status': 'ok'})
+
+
+class TestAsyncListHealthCheck(TestCase):
+    def test_all_items_are_checked(self):
+        check = MyAsyncListCheck(items=(1, 3))
+        run_async(check.run_async())
+        self.assertTrue(check.is_ok)
+        self.assertEqual(check.details, {1: 'checked', 3: 'checked'})
+
+    def test_fails_if_at_least_one_item_fails(self):
+        check = MyAsyncListCheck(items=(1, 2, 3))
+        check.run()
+        self.assertFalse(check.is_ok)
+        self.assertEqual(check.details,
+                         {1: 'checked', 2: 'checked', 3: 'checked'})
+
+
+class TestAsyncHealthChecker(TestCase):
+    def test_async_and_sync_checks_are_gathered(self):
+        sync_check = MySyncCheck()
+        checker = AsyncHealthChecker([MyAsyncCheck(), sync_check])
+
+        ok, details = run_async(checker())
+
+        self.assertTrue(ok)
+        self.assertEqual(details, {
+            'async_check': {'details': 'async details', 'status': 'ok'},
+            'sync_check': {'details': 'sync details', 'status': 'ok'},
+        })
+        self.assertIsNot(sync_check.thread, threading.current_thread())
+
+    def test_async_checks_run_concurrently(self):
+        checker = AsyncHealthChecker([
+            MyAsyncCheck(delay=0.2, check_id='check{0}'.format(i))
+            for i in range(10)])
+
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        start = loop.time()
+        ok, details = loop.run_until_complete(checker())
+
+        self.assertTrue(ok)
+        self.assertEqual(len(details), 10)
+        self.assertLess(loop.time() - start, 1)
+
+    def test_overall_status_is_failed_if_critical_check_failed(self):
+        checker = AsyncHealthChecker([
+            MyAsyncCheck(ok=False), MySyncCheck()])
+        ok, details = run_async(checker())
+        self.assertFalse(ok)
+        self.assertEqual(details['async_check']['status'], 'FAILED')
+
+    def test_check_exceeding_its_timeout_is_failed(self):
+        checker = AsyncHealthChecker([
+            MyAsyncCheck(delay=5, timeout=0.05), MySyncCheck()])
+
+        ok, details = run_async(checker())
+
+        self.assertFalse(ok)
+        self.assertEqual(details['async_check']['status'], 'FAILED')
+        self.assertRegexpMatches(details['async_check']['details'],
+                                 r'^timed out after \d+ms$')
+        self.assertEqual(details['sync_check']['status'], 'ok')
+
+    def test_time_queued_for_a_thread_doesnt_count(self):
+        checker = AsyncHealthChecker([
+            SleepingCheck(0.15, check_id='first'),
+            SleepingCheck(0.1, check_id='queued', timeout=0.2),
+        ], max_workers=1)
+        self.addCleanup(checker.shutdown)
+
+        ok, details = run_async(checker())
+
+        self.assertTrue(ok)
+        self.assertEqual(details['queued']['status'], 'ok')
+
+    def test_hung_sync_check_holds_one_thread(self):
+        released = threading.Event()
+        self.addCleanup(released.set)
+        hung = HungSyncCheck(released, tags=['ready'], timeout=0.05)
+        checker = AsyncHealthChecker(
+            [hung, MySyncCheck(tags=['live'], timeout=0.05)], max_workers=2)
+        self.addCleanup(checker.shutdown, wait=False)
+
+        for _ in range(3):
+            ok, details = run_async(checker.for_tags(['ready'])())
+            self.assertFalse(ok)
+        ok, details = run_async(checker.for_tags(['live'])())
+
+        self.assertTrue(ok)
+        self.assertEqual(hung.runs, 1)
+
+    def test_fail_fast_skips_unfinished_checks(self):
+        checker = AsyncHealthChecker([
+            MyAsyncCheck(ok=False, check_id='failing'),
+            MyAsyncCheck(delay=5, check_id='slow'),
+        ], fail_fast=True)
+
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        start = loop.time()
+        ok, details = loop.run_until_complete(checker())
+
+        self.assertLess(loop.time() - start, 1)
+        self.assertFalse(ok)
+        self.assertEqual(details['failing']['status'], 'FAILED')
+        self.assertEqual(details['slow'], {
+            'details': "skipped, critical check 'failing' failed",
+            'status': 'skipped'})
+
+    def test_dependents_of_failed_check_are_skipped(self):
+        checker = AsyncHealthChecker([
+            MyAsyncCheck(check_id='users', depends_on=['db']),
+            MyAsyncCheck(ok=False, check_id='db', is_critical=False),
+            MyAsyncCheck(check_id='cache'),
+        ])
+
+        ok, details = run_async(checker())
+
+        self.assertFalse(ok)
+        self.assertEqual(details['users'], {
+            'details': "skipped, dependency 'db' failed",
+            'status': 'skipped'})
+        self.assertEqual(details['cache']['status'], 'ok')
+
+    def test_fail_fast_names_failed_dependencies(self):
+        checker = AsyncHealthChecker([
+            MyAsyncCheck(check_id='users', depends_on=['db']),
+            MyAsyncCheck(delay=5, check_id='db'),
+            MyAsyncCheck(ok=False, check_id='broken'),
+        ], fail_fast=True)
+
+        ok, details = run_async(checker())
+
+        self.assertFalse(ok)
+        self.assertEqual(details['db']['details'],
+                         "skipped, critical check 'broken' failed")
+        self.assertEqual(details['users']['details'],
+                         "skipped, dependency 'db' failed")
+
+    def test_skipped_checks_dont_fail_fast(self):
+        checker = AsyncHealthChecker([
+            MyAsyncCheck(check_id='users', depends_on=['db']),
+            MyAsyncCheck(ok=False, check_id='db', is_critical=False),
+            MyAsyncCheck(delay=0.05, check_id='cache'),
+        ], fail_fast=True)
+
+        ok, details = run_async(checker())
+
+        self.assertFalse(ok)
+        self.assertEqual(details['users']['details'],
+                         "skipped, dependency 'db' failed")
+        self.assertEqual(details['cache']['status'], 'ok')
+
+
+class TestSingleFlightAsyncHealthChecker(TestCase):
+    def test_concurrent_calls_share_one_run(self):
+        runs = []
+
+        class CountingCheck(AsyncHealthCheck):
+            check_id = 'counting'
+
+            async def run_async(self):
+                runs.append(1)
+                await asyncio.sleep(0.05)
+                return self.report(True, 'run {0}'.format(len(runs)))
+
+        checker = AsyncHealthChecker([CountingCheck()], single_flight=True)
+
+        async def call_concurrently():
+            return await asyncio.gather(*[checker() for _ in range(5)])
+
+        results = run_async(call_concurrently())
+
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(checker.runs, 1)
+        self.assertEqual(checker.coalesced_calls, 4)
+        self.assertEqual(results, [(True, {
+            'counting': {'details': 'run 1', 'status': 'ok'}})] * 5)
+
+
+class TestAsyncHealthCheckScheduler(TestCase):
+    def test_checks_run_periodically_in_tasks(self):
+        async_check = MyAsyncCheck(interval=0.01)
+        sync_check = MySyncCheck(interval=0.01)
+        scheduler = AsyncHealthCheckScheduler([async_check, sync_check])
+
+        async def run_scheduler():
+            scheduler.start()
+            await asyncio.sleep(0.1)
+            checker = AsyncHealthChecker(
+                [async_check, sync_check], cache=scheduler)
+            result = await checker()
+            scheduler.stop()
+            return result
+
+        ok, details = run_async(run_scheduler())
+
+        self.assertTrue(ok)
+        self.assertEqual(details, {
+            'async_check': {'details': 'async details', 'status': 'ok'},
+            'sync_check': {'details': 'sync details', 'status': 'ok'},
+        })
+        self.assertEqual(set(scheduler.snapshot()),
+                         set(['async_check', 'sync_check']))
+
+    def test_timed_out_checks_fail(self):
+        async_check = MyAsyncCheck(delay=1, timeout=0.01)
+        scheduler = AsyncHealthCheckScheduler([async_check])
+
+        run_async(scheduler._run_check_async(async_check))
+
+        result = scheduler.snapshot()['async_check']
+        self.assertEqual(result.status, 'FAILED')
+        self.assertRegexpMatches(result.details, '^timed out after')
@@ -0,0 +1,80 @@
+import asyncio
+import json
+from unittest import TestCase
+
+from healthcheck.aio import AsyncHealthCheck, AsyncHealthChecker
+from healthcheck.asgi import AsyncStatusApp
+from healthcheck.checks import HealthCheck, HealthChecker
+
+
+class AsyncCheck(AsyncHealthCheck):
+    check_id = 'async'
+    tags = ('live',)
+
+    async def run_async(self):
+        return self.report(True, 'ok')
+
+
+class FailingCheck(HealthCheck):
+    check_id = 'failing'
+
+    def run(self):
+        return self.report(False, 'down')
+
+
+class TestAsyncStatusApp(TestCase):
+    def call(self, app, scope, messages=()):
+        sent = []
+        messages = list(messages)
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        loop.run_until_complete(app(scope, receive, send))
+        return sent
+
+    def request(self, app, path='/', method='GET', query_string=b''):
+        start, body = self.call(app, {
+            'type': 'http', 'method': method, 'path': path,
+            'query_string': query_string})
+        return start['status'], dict(start['headers']), body['body']
+
+    def test_async_checker(self):
+        app = AsyncStatusApp(AsyncHealthChecker([AsyncCheck()]))
+
+        status, headers, body = self.request(app)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'content-type'], b'application/json')
+        self.assertEqual(json.loads(body.decode('utf-8')),
+                         {'async': {'status': 'ok', 'details': 'ok'}})
+
+    def test_sync_checker_runs_in_executor(self):
+        app = AsyncStatusApp(HealthChecker([AsyncCheck(), FailingCheck()]))
+
+        status, _, _ = self.request(app)
+        self.assertEqual(status, 500)
+
+        status, _, body = self.request(app, '/live')
+        self.assertEqual(status, 200)
+        self.assertEqual(list(json.loads(body.decode('utf-8'))), ['async'])
+
+    def test_errors(self):
+        app = AsyncStatusApp(AsyncHealthChecker([AsyncCheck()]))
+        self.assertEqual(self.request(app, method='POST')[0], 405)
+        self.assertEqual(self.request(app, '/nope')[0], 404)
+        self.assertEqual(self.request(app, '/ready')[0], 404)
+        self.assertEqual(
+            self.request(app, query_string=b'tags=live,redy')[0], 404)
+
+    def test_lifespan(self):
+        app = AsyncStatusApp(AsyncHealthChecker([AsyncCheck()]))
+        sent = self.call(app, {'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}])
+        self.assertEqual([message['type'] for message in sent], [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete'])
@@ -0,0 +1,81 @@
+import threading
+from contextlib import contextmanager
+from unittest import TestCase
+
+from benchmarks.runner import (
+    Benchmark, Stats, find_regressions, format_report, measure, percentile)
+
+
+class TestPercentile(TestCase):
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile(values, 1), 100)
+        self.assertEqual(percentile([3], 0.9), 3)
+
+    def test_empty(self):
+        self.assertIsNone(percentile([], 0.5))
+
+
+class TestMeasure(TestCase):
+    def make_benchmark(self, **kwargs):
+        self.calls = []
+        self.torn_down = False
+
+        @contextmanager
+        def setup():
+            yield lambda: self.calls.append(threading.current_thread())
+            self.torn_down = True
+
+        return Benchmark('counter', setup, **kwargs)
+
+    def test_times_each_call_after_warmup(self):
+        stats = measure(self.make_benchmark(iterations=20), warmup=5)
+
+        self.assertEqual(len(self.calls), 25)
+        self.assertEqual(stats.calls, 20)
+        self.assertTrue(self.torn_down)
+
+    def test_splits_iterations_between_concurrent_clients(self):
+        stats = measure(self.make_benchmark(iterations=10, concurrency=3),
+                        warmup=0)
+
+        self.assertEqual(stats.calls, 10)
+        self.assertEqual(len(set(self.calls)), 3)
+
+
+class TestReport(TestCase):
+    def test_stats_as_dict(self):
+        stats = Stats('bench', [0.003, 0.001, 0.002, 0.004], elapsed=0.01)
+        self.assertEqual(stats.as_dict(), {
+            'calls': 4,
+            'concurrency': 1,
+            'mean_ms': 2.5,
+            'p50_ms': 2.0,
+            'p90_ms': 4.0,
+            'p99_ms': 4.0,
+            'max_ms': 4.0,
+            'throughput': 400.0,
+        })
+
+    def test_format_report_shows_skipped_benchmarks(self):
+        stats = Stats('fast', [0.001], elapsed=0.001).as_dict()
+        report = format_report([('fast', stats), ('async', 'no asyncio')])
+
+        lines = report.splitlines()
+        self.assertEqual(lines[0].split(), [
+            'benchmark', 'calls', 'p50', 'ms', 'p90', 'ms', 'p99', 'ms',
+            'max', 'ms', 'calls/s'])
+        self.assertEqual(lines[2].split(), [
+            'fast', '1', '1.000', '1.000', '1.000', '1.000', '1000.0'])
+        self.assertEqual(lines[3].split(), ['async', 'skipped:', 'no',
+                                            'asyncio'])
+
+    def test_find_regressions(self):
+        baseline = {'a': {'p50_ms': 1.0}, 'b': {'p50_ms': 1.0}}
+        results = [('a', {'p50_ms': 1.2}), ('b', {'p50_ms': 1.5}),
+                   ('c', {'p50_ms': 9.0}), ('d', 'skipped')]
+
+        self.assertEqual(find_regressions(results, baseline, 0.25),
+                         [('b', 1.0, 1.5)])
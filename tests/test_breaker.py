@@ -0,0 +1,104 @@
+from unittest import TestCase
+
+from mock import patch
+
+from healthcheck.breaker import CircuitBreaker
+from healthcheck.checks import HealthCheck, HealthChecker
+
+
+class FlakyCheck(HealthCheck):
+    check_id = 'flaky'
+
+    def __init__(self, **kwargs):
+        super(FlakyCheck, self).__init__(**kwargs)
+        self.ok = False
+        self.runs = 0
+
+    def run(self):
+        self.runs += 1
+        return self.report(self.ok, 'run {0}'.format(self.runs))
+
+
+class TestCircuitBreaker(TestCase):
+    def setUp(self):
+        self.now = 100.0
+        patcher = patch.object(CircuitBreaker, '_now',
+                               lambda breaker: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.breaker = CircuitBreaker(failure_threshold=2, backoff=1,
+                                      max_backoff=3)
+        self.check = FlakyCheck(circuit_breaker=self.breaker)
+
+    def test_closed_breaker_runs_the_check(self):
+        result = self.check.execute()
+        self.assertEqual(self.check.runs, 1)
+        self.assertEqual(result.circuit_breaker,
+                         {'state': 'closed', 'consecutive_failures': 1})
+
+    def test_breaker_opens_after_consecutive_failures(self):
+        self.check.execute()
+        result = self.check.execute()
+
+        self.assertEqual(result.circuit_breaker, {
+            'state': 'open', 'consecutive_failures': 2,
+            'retry_in_ms': 1000})
+
+        self.now += 0.5
+        result = self.check.execute()
+
+        self.assertEqual(self.check.runs, 2)
+        self.assertFalse(result.is_ok)
+        self.assertEqual(result.details, 'run 2')
+        self.assertEqual(result.circuit_breaker['retry_in_ms'], 500)
+
+    def test_success_resets_failure_count(self):
+        self.check.execute()
+        self.check.ok = True
+        self.check.execute()
+        self.check.ok = False
+
+        result = self.check.execute()
+
+        self.assertEqual(result.circuit_breaker['state'], 'closed')
+
+    def test_half_open_probe_closes_breaker_on_success(self):
+        self.check.execute()
+        self.check.execute()
+        self.now += 1
+        self.check.ok = True
+
+        result = self.check.execute()
+
+        self.assertEqual(self.check.runs, 3)
+        self.assertTrue(result.is_ok)
+        self.assertEqual(result.circuit_breaker,
+                         {'state': 'closed', 'consecutive_failures': 0})
+
+    def test_failed_probe_backs_off_exponentially(self):
+        self.check.execute()
+        self.check.execute()
+        retries = []
+        for _ in range(3):
+            self.now += 10
+            retries.append(
+                self.check.execute().circuit_breaker['retry_in_ms'])
+
+        self.assertEqual(retries, [2000, 3000, 3000])
+
+    def test_only_one_probe_runs_while_half_open(self):
+        self.check.execute()
+        self.check.execute()
+        self.now += 1
+        self.assertIsNone(self.breaker.before_run())
+
+        result = self.check.execute()
+
+        self.assertEqual(self.check.runs, 2)
+        self.assertEqual(result.circuit_breaker['state'], 'half-open')
+
+    def test_state_is_shown_in_checker_details(self):
+        ok, details = HealthChecker([self.check])()
+        self.assertEqual(details['flaky']['circuit_breaker'],
+                         {'state': 'closed', 'consecutive_failures': 1})
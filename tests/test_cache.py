@@ -0,0 +1,102 @@
+import time
+from unittest import TestCase
+
+from mock import patch
+
+from healthcheck.cache import ResultCache
+from healthcheck.checks import HealthCheck, HealthChecker
+
+
+class CountingCheck(HealthCheck):
+    check_id = 'counting'
+
+    def __init__(self, ok=True, **kwargs):
+        super(CountingCheck, self).__init__(**kwargs)
+        self.mock_ok = ok
+        self.runs = 0
+
+    def run(self):
+        self.runs += 1
+        return self.report(self.mock_ok, 'run {0}'.format(self.runs))
+
+
+class TestResultCache(TestCase):
+    def setUp(self):
+        patcher = patch('healthcheck.cache.monotonic', return_value=100)
+        self.monotonic = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.check = CountingCheck()
+
+    def fetch(self, cache):
+        return cache.fetch(self.check, HealthCheck.execute)
+
+    def test_result_is_reused_within_ttl(self):
+        cache = ResultCache(ttl=10)
+        first = self.fetch(cache)
+        self.monotonic.return_value = 109
+        self.assertIs(self.fetch(cache), first)
+        self.assertEqual(self.check.runs, 1)
+
+    def test_check_is_rerun_after_ttl(self):
+        cache = ResultCache(ttl=10)
+        self.fetch(cache)
+        self.monotonic.return_value = 110
+        self.assertEqual(self.fetch(cache).details, 'run 2')
+
+    def test_failed_results_have_their_own_ttl(self):
+        cache = ResultCache(ttl=10, failed_ttl=1)
+        self.check.mock_ok = False
+        self.fetch(cache)
+        self.monotonic.return_value = 101
+        self.assertEqual(self.fetch(cache).details, 'run 2')
+
+    def test_check_can_override_ttls(self):
+        cache = ResultCache(ttl=10, failed_ttl=10)
+        self.check = CountingCheck(cache_ttl=1, failed_cache_ttl=5)
+        self.fetch(cache)
+        self.monotonic.return_value = 101
+        self.assertEqual(self.fetch(cache).details, 'run 2')
+
+    def test_stale_result_is_served_while_refreshing(self):
+        cache = ResultCache(ttl=10, stale_while_revalidate=True)
+        first = self.fetch(cache)
+        self.monotonic.return_value = 110
+
+        self.assertIs(self.fetch(cache), first)
+
+        for _ in range(100):
+            result = self.fetch(cache)
+            if result is not first:
+                break
+            time.sleep(0.01)
+        self.assertEqual(result.details, 'run 2')
+
+    def test_clear(self):
+        cache = ResultCache(ttl=10)
+        self.fetch(cache)
+        cache.clear()
+        self.assertEqual(self.fetch(cache).details, 'run 2')
+
+
+class TestHealthCheckerWithCache(TestCase):
+    def test_checker_uses_cache(self):
+        check = CountingCheck()
+        checker = HealthChecker([check], cache=ResultCache(ttl=60))
+
+        self.assertEqual(checker(), checker())
+        self.assertEqual(check.runs, 1)
+
+    def test_concurrent_checker_uses_cache(self):
+        check = CountingCheck()
+        checker = HealthChecker([check], max_workers=2,
+                                cache=ResultCache(ttl=60))
+        self.addCleanup(checker.shutdown)
+
+        ok, details = checker()
+        checker()
+
+        self.assertTrue(ok)
+        self.assertEqual(details,
+                         {'counting': {'details': 'run 1', 'status': 'ok'}})
+        self.assertEqual(check.runs, 1)
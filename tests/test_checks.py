@@ -1,19 +1,27 @@
 # -*- coding: utf-8 -*-
 import errno
+import os
+import pickle
+import threading
+import time
 from tempfile import NamedTemporaryFile
 from unittest import TestCase
 
+from concurrent.futures import ThreadPoolExecutor
 from django.db import OperationalError
 from mock import Mock, patch
 
 from healthcheck.checks import (
+    CheckResult,
     DjangoDBsHealthCheck,
     FilesDontExistHealthCheck,
     FilesExistHealthCheck,
     HealthCheck,
     HealthChecker,
     ListHealthCheck,
+    ProcessHealthCheck,
 )
+from healthcheck.utils import monotonic
 
 
 class MyCheck(HealthCheck):
@@ -24,6 +32,88 @@ class MyCheck(HealthCheck):
         self._details = self.mock_details
 
 
+class WaitingCheck(HealthCheck):
+    """Sets its own event, then waits for the partner check's event."""
+
+    def __init__(self, own_event, partner_event, **kwargs):
+        super(WaitingCheck, self).__init__(**kwargs)
+        self.own_event = own_event
+        self.partner_event = partner_event
+
+    def run(self):
+        self.own_event.set()
+        self._ok = self.partner_event.wait(1)
+        self._details = 'partner seen' if self._ok else 'partner not seen'
+
+
+class HangingCheck(HealthCheck):
+    """Blocks until `released` is set."""
+
+    def __init__(self, released, **kwargs):
+        super(HangingCheck, self).__init__(**kwargs)
+        self.released = released
+
+    def run(self):
+        self.released.wait(5)
+        self._ok = True
+        self._details = 'finished'
+
+
+class SleepingCheck(HealthCheck):
+    def __init__(self, delay, **kwargs):
+        super(SleepingCheck, self).__init__(**kwargs)
+        self.delay = delay
+
+    def run(self):
+        time.sleep(self.delay)
+        return self.report(True, 'slept')
+
+
+class ThreadNameCheck(HealthCheck):
+    """New-style check, which reports the name of the thread it ran in."""
+    check_id = 'thread_name'
+
+    def run(self):
+        name = threading.current_thread().name
+        time.sleep(0.001)
+        return self.report(True, name)
+
+
+class FailingCheck(HealthCheck):
+    check_id = 'failing'
+
+    def run(self):
+        raise ValueError('boom')
+
+
+class TestCheckResult(TestCase):
+    def test_is_immutable(self):
+        result = CheckResult(CheckResult.OK, 'details')
+        with self.assertRaises(AttributeError):
+            result.status = CheckResult.FAILED
+        with self.assertRaises(AttributeError):
+            result.extra = 1
+
+    def test_from_ok(self):
+        self.assertEqual(CheckResult.from_ok(True, 'x'),
+                         CheckResult('ok', 'x'))
+        self.assertEqual(CheckResult.from_ok(False, 'x').status, 'FAILED')
+
+    def test_replace_returns_a_copy(self):
+        result = CheckResult(CheckResult.OK, 'details')
+        timed = result.replace(duration=1.5)
+        self.assertIsNone(result.duration)
+        self.assertEqual(timed, CheckResult('ok', 'details', duration=1.5))
+
+    def test_can_be_pickled(self):
+        result = CheckResult('FAILED', {'a': 'b'}, duration=0.1, error='e')
+        self.assertEqual(pickle.loads(pickle.dumps(result)), result)
+
+    def test_as_dict(self):
+        self.assertEqual(CheckResult('FAILED', 'details').as_dict(),
+                         {'details': 'details', 'status': 'FAILED'})
+
+
 class TestHealthCheck(TestCase):
 
     def setUp(self):
@@ -89,6 +179,31 @@ class TestHealthCheck(TestCase):
         self.assertEqual(self.check.as_dict(), {'details': 'details',
                                                 'status': 'FAILED'})
 
+    def test_execute_returns_result_of_old_style_check(self):
+        self.check.mock_ok = False
+        self.check.mock_details = 'details'
+        result = self.check.execute()
+        self.assertEqual(result.status, 'FAILED')
+        self.assertEqual(result.details, 'details')
+        self.assertGreaterEqual(result.duration, 0)
+
+    def test_execute_returns_result_of_new_style_check(self):
+        check = ThreadNameCheck()
+        result = check.execute()
+        self.assertTrue(result.is_ok)
+        self.assertEqual(result.details, threading.current_thread().name)
+        self.assertIs(check.last_result, result)
+        self.assertEqual(check.as_dict(),
+                         {'details': result.details, 'status': 'ok'})
+
+    @patch('healthcheck.checks.logger')
+    def test_execute_reports_errors_as_failures(self, logger_mock):
+        result = FailingCheck().execute()
+        self.assertEqual(result.status, 'FAILED')
+        self.assertEqual(result.details, 'ERROR: ValueError: boom')
+        self.assertEqual(result.error, 'ValueError: boom')
+        self.assertTrue(logger_mock.exception.called)
+
 
 class MyListHealthCheck(ListHealthCheck):
     check_id = 'test_list_check_id'
@@ -126,6 +241,17 @@ class TestListHealthCheck(TestCase):
                                  for item in (1, 2, 3)])
         self.assertEqual(check.details, expected_details)
 
+    def test_item_durations_are_reported(self):
+        check = MyListHealthCheck(items=(1, 2))
+        check.check_item = lambda item: (True, {item: 'ok'})
+
+        result = check.execute()
+
+        self.assertEqual(set(result.item_durations), set([1, 2]))
+        as_dict = result.as_dict(include_durations=True)
+        self.assertEqual(set(as_dict['item_durations_ms']), set([1, 2]))
+        self.assertGreaterEqual(as_dict['duration_ms'], 0)
+
     def test_check_fails_if_at_least_check_for_one_item_fails(self):
         MyListHealthCheck.mock_items = (1, 2, 3)
         check = MyListHealthCheck()
@@ -134,6 +260,65 @@ class TestListHealthCheck(TestCase):
         check.run()
         self.assertEqual(check.is_ok, False)
 
+    def test_old_style_subclass_can_change_result_of_parent(self):
+        class IgnoredItemsCheck(MyListHealthCheck):
+            def run(self):
+                super(IgnoredItemsCheck, self).run()
+                if not self._ok and self._details == {2: 'down'}:
+                    self._ok = True
+                    self._details = {2: 'down, ignored'}
+
+        check = IgnoredItemsCheck(items=(1, 2))
+        check.check_item = lambda item: (
+            item != 2, {item: 'down'} if item == 2 else {})
+
+        result = check.execute()
+
+        self.assertTrue(result.is_ok)
+        self.assertEqual(result.details, {2: 'down, ignored'})
+        self.assertTrue(check.is_ok)
+        self.assertEqual(check.details, {2: 'down, ignored'})
+
+
+class TestConcurrentListHealthCheck(TestCase):
+    def test_items_are_checked_concurrently(self):
+        events = dict((item, threading.Event()) for item in (1, 2))
+
+        def check_item(item):
+            events[item].set()
+            partner_seen = events[3 - item].wait(1)
+            return partner_seen, {item: 'partner seen: %s' % partner_seen}
+
+        check = MyListHealthCheck(items=(1, 2), max_workers=2)
+        self.addCleanup(check.shutdown)
+        check.check_item = check_item
+
+        result = check.run()
+
+        self.assertTrue(result.is_ok)
+        self.assertEqual(result.details, {1: 'partner seen: True',
+                                          2: 'partner seen: True'})
+
+    def test_item_exceeding_timeout_is_failed(self):
+        released = threading.Event()
+        self.addCleanup(released.set)
+
+        def check_item(item):
+            if item == 'slow':
+                released.wait(5)
+            return True, {item: 'ok'}
+
+        check = MyListHealthCheck(items=('fast', 'slow'), item_timeout=0.05)
+        self.addCleanup(check.shutdown, wait=False)
+        check.check_item = check_item
+
+        result = check.run()
+
+        self.assertFalse(result.is_ok)
+        self.assertEqual(result.details['fast'], 'ok')
+        self.assertRegexpMatches(result.details['slow'],
+                                 r'^timed out after \d+ms$')
+
 
 class TestFilesExistHealthCheck(TestCase):
     def test_ok_if_all_files_exist(self):
@@ -177,6 +362,15 @@ class TestFilesDontExistHealthCheck(TestCase):
                                          file2: 'FILE EXISTS'})
 
 
+class TestProcessHealthCheck(TestCase):
+    def test_ok_and_tagged_live(self):
+        check = ProcessHealthCheck()
+        result = check.run()
+        self.assertTrue(result.is_ok)
+        self.assertEqual(result.details, {'pid': os.getpid()})
+        self.assertEqual(check.tags, ('live',))
+
+
 class TestFilesHealthCheckWithError(TestCase):
     @patch('os.stat')
     def test_error_when_checking_if_files_exist(self, stat_mock):
@@ -224,6 +418,114 @@ class TestDjangoDBsHealthCheck(TestCase):
         self.assertFalse(check.is_ok)
         self.assertEqual(check.details, {'db_name': 'FAILED'})
 
+    @patch('django.db.connections')
+    def test_pool_thread_connections_are_closed(self, connections_mock):
+        connections_mock.all.return_value = [Mock(alias='db_name')]
+        thread_connection = connections_mock.__getitem__.return_value
+        thread_connection.alias = 'db_name'
+        check = DjangoDBsHealthCheck(max_workers=2)
+        self.addCleanup(check.shutdown)
+
+        result = check.run()
+
+        self.assertTrue(result.is_ok)
+        connections_mock.__getitem__.assert_called_once_with('db_name')
+        thread_connection.close.assert_called_once_with()
+        self.assertFalse(
+            connections_mock.all.return_value[0].close.called)
+
+
+class TestDjangoDBsHealthCheckProbeConnections(TestCase):
+    def setUp(self):
+        patcher = patch('django.db.connections')
+        self.connections_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.connections_mock.all.return_value = [Mock(alias='db_name')]
+        self.connections_mock.__getitem__.return_value = Mock(
+            settings_dict={'ENGINE': 'engine', 'OPTIONS': {}})
+
+        patcher = patch('django.db.utils.load_backend')
+        self.load_backend_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.probe = Mock(vendor='postgresql', settings_dict={'OPTIONS': {}})
+        wrapper_class = self.load_backend_mock.return_value.DatabaseWrapper
+        wrapper_class.return_value = self.probe
+
+    def test_probe_connection_is_created_once(self):
+        check = DjangoDBsHealthCheck(probe_connections=True)
+
+        check.run()
+        result = check.run()
+
+        self.assertTrue(result.is_ok)
+        self.assertEqual(result.details['db_name']['status'], 'ok')
+        self.assertGreaterEqual(result.details['db_name']['latency_ms'], 0)
+        self.load_backend_mock.assert_called_once_with('engine')
+        self.assertEqual(self.probe.ensure_connection.call_count, 2)
+        self.assertFalse(self.connections_mock.all.return_value[0]
+                         .ensure_connection.called)
+
+    def test_unusable_probe_connection_is_closed(self):
+        self.probe.is_usable.return_value = False
+        check = DjangoDBsHealthCheck(probe_connections=True)
+
+        result = check.run()
+
+        self.assertFalse(result.is_ok)
+        self.assertEqual(result.details['db_name']['status'], 'FAILED')
+        self.probe.close.assert_called_once_with()
+
+    def test_failed_connection_is_reported(self):
+        self.probe.ensure_connection.side_effect = OperationalError()
+        check = DjangoDBsHealthCheck(probe_connections=True)
+        self.assertEqual(check.run().details['db_name']['status'], 'FAILED')
+
+    def test_item_timeout_bounds_postgresql_probe(self):
+        check = DjangoDBsHealthCheck(probe_connections=True, item_timeout=1.5)
+        self.addCleanup(check.shutdown)
+
+        check.run()
+
+        self.assertEqual(self.probe.settings_dict['OPTIONS'], {
+            'connect_timeout': 2, 'options': '-c statement_timeout=1500'})
+
+    def test_item_timeout_bounds_mysql_probe(self):
+        self.probe.vendor = 'mysql'
+        check = DjangoDBsHealthCheck(probe_connections=True, item_timeout=1.5)
+        self.addCleanup(check.shutdown)
+
+        check.run()
+
+        self.assertEqual(self.probe.settings_dict['OPTIONS'],
+                         {'connect_timeout': 2, 'read_timeout': 2})
+
+    def test_configured_timeouts_are_kept(self):
+        self.probe.settings_dict['OPTIONS'] = {
+            'connect_timeout': 10, 'options': '-c search_path=app'}
+        check = DjangoDBsHealthCheck(probe_connections=True, item_timeout=1.5)
+        self.addCleanup(check.shutdown)
+
+        check.run()
+
+        self.assertEqual(self.probe.settings_dict['OPTIONS'], {
+            'connect_timeout': 10,
+            'options': '-c search_path=app -c statement_timeout=1500'})
+
+    def test_timed_out_db_is_reported(self):
+        released = threading.Event()
+        self.addCleanup(released.set)
+        self.probe.ensure_connection.side_effect = lambda: released.wait(5)
+        check = DjangoDBsHealthCheck(probe_connections=True,
+                                     item_timeout=0.05)
+        self.addCleanup(check.shutdown, wait=False)
+
+        result = check.run()
+
+        self.assertFalse(result.is_ok)
+        self.assertEqual(result.details['db_name']['status'], 'FAILED')
+        self.assertRegexpMatches(result.details['db_name']['details'],
+                                 r'^timed out after \d+ms$')
+
 
 class TestHealthChecker(TestCase):
     def setUp(self):
@@ -270,3 +572,497 @@ class TestHealthChecker(TestCase):
         self.check1.mock_ok = False
         ok, details = self.checker()
         self.assertFalse(ok)
+
+    def test_fail_fast_skips_checks_after_critical_failure(self):
+        self.check1.mock_ok = False
+        checker = HealthChecker([self.check1, self.check2], fail_fast=True)
+        self.check2.run = Mock()
+
+        ok, details = checker()
+
+        self.assertFalse(ok)
+        self.assertFalse(self.check2.run.called)
+        self.assertEqual(details['check2'], {
+            'details': "skipped, critical check 'check1' failed",
+            'status': 'skipped'})
+
+    def test_fail_fast_runs_on_after_non_critical_failure(self):
+        checker = HealthChecker([self.check3, self.check1], fail_fast=True)
+        ok, details = checker()
+        self.assertTrue(ok)
+        self.assertEqual(details['check1']['status'], 'ok')
+
+
+class TestHealthCheckDependencies(TestCase):
+    def make_check(self, check_id, ok=True, **kwargs):
+        check = MyCheck(check_id=check_id, **kwargs)
+        check.mock_ok = ok
+        check.mock_details = check_id + ' details'
+        return check
+
+    def test_unknown_dependency_is_rejected(self):
+        self.assertRaisesRegexp(
+            ValueError, "Check 'a' depends on unknown check 'b'",
+            HealthChecker, [self.make_check('a', depends_on=['b'])])
+
+    def test_dependency_cycle_is_rejected(self):
+        self.assertRaisesRegexp(
+            ValueError, "Dependency cycle detected: 'b' -> 'c' -> 'b'",
+            HealthChecker, [
+                self.make_check('a', depends_on=['b']),
+                self.make_check('b', depends_on=['c']),
+                self.make_check('c', depends_on=['b']),
+            ])
+
+    def test_dependencies_run_first(self):
+        order = []
+        checks = [self.make_check('users', depends_on=['db']),
+                  self.make_check('db')]
+        for check in checks:
+            check.run = Mock(side_effect=lambda check=check: (
+                order.append(check.check_id), check.report(True, 'ok'))[1])
+
+        ok, details = HealthChecker(checks)()
+
+        self.assertTrue(ok)
+        self.assertEqual(order, ['db', 'users'])
+
+    def test_descendants_of_failed_check_are_skipped(self):
+        checks = [
+            self.make_check('db', ok=False, is_critical=False),
+            self.make_check('users', depends_on=['db']),
+            self.make_check('user_count', depends_on=['users']),
+            self.make_check('cache'),
+        ]
+        checks[1].run = Mock()
+        checks[2].run = Mock()
+
+        ok, details = HealthChecker(checks)()
+
+        self.assertFalse(ok)
+        self.assertFalse(checks[1].run.called)
+        self.assertFalse(checks[2].run.called)
+        self.assertEqual(details['users'], {
+            'details': "skipped, dependency 'db' failed",
+            'status': 'skipped'})
+        self.assertEqual(details['user_count'], {
+            'details': "skipped, dependency 'users' failed",
+            'status': 'skipped'})
+        self.assertEqual(details['cache']['status'], 'ok')
+
+    def test_independent_branches_run_concurrently(self):
+        event1 = threading.Event()
+        event2 = threading.Event()
+        checks = [
+            WaitingCheck(event1, event2, check_id='branch1'),
+            WaitingCheck(event2, event1, check_id='branch2'),
+            self.make_check('leaf1', depends_on=['branch1']),
+            self.make_check('leaf2', depends_on=['branch2']),
+        ]
+        checker = HealthChecker(checks, max_workers=2)
+        self.addCleanup(checker.shutdown)
+
+        ok, details = checker()
+
+        self.assertTrue(ok)
+        self.assertEqual(details['branch1']['details'], 'partner seen')
+        self.assertEqual(details['leaf2']['status'], 'ok')
+
+    def test_failed_dependency_skips_in_concurrent_mode(self):
+        checks = [
+            self.make_check('db', ok=False),
+            self.make_check('users', depends_on=['db']),
+        ]
+        checks[1].run = Mock()
+        checker = HealthChecker(checks, max_workers=2)
+        self.addCleanup(checker.shutdown)
+
+        ok, details = checker()
+
+        self.assertFalse(ok)
+        self.assertFalse(checks[1].run.called)
+        self.assertEqual(details['users']['status'], 'skipped')
+
+    def assert_fail_fast_names_failed_dependencies(self, **kwargs):
+        checks = [
+            self.make_check('db', ok=False),
+            self.make_check('users', depends_on=['db']),
+            self.make_check('user_count', depends_on=['users']),
+            self.make_check('cache'),
+        ]
+        checker = HealthChecker(checks, fail_fast=True, **kwargs)
+        self.addCleanup(checker.shutdown)
+
+        ok, details = checker()
+
+        self.assertFalse(ok)
+        self.assertEqual(details['users']['details'],
+                         "skipped, dependency 'db' failed")
+        self.assertEqual(details['user_count']['details'],
+                         "skipped, dependency 'users' failed")
+
+    def test_fail_fast_names_failed_dependencies(self):
+        self.assert_fail_fast_names_failed_dependencies()
+
+    def test_fail_fast_names_failed_dependencies_in_concurrent_mode(self):
+        self.assert_fail_fast_names_failed_dependencies(max_workers=1)
+
+    def assert_skipped_checks_dont_fail_fast(self, **kwargs):
+        checks = [
+            self.make_check('db', ok=False, is_critical=False),
+            self.make_check('users', depends_on=['db']),
+            self.make_check('cache'),
+        ]
+        checker = HealthChecker(checks, fail_fast=True, **kwargs)
+        self.addCleanup(checker.shutdown)
+
+        ok, details = checker()
+
+        self.assertFalse(ok)
+        self.assertEqual(details['users']['details'],
+                         "skipped, dependency 'db' failed")
+        self.assertEqual(details['cache']['status'], 'ok')
+
+    def test_skipped_checks_dont_fail_fast(self):
+        self.assert_skipped_checks_dont_fail_fast()
+
+    def test_skipped_checks_dont_fail_fast_in_concurrent_mode(self):
+        self.assert_skipped_checks_dont_fail_fast(max_workers=1)
+
+
+class TestTaggedHealthChecker(TestCase):
+    def make_check(self, check_id, **kwargs):
+        check = MyCheck(check_id=check_id, **kwargs)
+        check.mock_ok = True
+        check.mock_details = check_id + ' details'
+        return check
+
+    def setUp(self):
+        self.checker = HealthChecker([
+            self.make_check('db', tags=['ready', 'db']),
+            self.make_check('users', tags=['ready'], depends_on=['db']),
+            self.make_check('ping', tags=['live']),
+            self.make_check('disk', depends_on=['db']),
+        ])
+
+    def test_tags(self):
+        self.assertEqual(self.checker.tags, ['db', 'live', 'ready'])
+
+    def test_only_tagged_checks_run(self):
+        ok, details = self.checker.for_tags(['live'])()
+        self.assertTrue(ok)
+        self.assertEqual(list(details), ['ping'])
+
+    def test_dependencies_of_tagged_checks_run(self):
+        ok, details = self.checker.for_tags(['live', 'ready'])()
+        self.assertEqual(sorted(details), ['db', 'ping', 'users'])
+
+    def test_unknown_tags_select_nothing(self):
+        ok, details = self.checker.for_tags(['unknown'])()
+        self.assertTrue(ok)
+        self.assertEqual(details, {})
+
+    def test_checkers_are_reused(self):
+        self.assertIs(self.checker.for_tags(['db', 'live']),
+                      self.checker.for_tags(('live', 'db', 'unknown')))
+
+    def test_tagged_checker_shares_thread_pool(self):
+        checker = HealthChecker(
+            [self.make_check('db', tags=['db'])], max_workers=1)
+        self.addCleanup(checker.shutdown)
+        self.assertIs(checker.for_tags(['db'])._executor,
+                      checker._get_executor())
+
+    def test_hung_check_doesnt_starve_other_tags(self):
+        released = threading.Event()
+        self.addCleanup(released.set)
+        hung = HangingCheck(released, check_id='db', tags=['ready'],
+                            timeout=0.05)
+        checker = HealthChecker([
+            hung, self.make_check('ping', tags=['live'], timeout=0.05)])
+        self.addCleanup(checker.shutdown, wait=False)
+        hung.run = Mock(side_effect=hung.run)
+
+        for _ in range(3):
+            ok, details = checker.for_tags(['ready'])()
+            self.assertFalse(ok)
+            self.assertRegexpMatches(details['db']['details'],
+                                     r'^timed out after \d+ms$')
+        ok, details = checker.for_tags(['live'])()
+
+        self.assertTrue(ok)
+        self.assertEqual(details['ping']['status'], 'ok')
+        self.assertEqual(hung.run.call_count, 1)
+
+
+class TestConcurrentHealthChecker(TestCase):
+    def setUp(self):
+        event1 = threading.Event()
+        event2 = threading.Event()
+        self.checks = [
+            WaitingCheck(event1, event2, check_id='check1'),
+            WaitingCheck(event2, event1, check_id='check2'),
+        ]
+
+    def assert_checks_overlapped(self, checker):
+        ok, details = checker()
+        self.assertTrue(ok)
+        self.assertEqual(details, {
+            'check1': {'details': 'partner seen', 'status': 'ok'},
+            'check2': {'details': 'partner seen', 'status': 'ok'},
+        })
+
+    def test_checks_run_concurrently_with_max_workers(self):
+        checker = HealthChecker(self.checks, max_workers=2)
+        self.addCleanup(checker.shutdown)
+        self.assert_checks_overlapped(checker)
+
+    def test_checks_run_concurrently_in_shared_executor(self):
+        executor = ThreadPoolExecutor(2)
+        self.addCleanup(executor.shutdown)
+        checker = HealthChecker(self.checks, executor=executor)
+        self.assert_checks_overlapped(checker)
+        checker.shutdown()
+        # The shared executor is not shut down by the checker.
+        self.assertEqual(executor.submit(lambda: 42).result(), 42)
+
+    def test_results_are_the_same_as_in_sequential_mode(self):
+        check1 = MyCheck(check_id='check1')
+        check1.mock_ok = False
+        check1.mock_details = 'result1'
+        check2 = MyCheck(check_id='check2', is_critical=False)
+        check2.mock_ok = True
+        check2.mock_details = 'result2'
+
+        sequential = HealthChecker([check1, check2])()
+        checker = HealthChecker([check1, check2], max_workers=2)
+        self.addCleanup(checker.shutdown)
+        self.assertEqual(checker(), sequential)
+        self.assertFalse(sequential[0])
+
+
+class TestHealthCheckerTimeouts(TestCase):
+    def setUp(self):
+        self.released = threading.Event()
+        self.addCleanup(self.released.set)
+
+        self.fast_check = MyCheck(check_id='fast')
+        self.fast_check.mock_ok = True
+        self.fast_check.mock_details = 'fast result'
+
+    def assert_timed_out(self, result):
+        self.assertEqual(result['status'], 'FAILED')
+        self.assertRegexpMatches(result['details'], r'^timed out after \d+ms$')
+
+    def test_check_exceeding_its_timeout_is_failed(self):
+        checker = HealthChecker([
+            self.fast_check,
+            HangingCheck(self.released, check_id='slow', timeout=0.05),
+        ])
+        self.addCleanup(checker.shutdown, wait=False)
+
+        ok, details = checker()
+
+        self.assertFalse(ok)
+        self.assertEqual(details['fast'],
+                         {'details': 'fast result', 'status': 'ok'})
+        self.assert_timed_out(details['slow'])
+
+    def test_deadline_applies_to_all_checks(self):
+        checker = HealthChecker([
+            HangingCheck(self.released, check_id='slow1', is_critical=False),
+            HangingCheck(self.released, check_id='slow2', is_critical=False),
+        ], deadline=0.05)
+        self.addCleanup(checker.shutdown, wait=False)
+
+        start = monotonic()
+        ok, details = checker()
+
+        self.assertLess(monotonic() - start, 1)
+        self.assertFalse(ok)
+        self.assert_timed_out(details['slow1'])
+        self.assert_timed_out(details['slow2'])
+
+    def test_timed_out_non_critical_check_doesnt_fail_overall_status(self):
+        checker = HealthChecker([
+            self.fast_check,
+            HangingCheck(self.released, check_id='slow', is_critical=False,
+                         timeout=0.05),
+        ])
+        self.addCleanup(checker.shutdown, wait=False)
+
+        ok, details = checker()
+
+        self.assertTrue(ok)
+        self.assert_timed_out(details['slow'])
+
+    def test_time_queued_for_a_thread_doesnt_count(self):
+        checker = HealthChecker([
+            SleepingCheck(0.15, check_id='first'),
+            SleepingCheck(0.1, check_id='queued', timeout=0.2),
+        ], max_workers=1)
+        self.addCleanup(checker.shutdown)
+
+        ok, details = checker()
+
+        self.assertTrue(ok)
+        self.assertEqual(details['queued']['status'], 'ok')
+
+    def test_check_queued_past_its_timeout_is_failed(self):
+        checker = HealthChecker([
+            HangingCheck(self.released, check_id='slow', timeout=0.05),
+            SleepingCheck(0, check_id='queued', timeout=0.05),
+        ], max_workers=1)
+        self.addCleanup(checker.shutdown, wait=False)
+
+        start = monotonic()
+        ok, details = checker()
+
+        self.assertLess(monotonic() - start, 1)
+        self.assert_timed_out(details['slow'])
+        self.assert_timed_out(details['queued'])
+
+    def test_check_finishing_in_time_is_reported_normally(self):
+        checker = HealthChecker([self.fast_check], deadline=5)
+        self.addCleanup(checker.shutdown)
+
+        self.assertEqual(checker(), (True, {
+            'fast': {'details': 'fast result', 'status': 'ok'}}))
+
+    def test_results_are_yielded_as_checks_finish(self):
+        checker = HealthChecker([
+            HangingCheck(self.released, check_id='slow'),
+            self.fast_check,
+        ], max_workers=2)
+        self.addCleanup(checker.shutdown, wait=False)
+
+        results = checker.iter_results()
+        check_id, result = next(results)
+        self.assertEqual(check_id, 'fast')
+        self.assertTrue(result.is_ok)
+
+        self.released.set()
+        check_id, result = next(results)
+        self.assertEqual(check_id, 'slow')
+        self.assertEqual(list(results), [])
+
+    def test_timed_out_checks_are_yielded(self):
+        checker = HealthChecker([
+            HangingCheck(self.released, check_id='slow', timeout=0.05),
+            self.fast_check,
+        ])
+        self.addCleanup(checker.shutdown, wait=False)
+
+        results = list(checker.iter_results())
+
+        self.assertEqual([check_id for check_id, _ in results],
+                         ['fast', 'slow'])
+        self.assertRegexpMatches(results[1][1].error,
+                                 r'^timed out after \d+ms$')
+
+    def test_fail_fast_doesnt_wait_for_running_checks(self):
+        failing = MyCheck(check_id='failing')
+        failing.mock_ok = False
+        failing.mock_details = 'broken'
+        checker = HealthChecker([
+            HangingCheck(self.released, check_id='slow'), failing,
+        ], max_workers=2, fail_fast=True)
+        self.addCleanup(checker.shutdown, wait=False)
+
+        start = monotonic()
+        ok, details = checker()
+
+        self.assertLess(monotonic() - start, 1)
+        self.assertFalse(ok)
+        self.assertEqual(details['failing']['status'], 'FAILED')
+        self.assertEqual(details['slow'], {
+            'details': "skipped, critical check 'failing' failed",
+            'status': 'skipped'})
+
+
+class TestSharedHealthChecker(TestCase):
+    def test_concurrent_calls_get_their_own_results(self):
+        checker = HealthChecker([ThreadNameCheck()])
+        errors = []
+
+        def call_checker():
+            name = threading.current_thread().name
+            for _ in range(20):
+                ok, details = checker()
+                if details['thread_name']['details'] != name:
+                    errors.append(details)
+
+        threads = [threading.Thread(target=call_checker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+    @patch('healthcheck.checks.logger', Mock())
+    def test_errors_are_reported_as_failed_checks(self):
+        ok, details = HealthChecker([FailingCheck()])()
+        self.assertFalse(ok)
+        self.assertEqual(details, {'failing': {
+            'details': 'ERROR: ValueError: boom', 'status': 'FAILED'}})
+
+
+class TestSingleFlightHealthChecker(TestCase):
+    def setUp(self):
+        self.started = threading.Event()
+        self.released = threading.Event()
+        self.addCleanup(self.released.set)
+        self.runs = []
+
+        test = self
+
+        class BlockingCheck(HealthCheck):
+            check_id = 'blocking'
+
+            def run(self):
+                test.runs.append(1)
+                test.started.set()
+                test.released.wait(5)
+                return self.report(True, 'run {0}'.format(len(test.runs)))
+
+        self.check = BlockingCheck()
+
+    def call_in_threads(self, checker, count):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(checker()))
+                   for _ in range(count)]
+        threads[0].start()
+        self.assertTrue(self.started.wait(1))
+        for thread in threads[1:]:
+            thread.start()
+        for _ in range(100):
+            if checker.coalesced_calls == count - 1:
+                break
+            time.sleep(0.01)
+        self.released.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_share_one_run(self):
+        checker = HealthChecker([self.check], single_flight=True)
+
+        results = self.call_in_threads(checker, 4)
+
+        self.assertEqual(len(self.runs), 1)
+        self.assertEqual(checker.runs, 1)
+        self.assertEqual(checker.coalesced_calls, 3)
+        self.assertEqual(results, [(True, {
+            'blocking': {'details': 'run 1', 'status': 'ok'}})] * 4)
+
+    def test_later_calls_start_a_new_run(self):
+        checker = HealthChecker([self.check], single_flight=True)
+        self.released.set()
+
+        checker()
+        ok, details = checker()
+
+        self.assertEqual(details['blocking']['details'], 'run 2')
+        self.assertEqual(checker.runs, 2)
+        self.assertEqual(checker.coalesced_calls, 0)
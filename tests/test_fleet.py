@@ -0,0 +1,160 @@
+import json
+import os
+import tempfile
+
+from mock import patch
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from io import StringIO
+    from socketserver import ThreadingMixIn
+except ImportError:  # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from StringIO import StringIO
+
+from healthcheck.fleet import FleetHealthCheck, main, summarize
+from tests.test_network import ServerTestCase
+
+STATUSES = {
+    '/ok/': (200, {'db': {'status': 'ok', 'details': 'ok'},
+                   'cache': {'status': 'ok', 'details': 'ok'}}),
+    '/failed/': (500, {'db': {'status': 'FAILED', 'details': 'down'},
+                       'cache': {'status': 'ok', 'details': 'ok'}}),
+    '/empty/': (200, 'There were no checks.'),
+}
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    # Nodes are polled concurrently, over kept-alive connections.
+    pass
+
+
+class NodeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_GET(self):
+        if self.path in STATUSES:
+            status, data = STATUSES[self.path]
+            body = json.dumps(data).encode('utf-8')
+        else:
+            status, body = 200, b'<html>'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FleetTestCase(ServerTestCase):
+    def setUp(self):
+        self.server = self.start_server(ThreadingHTTPServer, NodeHandler)
+        self.base = 'http://127.0.0.1:{0}'.format(
+            self.server.server_address[1])
+
+    def urls(self, *paths):
+        return [self.base + path for path in paths]
+
+
+class TestFleetHealthCheck(FleetTestCase):
+    def test_all_nodes_ready(self):
+        urls = self.urls('/ok/', '/empty/')
+        check = self.make_check(FleetHealthCheck, urls)
+
+        result = check.execute()
+
+        self.assertTrue(result.is_ok)
+        self.assertEqual(result.details['ready_percent'], 100.0)
+        node = result.details['nodes'][urls[0]]
+        self.assertEqual(node['status'], 'ok')
+        self.assertEqual(node['checks'], {'db': 'ok', 'cache': 'ok'})
+        self.assertIn('latency_ms', node)
+        self.assertEqual(result.details['nodes'][urls[1]]['checks'], {})
+
+    def test_failed_node_shows_failed_checks(self):
+        urls = self.urls('/ok/', '/failed/')
+        check = self.make_check(FleetHealthCheck, urls)
+
+        result = check.execute()
+
+        self.assertFalse(result.is_ok)
+        self.assertEqual(result.details['ready_percent'], 50.0)
+        self.assertEqual(result.details['nodes'][urls[1]]['http_status'], 500)
+        self.assertEqual(result.details['checks'], {
+            'db': {'ok': 1, 'failed': 1, 'failed_nodes': [urls[1]]},
+            'cache': {'ok': 2, 'failed': 0, 'failed_nodes': []},
+        })
+
+    def test_min_ready_percent(self):
+        urls = self.urls('/ok/', '/failed/')
+        check = self.make_check(FleetHealthCheck, urls, min_ready_percent=50)
+        self.assertTrue(check.execute().is_ok)
+
+    def test_invalid_status_isnt_ready(self):
+        url = self.urls('/html/')[0]
+        result = self.make_check(FleetHealthCheck, [url]).execute()
+        self.assertEqual(result.details['nodes'][url]['details'],
+                         'invalid JSON status')
+
+    def test_unreachable_node_isnt_ready(self):
+        url = 'http://127.0.0.1:{0}/'.format(self.unused_port())
+        result = self.make_check(FleetHealthCheck, [url]).execute()
+        self.assertEqual(result.details['nodes'][url]['status'], 'FAILED')
+        self.assertEqual(result.details['ready_percent'], 0.0)
+
+    def test_connections_are_kept_alive(self):
+        check = self.make_check(FleetHealthCheck, self.urls('/ok/'))
+        check.execute()
+        check.execute()
+        self.assertEqual(self.server.connections, 1)
+
+
+class TestSummarize(FleetTestCase):
+    def test_summarize(self):
+        ok, details = summarize({
+            'a': {'status': 'ok', 'checks': {'db': 'ok'}},
+            'b': {'status': 'ok', 'checks': {'db': 'ok'}},
+            'c': {'status': 'FAILED', 'details': 'refused'},
+        }, min_ready_percent=66)
+
+        self.assertTrue(ok)
+        self.assertEqual(details['ready_percent'], 66.67)
+        self.assertEqual(details['checks'],
+                         {'db': {'ok': 2, 'failed': 0, 'failed_nodes': []}})
+
+
+class TestCommand(FleetTestCase):
+    def run_main(self, argv):
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            status = main(argv)
+        return status, stdout.getvalue()
+
+    def test_summary(self):
+        urls = self.urls('/ok/', '/failed/')
+        status, output = self.run_main(urls)
+
+        self.assertEqual(status, 1)
+        lines = output.splitlines()
+        self.assertEqual(lines[0], 'FAILED: 1 of 2 nodes ready (50.0%)')
+        self.assertRegexpMatches(
+            lines[1], r'/failed/ +FAILED +[\d.]+ms  HTTP 500; failed: db$')
+        self.assertEqual(lines[-1], '  db: 1 ok, 1 failed ({0})'.format(
+            urls[1]))
+
+    def test_urls_from_file_and_json_output(self):
+        fd, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'w') as f:
+            f.write('# web nodes\n{0}\n\n'.format(self.urls('/ok/')[0]))
+
+        status, output = self.run_main(['--file', path, '--json'])
+
+        self.assertEqual(status, 0)
+        self.assertEqual(json.loads(output)['details']['ready_percent'],
+                         100.0)
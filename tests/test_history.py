@@ -0,0 +1,197 @@
+import threading
+from unittest import TestCase
+
+from healthcheck.checks import CheckResult, HealthCheck, HealthChecker
+from healthcheck.history import CheckHistory, HealthHistory
+
+
+def ok(duration=0.01):
+    return CheckResult(CheckResult.OK, 'ok', duration=duration)
+
+
+def failed(duration=0.01):
+    return CheckResult(CheckResult.FAILED, 'down', duration=duration)
+
+
+class ToggledCheck(HealthCheck):
+    check_id = 'toggled'
+
+    def __init__(self, **kwargs):
+        super(ToggledCheck, self).__init__(**kwargs)
+        self.ok = True
+
+    def run(self):
+        return self.report(self.ok, 'ok' if self.ok else 'down')
+
+
+class HangingCheck(HealthCheck):
+    check_id = 'hanging'
+
+    def __init__(self, **kwargs):
+        super(HangingCheck, self).__init__(**kwargs)
+        self.release = threading.Event()
+
+    def run(self):
+        self.release.wait(5)
+        return self.report(True, 'ok')
+
+
+class TestCheckHistory(TestCase):
+    def setUp(self):
+        self.runs = CheckHistory(4)
+
+    def append(self, *statuses):
+        for status in statuses:
+            self.runs.append(status, 0.001, 100.0)
+
+    def test_keeps_the_last_runs(self):
+        for i in range(6):
+            self.runs.append(CheckResult.OK, i / 1000.0, float(i))
+
+        self.assertEqual(len(self.runs), 4)
+        self.assertEqual([run[0] for run in self.runs.runs()],
+                         [2.0, 3.0, 4.0, 5.0])
+
+    def test_counts_are_updated_as_runs_drop_out(self):
+        self.append(CheckResult.FAILED, CheckResult.OK, CheckResult.FAILED,
+                    CheckResult.OK)
+        self.assertEqual(self.runs.failures, 2)
+        self.assertEqual(self.runs.status_changes, 3)
+
+        self.append(CheckResult.OK, CheckResult.OK)
+
+        self.assertEqual(self.runs.failures, 1)
+        self.assertEqual(self.runs.status_changes, 1)
+        self.assertEqual(self.runs.failure_rate, 0.25)
+
+    def test_recent_failures(self):
+        self.append(CheckResult.FAILED, CheckResult.FAILED, CheckResult.OK)
+        self.assertEqual(self.runs.recent_failures(2), 1)
+        self.assertEqual(self.runs.recent_failures(10), 2)
+
+    def test_duration_percentile_ignores_unknown_durations(self):
+        for duration in (0.004, None, 0.001, 0.002):
+            self.runs.append(CheckResult.OK, duration, 100.0)
+
+        self.assertEqual(self.runs.duration_percentile(0.5), 0.002)
+        self.assertEqual(self.runs.duration_percentile(0.99), 0.004)
+        self.assertEqual(self.runs.runs()[1], (100.0, CheckResult.OK, None))
+
+    def test_empty(self):
+        self.assertEqual(self.runs.failure_rate, 0.0)
+        self.assertIsNone(self.runs.duration_percentile(0.5))
+        self.assertEqual(self.runs.runs(), [])
+
+
+class TestHealthHistory(TestCase):
+    def test_describe(self):
+        history = HealthHistory(size=10)
+        history.record('db', ok(0.002), timestamp=1.0)
+        history.record('db', failed(0.004), timestamp=2.0)
+
+        self.assertEqual(history.describe('db', include_runs=True), {
+            'runs': 2,
+            'failures': 1,
+            'failure_rate': 0.5,
+            'status_changes': 1,
+            'flapping': False,
+            'duration_ms': {'p50': 2.0, 'p90': 4.0, 'p99': 4.0},
+            'recent_runs': [
+                {'timestamp': 1.0, 'status': 'ok', 'duration_ms': 2.0},
+                {'timestamp': 2.0, 'status': 'FAILED', 'duration_ms': 4.0},
+            ],
+        })
+        self.assertIsNone(history.describe('cache'))
+
+    def test_flapping(self):
+        history = HealthHistory(size=10, flapping_threshold=0.5)
+        for i in range(9):
+            history.record('db', ok() if i % 2 else failed())
+        self.assertFalse(history.is_flapping('db'))
+
+        history.record('db', ok())
+
+        self.assertTrue(history.is_flapping('db'))
+
+    def test_steady_failure_isnt_flapping(self):
+        history = HealthHistory(size=10)
+        for _ in range(10):
+            history.record('db', failed())
+        self.assertFalse(history.is_flapping('db'))
+
+    def test_invalid_thresholds(self):
+        with self.assertRaisesRegexp(ValueError, 'fail_threshold'):
+            HealthHistory(size=5, fail_threshold=3, fail_window=10)
+        with self.assertRaisesRegexp(ValueError, 'fail_threshold'):
+            HealthHistory(fail_threshold=3, fail_window=2)
+
+
+class TestCheckerHistory(TestCase):
+    def setUp(self):
+        self.check = ToggledCheck()
+
+    def test_runs_are_recorded(self):
+        history = HealthHistory()
+        checker = HealthChecker([self.check], history=history)
+
+        checker()
+        self.check.ok = False
+        checker()
+
+        self.assertEqual(history.describe('toggled')['failures'], 1)
+
+    def test_timeouts_are_recorded_as_failures(self):
+        history = HealthHistory()
+        checker = HealthChecker([self.check], history=history)
+
+        checker._timed_out(self.check, 0)
+
+        self.assertEqual(history.describe('toggled')['failures'], 1)
+
+    def test_late_results_of_timed_out_runs_arent_recorded(self):
+        history = HealthHistory()
+        check = HangingCheck(timeout=0.01)
+        self.addCleanup(check.release.set)
+        checker = HealthChecker([check], history=history)
+
+        for _ in range(3):
+            check.release.clear()
+            ok, _ = checker()
+            self.assertFalse(ok)
+            check.release.set()
+            # Wait for the run to finish late.
+            checker.shutdown()
+
+        description = history.describe('hanging')
+        self.assertEqual(description['runs'], 3)
+        self.assertEqual(description['failure_rate'], 1)
+        self.assertEqual(description['status_changes'], 0)
+
+    def test_without_threshold_latest_result_decides(self):
+        checker = HealthChecker([self.check], history=HealthHistory())
+        self.check.ok = False
+        ok, _ = checker()
+        self.assertFalse(ok)
+
+    def test_hysteresis(self):
+        checker = HealthChecker([self.check], history=HealthHistory(
+            fail_threshold=2, fail_window=3))
+
+        statuses = []
+        for check_ok in (True, False, True, False, False, True, True, True):
+            self.check.ok = check_ok
+            ok, details = checker()
+            statuses.append(ok)
+
+        self.assertEqual(
+            statuses, [True, True, True, False, False, False, True, True])
+        self.assertEqual(details['toggled']['status'], 'ok')
+
+    def test_tagged_checkers_share_history(self):
+        history = HealthHistory()
+        self.check.tags = ('live',)
+        checker = HealthChecker([self.check], history=history)
+
+        checker.for_tags(['live'])()
+
+        self.assertEqual(history.describe('toggled')['runs'], 1)
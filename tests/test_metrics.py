@@ -0,0 +1,132 @@
+import threading
+from unittest import TestCase
+
+from mock import patch
+
+from healthcheck.checks import CheckResult, HealthCheck, HealthChecker
+from healthcheck.metrics import MetricsRegistry
+
+
+class MyCheck(HealthCheck):
+    check_id = 'my "check"'
+
+    def run(self):
+        return self.report(self.mock_ok, 'details')
+
+
+class HangingCheck(HealthCheck):
+    check_id = 'hanging'
+
+    def __init__(self, **kwargs):
+        super(HangingCheck, self).__init__(**kwargs)
+        self.release = threading.Event()
+
+    def run(self):
+        self.release.wait(5)
+        return self.report(True, 'ok')
+
+
+class TestMetricsRegistry(TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry(buckets=(0.1, 1))
+
+    def assert_rendered(self, *lines):
+        rendered = self.registry.render().splitlines()
+        for line in lines:
+            self.assertIn(line, rendered)
+
+    def test_duration_histogram(self):
+        self.registry.observe('c', CheckResult('ok', duration=0.05))
+        self.registry.observe('c', CheckResult('ok', duration=0.5))
+        self.registry.observe('c', CheckResult('ok', duration=5.0))
+        self.assert_rendered(
+            '# TYPE healthcheck_check_duration_seconds histogram',
+            'healthcheck_check_duration_seconds_bucket{check="c",le="0.1"} 1',
+            'healthcheck_check_duration_seconds_bucket{check="c",le="1"} 2',
+            'healthcheck_check_duration_seconds_bucket{check="c",le="+Inf"} 3',
+            'healthcheck_check_duration_seconds_sum{check="c"} 5.55',
+            'healthcheck_check_duration_seconds_count{check="c"} 3',
+        )
+
+    @patch('time.time', return_value=1500000000.0)
+    def test_outcome_counters(self, time_mock):
+        self.registry.observe('c', CheckResult('ok', duration=0))
+        self.registry.observe('c', CheckResult('FAILED', duration=0))
+        self.registry.observe_timeout('c')
+        self.assert_rendered(
+            'healthcheck_check_runs_total{check="c"} 3',
+            'healthcheck_check_failures_total{check="c"} 2',
+            'healthcheck_check_timeouts_total{check="c"} 1',
+            'healthcheck_check_up{check="c"} 0',
+            'healthcheck_check_last_success_timestamp_seconds{check="c"} '
+            '1500000000.0',
+        )
+
+    def test_item_durations(self):
+        self.registry.observe('c', CheckResult(
+            'ok', duration=0.5, item_durations={'/tmp/x': 0.2}))
+        self.assert_rendered(
+            'healthcheck_item_duration_seconds_bucket'
+            '{check="c",item="/tmp/x",le="1"} 1',
+        )
+
+    def test_label_values_are_escaped(self):
+        self.registry.observe('a "b"\\c', CheckResult('ok', duration=0))
+        self.assert_rendered(
+            'healthcheck_check_runs_total{check="a \\"b\\"\\\\c"} 1')
+
+
+class TestHealthCheckerMetrics(TestCase):
+    def test_runs_are_recorded(self):
+        registry = MetricsRegistry()
+        check = MyCheck()
+        check.mock_ok = False
+        HealthChecker([check], metrics=registry)()
+        self.assertIn(
+            'healthcheck_check_failures_total{check="my \\"check\\""} 1',
+            registry.render().splitlines())
+
+    def test_timeouts_are_failures(self):
+        registry = MetricsRegistry()
+        check = HangingCheck(timeout=0.01)
+        self.addCleanup(check.release.set)
+
+        ok, _ = HealthChecker([check], metrics=registry)()
+
+        self.assertFalse(ok)
+        lines = registry.render().splitlines()
+        self.assertIn('healthcheck_check_up{check="hanging"} 0', lines)
+        self.assertIn('healthcheck_check_failures_total{check="hanging"} 1',
+                      lines)
+        self.assertIn('healthcheck_check_timeouts_total{check="hanging"} 1',
+                      lines)
+
+    def test_late_results_of_timed_out_runs_are_dropped(self):
+        registry = MetricsRegistry()
+        check = HangingCheck(timeout=0.01)
+        self.addCleanup(check.release.set)
+        checker = HealthChecker([check], metrics=registry)
+
+        for _ in range(3):
+            ok, _ = checker()
+            self.assertFalse(ok)
+        check.release.set()
+        # Wait for the hung run to finish.
+        checker.shutdown()
+
+        lines = registry.render().splitlines()
+        self.assertIn('healthcheck_check_runs_total{check="hanging"} 3', lines)
+        self.assertIn('healthcheck_check_up{check="hanging"} 0', lines)
+        self.assertNotIn(
+            'healthcheck_check_last_success_timestamp_seconds'
+            '{check="hanging"}', ' '.join(lines))
+
+    def test_durations_are_included_on_request(self):
+        check = MyCheck()
+        check.mock_ok = True
+
+        ok, details = HealthChecker([check], include_durations=True)()
+
+        self.assertEqual(set(details['my "check"']),
+                         set(['status', 'details', 'duration_ms']))
+        self.assertGreaterEqual(details['my "check"']['duration_ms'], 0)
@@ -0,0 +1,180 @@
+import socket
+import threading
+from unittest import TestCase
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import StreamRequestHandler, ThreadingTCPServer
+except ImportError:  # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import StreamRequestHandler, ThreadingTCPServer
+
+from healthcheck.network import (
+    HTTPHealthCheck, NetworkHealthCheck, TCPHealthCheck)
+
+
+class PingHandler(StreamRequestHandler):
+    def handle(self):
+        self.server.connections += 1
+        for line in self.rfile:
+            if line == b'PING\r\n':
+                self.wfile.write(b'+PONG\r\n')
+            else:
+                self.wfile.write(b'-ERR\r\n')
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_GET(self):
+        status = int(self.path.strip('/') or 200)
+        body = b'status'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ServerTestCase(TestCase):
+    def start_server(self, server_class, handler):
+        server = server_class(('127.0.0.1', 0), handler)
+        server.daemon_threads = True
+        server.connections = 0
+        thread = threading.Thread(target=server.serve_forever,
+                                  kwargs={'poll_interval': 0.01})
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def unused_port(self):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        return port
+
+    def make_check(self, check_class, items, **kwargs):
+        check = check_class(items, **kwargs)
+        self.addCleanup(check.shutdown)
+        return check
+
+
+class TestNetworkHealthCheck(TestCase):
+    def test_connect_and_probe_must_be_overridden(self):
+        class MyCheck(NetworkHealthCheck):
+            check_id = 'check_id'
+
+        check = MyCheck(items=['target'])
+        self.assertRaisesRegexp(
+            ValueError, 'You must override "connect" method for check '
+            'MyCheck', check.connect, 'target')
+        self.assertRaisesRegexp(
+            ValueError, 'You must override "probe" method for check MyCheck',
+            check.probe, None, 'target')
+
+
+class TestTCPHealthCheck(ServerTestCase):
+    def setUp(self):
+        self.server = self.start_server(ThreadingTCPServer, PingHandler)
+        self.port = self.server.server_address[1]
+        self.target = '127.0.0.1:{0}'.format(self.port)
+
+    def test_accepting_target_is_ok(self):
+        check = self.make_check(TCPHealthCheck, [self.target])
+
+        result = check.execute()
+
+        self.assertTrue(result.is_ok)
+        self.assertEqual(result.details[self.target]['status'], 'ok')
+        self.assertIn('latency_ms', result.details[self.target])
+
+    def test_refusing_target_fails(self):
+        closed = ('127.0.0.1', self.unused_port())
+        check = self.make_check(TCPHealthCheck, [self.target, closed])
+
+        result = check.execute()
+
+        self.assertFalse(result.is_ok)
+        details = result.details['127.0.0.1:{0}'.format(closed[1])]
+        self.assertEqual(details['status'], 'FAILED')
+        self.assertIn('details', details)
+        self.assertEqual(result.details[self.target]['status'], 'ok')
+
+    def test_exchange_reuses_connection(self):
+        check = self.make_check(TCPHealthCheck, [self.target],
+                                send=b'PING\r\n', expect=b'+PONG')
+
+        self.assertTrue(check.execute().is_ok)
+        self.assertTrue(check.execute().is_ok)
+
+        self.assertEqual(self.server.connections, 1)
+
+    def test_unexpected_answer_fails(self):
+        check = self.make_check(TCPHealthCheck, [self.target],
+                                send=b'HELLO\r\n', expect=b'+PONG',
+                                read_timeout=0.2)
+        result = check.execute()
+        self.assertFalse(result.is_ok)
+        self.assertRegexpMatches(result.details[self.target]['details'],
+                                 'timed out$')
+
+
+class TestHTTPHealthCheck(ServerTestCase):
+    def setUp(self):
+        self.server = self.start_server(HTTPServer, StatusHandler)
+        self.url = 'http://127.0.0.1:{0}/'.format(
+            self.server.server_address[1])
+
+    def test_ok_status(self):
+        check = self.make_check(HTTPHealthCheck, [self.url])
+
+        result = check.execute()
+
+        self.assertTrue(result.is_ok)
+        self.assertEqual(result.details[self.url]['http_status'], 200)
+        self.assertIn('latency_ms', result.details[self.url])
+
+    def test_error_status_fails(self):
+        check = self.make_check(HTTPHealthCheck, [self.url + '503'])
+        result = check.execute()
+        self.assertFalse(result.is_ok)
+        self.assertEqual(result.details[self.url + '503']['status'], 'FAILED')
+
+    def test_expected_statuses(self):
+        check = self.make_check(HTTPHealthCheck, [self.url + '404'],
+                                expected_statuses=[404])
+        self.assertTrue(check.execute().is_ok)
+
+    def test_connections_are_kept_alive(self):
+        check = self.make_check(HTTPHealthCheck, [self.url])
+
+        for _ in range(3):
+            self.assertTrue(check.execute().is_ok)
+
+        self.assertEqual(self.server.connections, 1)
+
+    def test_closed_idle_connection_is_replaced(self):
+        check = self.make_check(HTTPHealthCheck, [self.url])
+        check.execute()
+        for connection in check._get_pool(check.pool_key(self.url))._idle:
+            connection.sock.shutdown(socket.SHUT_RDWR)
+
+        self.assertTrue(check.execute().is_ok)
+
+    def test_unreachable_target_fails(self):
+        url = 'http://127.0.0.1:{0}/'.format(self.unused_port())
+        result = self.make_check(HTTPHealthCheck, [url]).execute()
+        self.assertFalse(result.is_ok)
+
+    def test_unsupported_url(self):
+        self.assertRaisesRegexp(ValueError, 'Unsupported URL: ftp://x/',
+                                HTTPHealthCheck, ['ftp://x/'])
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from healthcheck.breaker import CircuitBreaker
+from healthcheck.checks import HealthCheck, HealthChecker
+from healthcheck.process import ProcessCheckPool
+from healthcheck.utils import monotonic
+
+
+class PidCheck(HealthCheck):
+    check_id = 'pid'
+
+    def run(self):
+        return self.report(True, os.getpid())
+
+
+class SleepingCheck(HealthCheck):
+    """Sleeps for `delay` seconds."""
+    check_id = 'sleeping'
+
+    def __init__(self, delay, **kwargs):
+        super(SleepingCheck, self).__init__(**kwargs)
+        self.delay = delay
+
+    def run(self):
+        time.sleep(self.delay)
+        return self.report(True, 'woke up')
+
+
+class UnpicklableCheck(HealthCheck):
+    check_id = 'unpicklable'
+
+    def run(self):
+        return self.report(True, threading.Lock())
+
+
+class TestProcessCheckPool(TestCase):
+    def make_pool(self, checks, **kwargs):
+        pool = ProcessCheckPool(checks, **kwargs)
+        self.addCleanup(pool.shutdown)
+        return pool
+
+    def test_check_runs_in_worker_process(self):
+        check = PidCheck()
+        pool = self.make_pool([check])
+
+        result = pool.run(check)
+
+        self.assertTrue(result.is_ok)
+        self.assertNotEqual(result.details, os.getpid())
+        self.assertIsNotNone(result.duration)
+
+    def test_workers_are_reused(self):
+        check = PidCheck()
+        pool = self.make_pool([check])
+        self.assertEqual(pool.run(check).details, pool.run(check).details)
+
+    def test_hung_worker_is_killed_and_replaced(self):
+        check = SleepingCheck(60, timeout=0.1)
+        pid_check = PidCheck()
+        pool = self.make_pool([check, pid_check])
+        worker_pid = pool.run(pid_check).details
+
+        start = monotonic()
+        result = pool.run(check)
+
+        self.assertLess(monotonic() - start, 5)
+        self.assertFalse(result.is_ok)
+        self.assertRegexpMatches(
+            result.details, r'^timed out after \d+ms, worker killed$')
+        self.assertRaises(OSError, os.kill, worker_pid, 0)
+        new_pid = pool.run(pid_check).details
+        self.assertNotEqual(new_pid, worker_pid)
+
+    def test_pool_timeout_applies_to_checks_without_one(self):
+        check = SleepingCheck(60)
+        pool = self.make_pool([check], timeout=0.1)
+        self.assertFalse(pool.run(check).is_ok)
+
+    @patch('healthcheck.process.logger', Mock())
+    def test_unpicklable_result_is_failed(self):
+        check = UnpicklableCheck()
+        result = self.make_pool([check]).run(check)
+        self.assertFalse(result.is_ok)
+        self.assertRegexpMatches(result.details,
+                                 r"^ERROR: result can't be sent: ")
+
+    def test_only_pool_checks_can_run(self):
+        pool = self.make_pool([PidCheck()])
+        self.assertRaisesRegexp(ValueError, "Check 'pid' is not in the pool",
+                                pool.run, PidCheck())
+
+
+class TestIsolatedHealthChecker(TestCase):
+    def test_isolated_checks_run_in_worker_processes(self):
+        checker = HealthChecker([
+            PidCheck(isolated=True),
+            PidCheck(check_id='local'),
+        ])
+        self.addCleanup(checker.shutdown)
+
+        ok, details = checker()
+
+        self.assertTrue(ok)
+        self.assertNotEqual(details['pid']['details'], os.getpid())
+        self.assertEqual(details['local']['details'], os.getpid())
+
+    def test_deadline_kills_isolated_checks(self):
+        checker = HealthChecker([SleepingCheck(60, isolated=True)],
+                                deadline=0.1)
+        self.addCleanup(checker.shutdown)
+
+        ok, details = checker()
+
+        self.assertFalse(ok)
+        self.assertEqual(details['sleeping']['status'], 'FAILED')
+
+    def test_circuit_breaker_stays_in_calling_process(self):
+        check = SleepingCheck(60, timeout=0.1, isolated=True,
+                              circuit_breaker=CircuitBreaker(
+                                  failure_threshold=1, backoff=60))
+        checker = HealthChecker([check])
+        self.addCleanup(checker.shutdown)
+
+        checker()
+        # The call gives up as the run times out, before the worker process
+        # is killed and the breaker records the failure.
+        wait_until = monotonic() + 5
+        while (check.circuit_breaker.state != CircuitBreaker.OPEN and
+               monotonic() < wait_until):
+            time.sleep(0.01)
+        start = monotonic()
+        ok, details = checker()
+
+        self.assertLess(monotonic() - start, 0.1)
+        self.assertEqual(details['sleeping']['circuit_breaker']['state'],
+                         'open')
+
+    def test_tagged_checkers_share_worker_processes(self):
+        checker = HealthChecker([PidCheck(isolated=True, tags=['live'])])
+        self.addCleanup(checker.shutdown)
+        pid = checker()[1]['pid']['details']
+        self.assertEqual(checker.for_tags(['live'])()[1]['pid']['details'],
+                         pid)
@@ -0,0 +1,138 @@
+import threading
+import time
+from unittest import TestCase
+
+from healthcheck.checks import HealthCheck, HealthChecker
+from healthcheck.profiling import CheckProfiler, tracemalloc
+
+
+def build_list(size):
+    return [str(i) for i in range(size)]
+
+
+class AllocatingCheck(HealthCheck):
+    check_id = 'allocating'
+
+    def run(self):
+        self.kept = build_list(10000)
+        return self.report(True, 'ok')
+
+
+class QuickCheck(HealthCheck):
+    check_id = 'quick'
+
+    def run(self):
+        return self.report(True, 'ok')
+
+
+class SleepingCheck(HealthCheck):
+    def __init__(self, seconds, **kwargs):
+        super(SleepingCheck, self).__init__(**kwargs)
+        self.seconds = seconds
+
+    def run(self):
+        time.sleep(self.seconds)
+        return self.report(True, 'ok')
+
+
+class HungCheck(HealthCheck):
+    check_id = 'hung'
+
+    def __init__(self, **kwargs):
+        super(HungCheck, self).__init__(**kwargs)
+        self.release = threading.Event()
+
+    def run(self):
+        self.release.wait(5)
+        return self.report(True, 'ok')
+
+
+class TestCheckProfiler(TestCase):
+    def profile(self, **checker_kwargs):
+        profiler = CheckProfiler(top=50)
+        checker = HealthChecker([AllocatingCheck(), QuickCheck()],
+                                profiler=profiler, **checker_kwargs)
+        self.addCleanup(checker.shutdown)
+        with profiler:
+            ok, details = checker()
+        return ok, details, profiler.report()
+
+    def test_checks_are_measured(self):
+        ok, details, report = self.profile()
+
+        self.assertTrue(ok)
+        self.assertEqual(details['quick']['status'], 'ok')
+        self.assertEqual(sorted(report['checks']), ['allocating', 'quick'])
+        for measurements in report['checks'].values():
+            self.assertGreaterEqual(measurements['wall_ms'], 0)
+            self.assertGreaterEqual(measurements['cpu_ms'], 0)
+
+    def test_concurrent_checks_are_measured(self):
+        _, _, report = self.profile(max_workers=2)
+        self.assertEqual(sorted(report['checks']), ['allocating', 'quick'])
+
+    def test_hotspots(self):
+        _, _, report = self.profile()
+
+        functions = [hotspot['function'] for hotspot in report['hotspots']]
+        self.assertTrue(any(function.endswith('(build_list)')
+                            for function in functions))
+        hotspot = report['hotspots'][0]
+        self.assertEqual(sorted(hotspot),
+                         ['calls', 'cumulative_ms', 'function', 'own_ms'])
+
+    def test_allocations(self):
+        if tracemalloc is None:
+            self.skipTest('tracemalloc needs Python 3.4+')
+        _, _, report = self.profile()
+
+        self.assertGreater(report['checks']['allocating']['allocated_kb'],
+                           100)
+        allocations = report['allocations']
+        self.assertGreater(allocations['retained_kb'], 100)
+        self.assertTrue(any('test_profiling.py' in site['location']
+                            for site in allocations['top']))
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_allocations_arent_traced_outside_with_block(self):
+        profiler = CheckProfiler()
+        HealthChecker([QuickCheck()], profiler=profiler)()
+
+        report = profiler.report()
+
+        self.assertNotIn('allocations', report)
+        self.assertNotIn('allocated_kb', report['checks']['quick'])
+
+    def test_concurrent_checks_dont_wait_for_each_other(self):
+        profiler = CheckProfiler()
+        checker = HealthChecker(
+            [SleepingCheck(0.3, check_id='a', timeout=0.5),
+             SleepingCheck(0.3, check_id='b', timeout=0.5)],
+            max_workers=2, profiler=profiler)
+        self.addCleanup(checker.shutdown)
+
+        with profiler:
+            ok, details = checker()
+
+        self.assertTrue(ok, details)
+        report = profiler.report()
+        self.assertEqual(sorted(report['checks']), ['a', 'b'])
+        # They overlapped, so their allocations can't be told apart.
+        self.assertNotIn('allocated_kb', report['checks']['a'])
+
+    def test_hung_check_doesnt_hold_up_the_profiler(self):
+        check = HungCheck(timeout=0.1)
+        self.addCleanup(check.release.set)
+        profiler = CheckProfiler()
+        checker = HealthChecker([check, QuickCheck()], profiler=profiler)
+        self.addCleanup(checker.shutdown, wait=False)
+
+        start = time.time()
+        with profiler:
+            ok, details = checker()
+        report = profiler.report()
+
+        self.assertLess(time.time() - start, 1)
+        self.assertFalse(ok)
+        self.assertEqual(details['quick']['status'], 'ok')
+        self.assertEqual(sorted(report['checks']), ['quick'])
@@ -0,0 +1,175 @@
+import threading
+import time
+from unittest import TestCase
+
+from mock import patch
+
+from healthcheck.checks import HealthCheck, HealthChecker
+from healthcheck.scheduler import HealthCheckScheduler
+
+
+class CountingCheck(HealthCheck):
+    check_id = 'counting'
+
+    def __init__(self, **kwargs):
+        super(CountingCheck, self).__init__(**kwargs)
+        self.runs = 0
+
+    def run(self):
+        self.runs += 1
+        return self.report(True, 'run {0}'.format(self.runs))
+
+
+class HangingCheck(HealthCheck):
+    check_id = 'hanging'
+
+    def __init__(self, **kwargs):
+        super(HangingCheck, self).__init__(**kwargs)
+        self.hang = threading.Event()
+        self.release = threading.Event()
+        self.runs = 0
+
+    def run(self):
+        self.runs += 1
+        if self.hang.is_set():
+            self.release.wait(5)
+        return self.report(True, 'ok')
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestHealthCheckScheduler(TestCase):
+    def setUp(self):
+        self.check = CountingCheck()
+
+    def test_run_check_keeps_latest_result(self):
+        scheduler = HealthCheckScheduler([self.check])
+        scheduler.run_check(self.check)
+        scheduler.run_check(self.check)
+        self.assertEqual(scheduler.snapshot()['counting'].details, 'run 2')
+
+    def test_check_interval_overrides_default(self):
+        scheduler = HealthCheckScheduler([], interval=10, jitter=0)
+        self.assertEqual(scheduler.next_delay(self.check), 10)
+        self.assertEqual(
+            scheduler.next_delay(CountingCheck(interval=30)), 30)
+
+    @patch('random.uniform', return_value=0.5)
+    def test_jitter_scales_interval(self, uniform_mock):
+        scheduler = HealthCheckScheduler([], interval=10, jitter=0.5)
+        self.assertEqual(scheduler.next_delay(self.check), 15)
+        uniform_mock.assert_called_once_with(-0.5, 0.5)
+
+    def test_checks_run_periodically_in_background(self):
+        scheduler = HealthCheckScheduler([self.check], interval=0.01)
+        scheduler.start()
+        self.addCleanup(scheduler.stop)
+
+        self.assertTrue(wait_for(lambda: self.check.runs >= 3))
+
+        scheduler.stop()
+        runs = self.check.runs
+        time.sleep(0.05)
+        self.assertEqual(self.check.runs, runs)
+
+    def test_checker_returns_snapshot(self):
+        scheduler = HealthCheckScheduler([self.check])
+        scheduler.run_check(self.check)
+        checker = HealthChecker([self.check], cache=scheduler)
+
+        self.assertEqual(checker(), checker())
+        self.assertEqual(checker()[1], {
+            'counting': {'details': 'run 1', 'status': 'ok'}})
+        self.assertEqual(self.check.runs, 1)
+
+    def test_checker_runs_checks_without_result_yet(self):
+        scheduler = HealthCheckScheduler([self.check])
+        checker = HealthChecker([self.check], cache=scheduler)
+
+        ok, details = checker()
+
+        self.assertTrue(ok)
+        self.assertEqual(self.check.runs, 1)
+        self.assertEqual(scheduler.snapshot()['counting'].details, 'run 1')
+
+    def test_timed_out_check_fails_and_isnt_run_again(self):
+        check = HangingCheck(timeout=0.05)
+        self.addCleanup(check.release.set)
+        scheduler = HealthCheckScheduler([check])
+        self.addCleanup(scheduler.stop)
+        scheduler.run_check(check)
+        check.hang.set()
+
+        start = time.time()
+        scheduler.run_check(check)
+        scheduler.run_check(check)
+
+        self.assertLess(time.time() - start, 1)
+        result = scheduler.snapshot()['hanging']
+        self.assertEqual(result.status, 'FAILED')
+        self.assertRegexpMatches(result.details, '^timed out after')
+        self.assertEqual(check.runs, 2)
+
+        check.release.set()
+        check.hang.clear()
+        self.assertTrue(wait_for(lambda: not scheduler._running))
+        scheduler.run_check(check)
+        self.assertTrue(scheduler.snapshot()['hanging'].is_ok)
+
+    def test_hung_check_doesnt_hold_up_others(self):
+        check = HangingCheck(timeout=0.05, interval=0.01)
+        check.hang.set()
+        self.addCleanup(check.release.set)
+        scheduler = HealthCheckScheduler([check, self.check], interval=0.01)
+        scheduler.start()
+        self.addCleanup(scheduler.stop)
+
+        self.assertTrue(wait_for(lambda: self.check.runs >= 5))
+
+    def test_max_workers(self):
+        check = HangingCheck(interval=0.01)
+        check.hang.set()
+        self.addCleanup(check.release.set)
+        scheduler = HealthCheckScheduler(
+            [check, self.check], interval=0.01, max_workers=2)
+        scheduler.start()
+        self.addCleanup(scheduler.stop)
+
+        self.assertTrue(wait_for(lambda: self.check.runs >= 5))
+
+    def test_old_results_are_stale(self):
+        scheduler = HealthCheckScheduler([self.check], max_age=0.05)
+        scheduler.run_check(self.check)
+        checker = HealthChecker([self.check], cache=scheduler)
+        self.assertTrue(checker()[0])
+
+        time.sleep(0.06)
+        ok, details = checker()
+
+        self.assertFalse(ok)
+        self.assertRegexpMatches(details['counting']['details'],
+                                 '^stale, no result for')
+        self.assertEqual(scheduler.snapshot()['counting'].status, 'FAILED')
+        self.assertEqual(self.check.runs, 1)
+
+    def test_max_age_defaults_to_three_intervals(self):
+        scheduler = HealthCheckScheduler([], interval=10)
+        self.assertEqual(scheduler.max_age_for(self.check), 30)
+        self.assertEqual(
+            scheduler.max_age_for(CountingCheck(timeout=2, interval=1)), 5)
+
+    def test_old_results_of_unscheduled_checks_are_renewed(self):
+        scheduler = HealthCheckScheduler([], max_age=0.05)
+        checker = HealthChecker([self.check], cache=scheduler)
+        checker()
+
+        time.sleep(0.06)
+        ok, details = checker()
+
+        self.assertTrue(ok)
+        self.assertEqual(details['counting']['details'], 'run 2')
@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from healthcheck.checks import HealthCheck, HealthChecker
+from healthcheck.shared import SharedResultCache
+
+
+class PidCheck(HealthCheck):
+    """Reports the ID of the process which ran it."""
+    check_id = 'pid'
+
+    def run(self):
+        return self.report(True, {'pid': os.getpid()})
+
+
+class TestSharedResultCache(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'results')
+        self.cache = self.make_cache()
+        self.check = PidCheck()
+
+    def make_cache(self, **kwargs):
+        kwargs.setdefault('ttl', 60)
+        cache = SharedResultCache(self.path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def fetch(self, cache):
+        return cache.fetch(self.check, HealthCheck.execute)
+
+    def fetch_in_other_process(self, **kwargs):
+        process = multiprocessing.Process(
+            target=self.fetch, args=(self.make_cache(**kwargs),))
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        return process.pid
+
+    def test_result_is_shared_between_processes(self):
+        pid = self.fetch_in_other_process()
+
+        checker = HealthChecker([self.check], cache=self.cache)
+        ok, details = checker()
+
+        self.assertTrue(ok)
+        self.assertEqual(details, {'pid': {
+            'details': {'pid': pid}, 'status': 'ok'}})
+
+    def test_expired_result_is_refreshed(self):
+        cache = self.make_cache(ttl=0)
+        self.fetch_in_other_process(ttl=0)
+        self.assertEqual(self.fetch(cache).details, {'pid': os.getpid()})
+
+    def test_only_one_process_holds_the_lease(self):
+        other_cache = self.make_cache()
+        self.assertTrue(other_cache._claim(self.check))
+        self.assertFalse(self.cache._claim(self.check))
+
+    def test_lease_runs_out(self):
+        other_cache = self.make_cache(lease_time=0)
+        self.assertTrue(other_cache._claim(self.check))
+        self.assertTrue(self.cache._claim(self.check))
+
+    def test_expired_result_is_returned_while_leased(self):
+        cache = self.make_cache(ttl=0)
+        pid = self.fetch_in_other_process(ttl=0)
+        self.assertTrue(self.make_cache()._claim(self.check))
+
+        result = self.fetch(cache)
+
+        self.assertEqual(result.details, {'pid': pid})
+
+    @patch('healthcheck.shared.logger', Mock())
+    def test_results_that_dont_fit_are_not_shared(self):
+        cache = self.make_cache(size=16)
+        self.assertTrue(self.fetch(cache).is_ok)
+        self.assertEqual(cache._lookup(self.check), (None, False))
+
+    def test_clear(self):
+        self.fetch(self.cache)
+        self.cache.clear()
+        self.assertEqual(self.cache._lookup(self.check), (None, False))
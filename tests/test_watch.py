@@ -0,0 +1,129 @@
+import errno
+import os
+import shutil
+import sys
+import tempfile
+import time
+from unittest import TestCase, skipUnless
+
+from mock import patch
+
+from healthcheck.checks import FilesDontExistHealthCheck
+from healthcheck.watch import PathWatcher
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+class PathWatcherTestMixin(object):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'quiesce')
+        self.watcher = self.make_watcher()
+        self.addCleanup(self.watcher.stop)
+
+    def touch(self, path):
+        open(path, 'w').close()
+
+    def test_existing_path(self):
+        self.touch(self.path)
+        self.watcher.watch(self.path)
+        self.assertTrue(self.watcher.exists(self.path))
+
+    def test_created_and_removed_path(self):
+        self.watcher.watch(self.path)
+        self.watcher.start()
+        self.assertFalse(self.watcher.exists(self.path))
+
+        self.touch(self.path)
+        self.assertTrue(wait_for(lambda: self.watcher.exists(self.path)))
+
+        os.remove(self.path)
+        self.assertTrue(wait_for(lambda: not self.watcher.exists(self.path)))
+
+    def test_unwatched_path_is_watched_on_lookup(self):
+        self.watcher.start()
+        self.assertFalse(self.watcher.exists(self.path))
+        self.touch(self.path)
+        self.assertTrue(wait_for(lambda: self.watcher.exists(self.path)))
+
+    def test_path_in_missing_directory(self):
+        subdirectory = os.path.join(self.directory, 'sub')
+        path = os.path.join(subdirectory, 'quiesce')
+        self.watcher.watch(path)
+        self.watcher.start()
+        self.assertFalse(self.watcher.exists(path))
+
+        os.mkdir(subdirectory)
+        self.touch(path)
+        self.assertTrue(wait_for(lambda: self.watcher.exists(path)))
+
+    @patch('healthcheck.watch.file_exists')
+    def test_errors_are_raised_on_lookup(self, file_exists_mock):
+        file_exists_mock.side_effect = OSError(errno.EACCES,
+                                               'Permission denied')
+        self.watcher.watch(self.path)
+        with self.assertRaises(OSError):
+            self.watcher.exists(self.path)
+
+
+@skipUnless(sys.platform.startswith('linux'), 'inotify is Linux only')
+class TestInotifyPathWatcher(PathWatcherTestMixin, TestCase):
+    def make_watcher(self):
+        # A long poll interval shows that changes come from inotify.
+        watcher = PathWatcher(poll_interval=0.05)
+        self.assertTrue(watcher.uses_inotify)
+        return watcher
+
+    def test_changes_are_seen_without_polling(self):
+        self.watcher.poll_interval = 60
+        self.watcher.watch(self.path)
+        self.watcher.start()
+
+        self.touch(self.path)
+
+        self.assertTrue(wait_for(lambda: self.watcher.exists(self.path)))
+
+    def test_watched_paths_are_polled(self):
+        # Like changes made by another NFS client, which inotify misses.
+        self.watcher.watch(self.path)
+        with patch.object(self.watcher, '_handle_events'):
+            self.watcher.start()
+            self.touch(self.path)
+
+            self.assertTrue(wait_for(lambda: self.watcher.exists(self.path)))
+
+
+class TestPollingPathWatcher(PathWatcherTestMixin, TestCase):
+    def make_watcher(self):
+        watcher = PathWatcher(poll_interval=0.01, use_inotify=False)
+        self.assertFalse(watcher.uses_inotify)
+        return watcher
+
+
+class TestFilesHealthCheckWithWatcher(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'quiesce')
+        self.watcher = PathWatcher()
+        self.addCleanup(self.watcher.stop)
+
+    def test_existence_comes_from_watcher(self):
+        check = FilesDontExistHealthCheck(
+            (self.path,), check_id='quiesce', watcher=self.watcher)
+        self.watcher.start()
+        self.assertTrue(check.run().is_ok)
+
+        open(self.path, 'w').close()
+
+        self.assertTrue(wait_for(lambda: not check.run().is_ok))
+        with patch('os.stat') as stat_mock:
+            self.assertEqual(check.run().details,
+                             {self.path: 'FILE EXISTS'})
+        self.assertFalse(stat_mock.called)
@@ -0,0 +1,160 @@
+import json
+import socket
+from unittest import TestCase
+
+try:
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+except ImportError:  # Python 2
+    from urllib2 import HTTPError, Request, urlopen
+
+from healthcheck.checks import HealthCheck, HealthChecker
+from healthcheck.server import StatusServer, load_checker
+from healthcheck.wsgi import StatusApp
+
+
+class TaggedCheck(HealthCheck):
+    def __init__(self, ok=True, **kwargs):
+        super(TaggedCheck, self).__init__(**kwargs)
+        self.ok = ok
+
+    def run(self):
+        return self.report(self.ok, 'ok' if self.ok else 'down')
+
+
+checks = [TaggedCheck(check_id='db', tags=('ready',)),
+          TaggedCheck(check_id='web', tags=('live', 'ready'))]
+
+
+class TestStatusApp(TestCase):
+    def setUp(self):
+        self.db = TaggedCheck(check_id='db', tags=('ready',))
+        self.web = TaggedCheck(check_id='web', tags=('live', 'ready'))
+        self.app = StatusApp(HealthChecker([self.db, self.web]))
+
+    def request(self, path='/', method='GET', query_string=''):
+        responses = []
+
+        def start_response(status, headers):
+            responses.append((status, dict(headers)))
+
+        body = b''.join(self.app({
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query_string,
+        }, start_response))
+        status, headers = responses[0]
+        return status, headers, body
+
+    def test_ok(self):
+        status, headers, body = self.request()
+
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Type'], 'application/json')
+        self.assertEqual(headers['Content-Length'], str(len(body)))
+        self.assertEqual(json.loads(body.decode('utf-8')), {
+            'db': {'status': 'ok', 'details': 'ok'},
+            'web': {'status': 'ok', 'details': 'ok'},
+        })
+
+    def test_failed(self):
+        self.db.ok = False
+        status, _, body = self.request()
+        self.assertEqual(status, '500 Internal Server Error')
+        self.assertEqual(json.loads(body.decode('utf-8'))['db']['status'],
+                         'FAILED')
+
+    def test_tagged_routes(self):
+        self.db.ok = False
+        status, _, body = self.request('/live/')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(list(json.loads(body.decode('utf-8'))), ['web'])
+
+        status, _, _ = self.request('/ready')
+        self.assertEqual(status, '500 Internal Server Error')
+
+    def test_tags_query_parameter(self):
+        _, _, body = self.request(query_string='tags=live')
+        self.assertEqual(list(json.loads(body.decode('utf-8'))), ['web'])
+
+    def test_unknown_tags_are_not_found(self):
+        status, _, body = self.request(query_string='tags=live,redy')
+        self.assertEqual(status, '404 Not Found')
+        self.assertEqual(json.loads(body.decode('utf-8')),
+                         {'error': "No checks are tagged 'redy'."})
+
+        self.app.checker = HealthChecker([self.db])
+        status, _, _ = self.request('/live')
+        self.assertEqual(status, '404 Not Found')
+
+    def test_no_checks(self):
+        self.app.checker = HealthChecker([])
+        _, _, body = self.request()
+        self.assertEqual(json.loads(body.decode('utf-8')),
+                         'There were no checks.')
+
+    def test_head(self):
+        status, headers, body = self.request(method='HEAD')
+        self.assertEqual(status, '200 OK')
+        self.assertNotEqual(headers['Content-Length'], '0')
+        self.assertEqual(body, b'')
+
+    def test_errors(self):
+        status, headers, _ = self.request(method='POST')
+        self.assertEqual(status, '405 Method Not Allowed')
+        self.assertEqual(headers['Allow'], 'GET, HEAD')
+
+        status, _, body = self.request('/admin/')
+        self.assertEqual(status, '404 Not Found')
+        self.assertEqual(json.loads(body.decode('utf-8')),
+                         {'error': 'Not found.'})
+
+
+class TestStatusServer(TestCase):
+    def setUp(self):
+        self.check = TaggedCheck(check_id='db')
+        self.checker = HealthChecker([self.check])
+        self.server = StatusServer(self.checker, port=0).start()
+        self.addCleanup(self.server.stop)
+
+    def get(self, path='/'):
+        url = 'http://127.0.0.1:{0}{1}'.format(self.server.port, path)
+        try:
+            response = urlopen(Request(url), timeout=5)
+        except HTTPError as e:
+            response = e
+        return response.getcode(), json.loads(response.read().decode('utf-8'))
+
+    def test_serves_status(self):
+        self.assertEqual(self.get(), (200, {
+            'db': {'status': 'ok', 'details': 'ok'}}))
+
+        self.check.ok = False
+        status, _ = self.get('/')
+        self.assertEqual(status, 500)
+
+    def test_port_in_use(self):
+        server = StatusServer(self.checker, port=self.server.port)
+        self.assertRaises(socket.error, server.start)
+
+    def test_stop_frees_the_port(self):
+        port = self.server.port
+        self.server.stop()
+        server = StatusServer(self.checker, port=port).start()
+        server.stop()
+
+
+class TestLoadChecker(TestCase):
+    def test_list_of_checks(self):
+        checker = load_checker('tests.test_wsgi:checks')
+        self.assertIsInstance(checker, HealthChecker)
+        self.assertEqual(checker.tags, ['live', 'ready'])
+
+    def test_checker(self):
+        checker = HealthChecker(checks)
+        with self.assertRaisesRegexp(ValueError, 'module:attribute'):
+            load_checker('tests.test_wsgi')
+        import tests.test_wsgi
+        tests.test_wsgi.checker = checker
+        self.addCleanup(delattr, tests.test_wsgi, 'checker')
+        self.assertIs(load_checker('tests.test_wsgi:checker'), checker)